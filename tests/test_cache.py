@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import tutor_bot.cache as cache_module
+from tutor_bot.cache import TieredCache
+
+
+def _clock(monkeypatch, start: float) -> list:
+    now = [start]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_memory_tier_respects_ttl(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1000.0)
+    cache = TieredCache("test", str(tmp_path / "cache.sqlite3"), ttl=60)
+
+    async def scenario():
+        await cache.put("k", {"v": 1})
+        now[0] = 1030.0
+        fresh = await cache.get("k")
+        now[0] = 1061.0
+        expired = await cache.get("k")
+        return fresh, expired
+
+    fresh, expired = asyncio.run(scenario())
+    cache.close()
+    assert fresh == {"v": 1} and expired is None
+    assert cache.stats["memory_hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_disk_hit_keeps_original_expiry(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1000.0)
+    path = str(tmp_path / "cache.sqlite3")
+    writer = TieredCache("test", path, ttl=60)
+    reader = TieredCache("test", path, ttl=60)   # другой процесс: память пуста
+
+    async def scenario():
+        await writer.put("k", "value")
+        now[0] = 1050.0
+        from_disk = await reader.get("k")
+        now[0] = 1061.0    # срок считается от записи на диск, а не от попадания в память
+        expired = await reader.get("k")
+        return from_disk, expired
+
+    from_disk, expired = asyncio.run(scenario())
+    writer.close()
+    reader.close()
+    assert from_disk == "value" and expired is None
+    assert reader.stats["disk_hits"] == 1 and reader.stats["memory_hits"] == 0
+
+
+def test_no_ttl_never_expires(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1000.0)
+    cache = TieredCache("test", str(tmp_path / "cache.sqlite3"))
+
+    async def scenario():
+        await cache.put("k", [1, 2])
+        now[0] = 10 ** 9
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) == [1, 2]
+    cache.close()
+
+
+def _on_disk(path: str, *keys):
+    reader = TieredCache("test", path)   # пустая память: видно только то, что на диске
+
+    async def scenario():
+        return [await reader.get(key) for key in keys]
+
+    values = asyncio.run(scenario())
+    reader.close()
+    return values
+
+
+def test_memory_hits_protect_hot_keys_from_eviction(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1000.0)
+    monkeypatch.setattr(cache_module, "EVICT_EVERY", 1)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TieredCache("test", path, max_rows=2)
+
+    async def scenario():
+        await cache.put("hot", 1)
+        now[0] = 1001.0
+        await cache.put("cold", 2)
+        now[0] = 1002.0
+        assert await cache.get("hot") == 1      # из памяти
+        now[0] = 1003.0
+        await cache.put("new", 3)
+
+    asyncio.run(scenario())
+    cache.close()
+    assert cache.stats["memory_hits"] == 1 and cache.stats["evictions"] == 1
+    assert _on_disk(path, "hot", "cold", "new") == [1, None, 3]
+
+
+def test_disk_size_limited_by_bytes(tmp_path, monkeypatch):
+    now = _clock(monkeypatch, 1000.0)
+    monkeypatch.setattr(cache_module, "EVICT_EVERY", 1)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TieredCache("test", path, max_bytes=250)
+
+    async def scenario():
+        for n in range(3):
+            now[0] = 1000.0 + n
+            await cache.put(f"k{n}", "ы" * 50)     # 102 байта в JSON (UTF-8)
+
+    asyncio.run(scenario())
+    cache.close()
+    assert _on_disk(path, "k0", "k1", "k2") == [None, "ы" * 50, "ы" * 50]
@@ -0,0 +1,151 @@
+import os
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestServer
+
+import tools.fake_drive as fake_drive
+from tools.fake_drive import FakeDrive
+import tutor_bot.gdrive as gdrive
+from tutor_bot.drive_upload import CHUNK_GRANULARITY, ResumableUploader
+
+
+async def _token(force_refresh: bool) -> str:
+    return "test-token"
+
+
+def _script(monkeypatch, rolls):
+    """
+    Исходы кусков заглушки по порядку: 0.0 — ответ 503, 0.15 — обрыв на середине
+    (при fail_rate=drop_rate=0.1), 0.9 — кусок принят. Дальше все куски принимаются.
+    """
+    rolls = iter(rolls)
+    monkeypatch.setattr(fake_drive, "random", SimpleNamespace(random=lambda: next(rolls, 0.9)))
+
+
+async def _upload(drive: FakeDrive, filepath: str, file_id=None) -> dict:
+    server = TestServer(drive.app())
+    await server.start_server()
+    uploader = ResumableUploader(
+        _token, base_url=str(server.make_url("/upload/drive/v3/files")), chunk_size=CHUNK_GRANULARITY,
+    )
+    try:
+        return await uploader.upload(filepath, {"name": os.path.basename(filepath)}, file_id)
+    finally:
+        await uploader.close()
+        await server.close()
+
+
+def test_upload_resumes_after_503_and_dropped_connection(tmp_path, monkeypatch):
+    data = os.urandom(3 * CHUNK_GRANULARITY + 1234)
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(data)
+    _script(monkeypatch, [0.9, 0.0, 0.15])
+    drive = FakeDrive(fail_rate=0.1, drop_rate=0.1)
+
+    result = asyncio.run(_upload(drive, str(path)))
+
+    assert drive.files[result["id"]] == data
+    assert drive.stats["failures"] == 1 and drive.stats["drops"] == 1
+    assert drive.stats["sessions"] == 1      # продолжили ту же сессию, а не начали заново
+
+
+def test_upload_updates_existing_file(tmp_path, monkeypatch):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b'{"n": 1}\n' * 1000)
+    _script(monkeypatch, [])
+    drive = FakeDrive()
+    drive.files["log-file"] = b"old"
+
+    result = asyncio.run(_upload(drive, str(path), file_id="log-file"))
+
+    assert result["id"] == "log-file"
+    assert drive.files["log-file"] == path.read_bytes()
+
+
+class ExpiringDrive(FakeDrive):
+    """Первая сессия истекает после первого принятого куска."""
+
+    async def put_chunk(self, request):
+        resp = await super().put_chunk(request)
+        if self.stats["sessions"] == 1 and resp.status == 308:
+            self.expire_sessions()
+        return resp
+
+
+class LostResponseDrive(FakeDrive):
+    """Ответ о завершении выгрузки теряется: соединение рвётся после последнего куска."""
+
+    lost = False
+
+    async def put_chunk(self, request):
+        resp = await super().put_chunk(request)
+        if resp.status == 200 and not self.lost:
+            self.lost = True
+            request.transport.close()
+        return resp
+
+
+def test_expired_session_restarts_for_same_file(tmp_path, monkeypatch):
+    data = os.urandom(3 * CHUNK_GRANULARITY)
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(data)
+    _script(monkeypatch, [])
+    drive = ExpiringDrive()
+    drive.files["log-file"] = b"old"
+
+    result = asyncio.run(_upload(drive, str(path), file_id="log-file"))
+
+    assert result["id"] == "log-file"
+    assert drive.files == {"log-file": data}
+    assert drive.stats["sessions"] == 2
+
+
+def test_resync_after_lost_completion_returns_file(tmp_path, monkeypatch):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(os.urandom(CHUNK_GRANULARITY + 10))
+    _script(monkeypatch, [])
+    drive = LostResponseDrive()
+
+    result = asyncio.run(_upload(drive, str(path)))
+
+    assert list(drive.files) == [result["id"]]
+    assert drive.stats["sessions"] == 1
+
+
+async def _sync_log(drive: FakeDrive, filepath: str, folder: str) -> str:
+    server = TestServer(drive.app())
+    await server.start_server()
+    gdrive._uploader = ResumableUploader(
+        _token, base_url=str(server.make_url("/upload/drive/v3/files")), chunk_size=CHUNK_GRANULARITY,
+    )
+    try:
+        return await gdrive.upload_file_to_gdrive_async(filepath, folder, is_log=True)
+    finally:
+        await gdrive.close_uploader()
+        await server.close()
+
+
+def test_log_keeps_its_id_when_session_expires(tmp_path, monkeypatch):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(os.urandom(3 * CHUNK_GRANULARITY))
+    _script(monkeypatch, [])
+    drive = ExpiringDrive()
+    drive.files["log-file"] = b"old"
+    monkeypatch.setattr(gdrive, "_file_ids", {("folder", "records.jsonl"): "log-file"})
+
+    assert asyncio.run(_sync_log(drive, str(path), "folder")) == "log-file"
+    assert list(drive.files) == ["log-file"]
+
+
+def test_deleted_log_is_created_again_and_remembered(tmp_path, monkeypatch):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b'{"n": 1}\n')
+    _script(monkeypatch, [])
+    drive = FakeDrive()
+    monkeypatch.setattr(gdrive, "_file_ids", {("folder", "records.jsonl"): "deleted"})
+
+    file_id = asyncio.run(_sync_log(drive, str(path), "folder"))
+
+    assert file_id in drive.files and file_id != "deleted"
+    assert gdrive._file_ids == {("folder", "records.jsonl"): file_id}
@@ -0,0 +1,42 @@
+import json
+import asyncio
+
+from tutor_bot.interaction_log import InteractionLog
+
+
+def test_writer_survives_failing_callbacks(tmp_path):
+    path = tmp_path / "records.jsonl"
+    calls = []
+
+    def on_flush(flushed):
+        calls.append(flushed)
+        raise RuntimeError("drive недоступен")
+
+    async def scenario():
+        log = InteractionLog(str(path), flush_interval=0.01, on_flush=on_flush)
+        await asyncio.wait_for(log.append({"n": 1}), 5)
+        # Писатель пережил ошибку обработчика: следующая пачка тоже записывается
+        await asyncio.wait_for(log.append({"n": 2}), 5)
+        await log.close()
+
+    asyncio.run(scenario())
+    assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [1, 2]
+    assert len(calls) == 2
+
+
+def test_writer_survives_failing_rotate_callback(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text("{}\n")
+
+    def on_rotate(rotated):
+        raise RuntimeError("drive недоступен")
+
+    async def scenario():
+        log = InteractionLog(str(path), max_bytes=1, flush_interval=0.01, on_rotate=on_rotate)
+        await asyncio.wait_for(log.append({"n": 1}), 5)
+        await asyncio.wait_for(log.append({"n": 2}), 5)
+        await log.close()
+
+    asyncio.run(scenario())
+    assert json.loads(path.read_text())["n"] == 2
+    assert len(list(tmp_path.glob("records-*.jsonl"))) == 2
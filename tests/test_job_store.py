@@ -0,0 +1,39 @@
+import asyncio
+
+from tutor_bot.job_store import JOB_MAX_ATTEMPTS, JobStore
+
+
+def test_attempts_move_job_from_unfinished_to_exhausted(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def scenario():
+        await store.create("1:1", 1, "voice", "{}")
+        await store.advance("1:1", "downloaded", audio_path="spool/1_1.ogg", audio_ext="ogg")
+        await store.advance("1:1", "transcribed", text="hello", archive_path="voice_records/hello.ogg")
+        states = []
+        for _ in range(JOB_MAX_ATTEMPTS):
+            states.append(([j.id for j in await store.unfinished()], [j.id for j in await store.exhausted()]))
+            await store.fail("1:1", "boom")
+        states.append(([j.id for j in await store.unfinished()], [j.id for j in await store.exhausted()]))
+        job = await store.get("1:1")
+        await store.fail("1:1", "попытки исчерпаны", final=True)
+        return states, job, await store.exhausted()
+
+    states, job, after_final = asyncio.run(scenario())
+    store.close()
+    assert states[:-1] == [(["1:1"], [])] * JOB_MAX_ATTEMPTS
+    assert states[-1] == ([], ["1:1"])
+    # Результаты этапов сохраняются между попытками: повтор продолжается с transcribed
+    assert job.stage == "transcribed" and job.data["archive_path"] == "voice_records/hello.ogg"
+    assert job.data["audio_path"] == "spool/1_1.ogg" and job.error == "boom"
+    assert after_final == []
+
+
+def test_duplicate_create_is_rejected(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def scenario():
+        return await store.create("1:1", 1, "text", "{}"), await store.create("1:1", 1, "text", "{}")
+
+    assert asyncio.run(scenario()) == (True, False)
+    store.close()
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+import tutor_bot.long_audio as long_audio
+from tutor_bot.long_audio import Chunk, plan_chunks, stitch_transcripts
+
+
+def test_short_recording_is_one_chunk():
+    assert plan_chunks(60, []) == [Chunk(0.0, 60, "end")]
+
+
+def test_cut_at_pause_nearest_to_target():
+    chunks = plan_chunks(100, [(30.0, 31.0), (44.0, 46.0), (70.0, 71.0)], overlap=1.0)
+    assert chunks == [Chunk(0.0, 45.5, "pause"), Chunk(44.5, 100, "end")]
+
+
+def test_hard_cut_without_pause():
+    chunks = plan_chunks(160, [], target=45, longest=75, overlap=2.0)
+    assert [c.cut for c in chunks] == ["hard", "hard", "end"]
+    assert chunks[0] == Chunk(0.0, 76.0, "hard")
+    assert chunks[1].start == 74.0 and chunks[-1].end == 160
+
+
+def test_short_tail_is_merged_into_previous_chunk():
+    assert plan_chunks(76, [(75.5, 76)]) == [Chunk(0.0, 76, "end")]
+    chunks = plan_chunks(123, [(44.0, 46.0), (119.0, 120.0)], overlap=1.0)
+    assert chunks == [Chunk(0.0, 45.5, "pause"), Chunk(44.5, 123, "end")]
+    assert all(c.end - c.start >= 5 for c in plan_chunks(151, []))
+
+
+def test_stitch_removes_repeated_words_at_seam():
+    texts = ["I went to the shop and", "shop and bought some bread"]
+    assert stitch_transcripts(texts) == "I went to the shop and bought some bread"
+
+
+def test_stitch_keeps_punctuated_copy_of_overlap():
+    texts = ["I went to the store and", "store and bought milk", "bought milk. Then we left"]
+    assert stitch_transcripts(texts) == "I went to the store and bought milk. Then we left"
+
+
+def test_stitch_skips_words_cut_off_at_the_edge():
+    texts = ["we talked about the research gro-", "about the research group and its plans"]
+    assert stitch_transcripts(texts) == "we talked about the research group and its plans"
+
+
+def test_single_word_is_not_a_repeat():
+    assert stitch_transcripts(["No no", "no, I disagree"]) == "No no no, I disagree"
+    assert stitch_transcripts(["It was", "was good"]) == "It was was good"
+
+
+def _fake_ffmpeg(monkeypatch, seconds: float, encode):
+    async def decode_pcm(audio):
+        return b"\0" * int(seconds * long_audio.PCM_BYTES_PER_SECOND)
+
+    async def detect_silences(pcm, threshold, min_pause):
+        return []
+
+    monkeypatch.setattr(long_audio, "decode_pcm", decode_pcm)
+    monkeypatch.setattr(long_audio, "detect_silences", detect_silences)
+    monkeypatch.setattr(long_audio, "transcode_audio", encode)
+
+
+def test_chunks_of_passthrough_profile_are_mp3(monkeypatch):
+    formats = []
+
+    async def encode(data, fmt="mp3", extra_args=(), input_args=()):
+        formats.append(fmt)
+        return b"chunk"
+
+    async def transcribe(audio, filename):
+        return filename
+
+    _fake_ffmpeg(monkeypatch, 160, encode)
+    monkeypatch.setattr(long_audio, "AUDIO_PROFILE", "passthrough")
+    text = asyncio.run(long_audio.transcribe_long_audio(b"voice", "voice.ogg", transcribe))
+    assert formats == ["mp3", "mp3", "mp3"]
+    assert text == "chunk.mp3 chunk.mp3 chunk.mp3"
+
+
+def test_failed_chunk_falls_back_to_whole_recording(monkeypatch):
+    async def encode(data, fmt="mp3", extra_args=(), input_args=()):
+        raise long_audio.TranscodeError("Unknown encoder")
+
+    async def transcribe(audio, filename):
+        return f"{filename}: {len(audio)}"
+
+    _fake_ffmpeg(monkeypatch, 150, encode)
+    text = asyncio.run(long_audio.transcribe_long_audio(b"voice", "voice.ogg", transcribe))
+    assert text == "voice.ogg: 5"
+
+    monkeypatch.setattr(long_audio, "LONG_AUDIO_MAX_BYTES", 4)
+    with pytest.raises(long_audio.TranscriptionError):
+        asyncio.run(long_audio.transcribe_long_audio(b"voice", "voice.ogg", transcribe))
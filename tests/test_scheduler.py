@@ -0,0 +1,102 @@
+import asyncio
+from collections import Counter
+
+from tutor_bot.scheduler import FairScheduler, TokenBucket
+
+
+def test_chats_are_served_round_robin():
+    scheduler = FairScheduler("test", workers=1)
+    order = []
+
+    def job(name: str):
+        async def run():
+            order.append(name)
+            return name
+        return run
+
+    async def scenario():
+        jobs = [("A", 5), ("B", 2), ("C", 1)]
+        submits = [scheduler.submit(chat, job(f"{chat}{n}")) for chat, count in jobs for n in range(count)]
+        results = await asyncio.gather(*submits)
+        await scheduler.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert order == ["A0", "B0", "C0", "A1", "B1", "A2", "A3", "A4"]
+    assert results == ["A0", "A1", "A2", "A3", "A4", "B0", "B1", "C0"]
+    assert scheduler.stats["completed"] == 8 and scheduler.stats["max_depth"] == 8
+
+
+def test_one_running_job_per_chat():
+    scheduler = FairScheduler("test", workers=4)
+    running = Counter()
+    peak = Counter()
+
+    def job(chat: str):
+        async def run():
+            running[chat] += 1
+            peak[chat] = max(peak[chat], running[chat])
+            peak["total"] = max(peak["total"], sum(running.values()))
+            await asyncio.sleep(0.01)
+            running[chat] -= 1
+        return run
+
+    async def scenario():
+        await asyncio.gather(*(scheduler.submit(chat, job(chat)) for chat in "AAAABB"))
+        await scheduler.close()
+
+    asyncio.run(scenario())
+    assert peak["A"] == 1 and peak["B"] == 1
+    assert peak["total"] == 2
+
+
+def test_failed_job_raises_to_caller_and_queue_moves_on():
+    scheduler = FairScheduler("test", workers=1)
+
+    async def broken():
+        raise ValueError("boom")
+
+    async def fine():
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(
+            scheduler.submit("A", broken), scheduler.submit("A", fine), return_exceptions=True
+        )
+        await scheduler.close()
+        return results
+
+    error, result = asyncio.run(scenario())
+    assert isinstance(error, ValueError) and result == "ok"
+    assert scheduler.stats["failed"] == 1 and scheduler.stats["completed"] == 1
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600)    # 10 токенов в секунду
+
+    async def scenario():
+        first = await bucket.acquire(600)   # весь бак — без ожидания
+        second = await bucket.acquire(5)    # ждём 5 токенов ≈ 0.5 с
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first < 0.05
+    assert 0.4 < second < 1.0
+
+
+def test_scheduler_charges_cost_to_limiter():
+    scheduler = FairScheduler("test", workers=2, limiter=TokenBucket(per_minute=600))
+
+    async def job():
+        return asyncio.get_running_loop().time()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = await scheduler.submit("A", job, cost=600)
+        second = await scheduler.submit("B", job, cost=5)
+        await scheduler.close()
+        return first - started, second - started
+
+    first, second = asyncio.run(scenario())
+    assert first < 0.05 and 0.4 < second < 1.0
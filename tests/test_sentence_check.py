@@ -0,0 +1,57 @@
+import pytest
+
+from tutor_bot.sentence_check import (
+    PRECHECK_MAX_SENTENCES, PRECHECK_MAX_WORDS, REQUIRED_SENTENCES, RUN_ON_WORDS, precheck, split_sentences,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I said no. Then I left. The answer is no. We went home.", 4),
+    ("I ate a fig. It was sweet.", 2),
+    ("See No. 5 and Fig. 2 on pp. 10 here. It is clear.", 2),
+    ("Smith et al. showed it. Others agree.", 2),
+    ("Dr. Brown met Mrs. Green at 3 p.m. in the U.S. capital. They talked.", 2),
+    ("Prices rose by 3.5 percent. That is a lot.", 2),
+    ("For example, e.g. cats, i.e. pets, etc. are fine. Dogs too.", 2),
+    ("J. Smith wrote it. I read it.", 2),
+    ("Well... maybe not. Wait... Really? Yes!", 4),
+    ("He asked \"Why?\" Nobody knew.", 2),
+    ("", 0),
+    ("no punctuation at all", 1),
+])
+def test_split_sentences(text, expected):
+    assert len(split_sentences(text)) == expected
+
+
+def _monologue(sentences: int, words_per_sentence: int) -> str:
+    sentence = " ".join(["word"] * (words_per_sentence - 1) + ["end."])
+    return " ".join([sentence.capitalize()] * sentences)
+
+
+def test_precheck_short_at_limits():
+    result = precheck(_monologue(PRECHECK_MAX_SENTENCES, PRECHECK_MAX_WORDS // PRECHECK_MAX_SENTENCES))
+    assert result.sentences == PRECHECK_MAX_SENTENCES
+    assert result.words <= PRECHECK_MAX_WORDS
+    assert result.verdict == "short"
+
+
+def test_precheck_one_sentence_over_is_borderline():
+    result = precheck(_monologue(PRECHECK_MAX_SENTENCES + 1, 5))
+    assert result.verdict == "borderline"
+
+
+def test_precheck_one_word_over_is_borderline():
+    text = _monologue(PRECHECK_MAX_SENTENCES, PRECHECK_MAX_WORDS // PRECHECK_MAX_SENTENCES) + " Extra"
+    assert precheck(text).words == PRECHECK_MAX_WORDS + 1
+    assert precheck(text).verdict == "borderline"
+
+
+def test_precheck_required_sentences_is_ok():
+    assert precheck(_monologue(REQUIRED_SENTENCES - 1, 12)).verdict == "borderline"
+    assert precheck(_monologue(REQUIRED_SENTENCES, 12)).verdict == "ok"
+
+
+def test_precheck_run_on_transcript_is_borderline():
+    # Whisper почти без точек: два «предложения» по 50 слов — не «явно мало»
+    result = precheck(_monologue(2, RUN_ON_WORDS + 10))
+    assert result.sentences == 2 and result.verdict == "borderline"
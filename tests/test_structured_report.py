@@ -0,0 +1,38 @@
+import copy
+
+import pytest
+
+from tutor_bot.prompts import EXAMPLE_1_JSON, EXAMPLE_1_OUTPUT, EXAMPLE_2_JSON, EXAMPLE_2_OUTPUT
+from tutor_bot.structured_report import render_report, validate_report
+
+
+@pytest.mark.parametrize("data, text", [(EXAMPLE_1_JSON, EXAMPLE_1_OUTPUT), (EXAMPLE_2_JSON, EXAMPLE_2_OUTPUT)])
+def test_render_matches_text_examples(data, text):
+    assert render_report(validate_report(data)) == text
+
+
+def _broken(**changes) -> dict:
+    return {**copy.deepcopy(EXAMPLE_1_JSON), **changes}
+
+
+def test_validate_orders_aspects():
+    data = _broken(aspects=list(reversed(EXAMPLE_1_JSON["aspects"])))
+    assert validate_report(data)["aspects"] == EXAMPLE_1_JSON["aspects"]
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {key: value for key, value in EXAMPLE_1_JSON.items() if key != "errors"},
+    _broken(overall=6),
+    _broken(aspects=EXAMPLE_1_JSON["aspects"][:3]),
+    _broken(aspects=EXAMPLE_1_JSON["aspects"] + EXAMPLE_1_JSON["aspects"][:1]),
+    _broken(aspects=[{**EXAMPLE_1_JSON["aspects"][0], "score": 7}, *EXAMPLE_1_JSON["aspects"][1:]]),
+    _broken(aspects=["lexical_grammatical", *EXAMPLE_1_JSON["aspects"][1:]]),
+    _broken(aspects="lexical_grammatical"),
+    _broken(errors=["international cooperating → international cooperation"]),
+    _broken(errors=[{"original": "x", "corrected": "y"}]),
+    _broken(exercises=["Вставьте артикль"]),
+])
+def test_validate_rejects_malformed_reports(data):
+    with pytest.raises(ValueError):
+        validate_report(data)
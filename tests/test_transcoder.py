@@ -0,0 +1,26 @@
+import asyncio
+
+import tutor_bot.transcoder as transcoder
+from tutor_bot.transcoder import TRANSCODE_STATS, prepare_for_transcription
+
+VOICE = b"OggS" + b"\0" * 1020
+
+
+def test_passthrough_keeps_voice_as_is():
+    before = TRANSCODE_STATS["passthrough"]
+    audio, ext = asyncio.run(prepare_for_transcription(VOICE, "passthrough"))
+    assert (audio, ext) == (VOICE, "ogg")
+    assert TRANSCODE_STATS["passthrough"] == before + 1
+
+
+def test_preprocessed_audio_is_counted(monkeypatch):
+    async def fake_transcode(data, fmt="mp3", extra_args=(), input_args=()):
+        return b"OggS" + b"\0" * 100
+
+    monkeypatch.setattr(transcoder, "transcode_audio", fake_transcode)
+    before = dict(TRANSCODE_STATS)
+    audio, ext = asyncio.run(prepare_for_transcription(VOICE, "speech"))
+    assert ext == "ogg" and len(audio) == 104
+    assert TRANSCODE_STATS["preprocessed"] == before.get("preprocessed", 0) + 1
+    assert TRANSCODE_STATS["passthrough"] == before.get("passthrough", 0)
+    assert TRANSCODE_STATS["transcoded"] == before.get("transcoded", 0)
@@ -0,0 +1,76 @@
+import os
+import json
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+
+from tutor_bot.webhook import SECRET_HEADER, UpdateIntake
+
+SAMPLE_UPDATES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tools", "sample_updates.jsonl")
+
+
+def _sample_updates() -> list:
+    with open(SAMPLE_UPDATES, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _intake_client(handled: list, release: asyncio.Event):
+    dp = Dispatcher()
+
+    @dp.message()
+    async def on_message(message: Message):
+        await release.wait()   # «долгая оценка»
+        handled.append(message.text)
+
+    intake = UpdateIntake(dp, Bot("123456:TEST"), "secret")
+    app = web.Application()
+    app.router.add_post("/telegram/webhook", intake.handle)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return intake, client
+
+
+def test_webhook_acks_before_processing():
+    updates = [u for u in _sample_updates() if "text" in u.get("message", {})]
+
+    async def scenario():
+        handled, release = [], asyncio.Event()
+        intake, client = await _intake_client(handled, release)
+        try:
+            for update in updates:
+                resp = await client.post("/telegram/webhook", json=update, headers={SECRET_HEADER: "secret"})
+                assert resp.status == 200
+            # Ответ 200 получен, пока обработка ещё ждёт
+            assert handled == [] and intake.pending() == len(updates)
+            release.set()
+            await intake.close()
+        finally:
+            await client.close()
+        return handled
+
+    handled = asyncio.run(scenario())
+    assert sorted(handled) == sorted(u["message"]["text"] for u in updates)
+
+
+def test_webhook_rejects_wrong_secret_and_bad_json():
+    update = _sample_updates()[0]
+
+    async def scenario():
+        handled, release = [], asyncio.Event()
+        release.set()
+        intake, client = await _intake_client(handled, release)
+        try:
+            missing = await client.post("/telegram/webhook", json=update)
+            wrong = await client.post("/telegram/webhook", json=update, headers={SECRET_HEADER: "guess"})
+            bad = await client.post("/telegram/webhook", data="{not json", headers={SECRET_HEADER: "secret"})
+            await intake.close()
+        finally:
+            await client.close()
+        return [missing.status, wrong.status, bad.status], handled, intake.pending()
+
+    statuses, handled, pending = asyncio.run(scenario())
+    assert statuses == [401, 401, 400]
+    assert handled == [] and pending == 0
@@ -0,0 +1,128 @@
+"""
+Сравнение профилей предобработки аудио перед Whisper (AUDIO_PROFILE, transcoder.py).
+
+Каждый файл прогоняется через каждый профиль: размер до и после, время ffmpeg.
+С --transcribe результат отправляется в Whisper: задержка расшифровки и
+совпадение слов с расшифровкой без предобработки (passthrough) — так видно,
+не теряется ли точность на сжатом звуке.
+
+Использование:
+    python tools/audio_profile_bench.py voice_records_mp3/
+    OPENAI_API_KEY=... python tools/audio_profile_bench.py samples/*.oga --transcribe
+    python tools/audio_profile_bench.py samples/ --profiles speech,compact --transcribe --base-url http://127.0.0.1:8087/v1
+"""
+import os
+import sys
+import time
+import asyncio
+import difflib
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from openai import AsyncOpenAI  # noqa: E402
+
+from tutor_bot.transcoder import AUDIO_PROFILES, TranscodeError, prepare_for_transcription  # noqa: E402
+from tutor_bot.transcription import WHISPER_MODEL  # noqa: E402
+
+AUDIO_EXTENSIONS = (".oga", ".ogg", ".opus", ".mp3", ".wav", ".flac", ".m4a", ".webm")
+
+
+def collect_files(paths: List[str], limit: int) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    return files[:limit] if limit else files
+
+
+def word_match(reference: str, text: str) -> float:
+    """
+    Доля совпадающих слов (без регистра и пунктуации) относительно эталона.
+    """
+    def words(value: str) -> List[str]:
+        return [w.strip(".,!?;:\"'()«»—-").lower() for w in value.split() if w.strip(".,!?;:\"'()«»—-")]
+    ref, hyp = words(reference), words(text)
+    if not ref:
+        return 1.0 if not hyp else 0.0
+    matcher = difflib.SequenceMatcher(a=ref, b=hyp, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(ref)
+
+
+async def run(args) -> None:
+    files = collect_files(args.paths, args.limit)
+    if not files:
+        raise SystemExit("Нет аудиофайлов")
+    profiles = [p for p in args.profiles.split(",") if p]
+    unknown = [p for p in profiles if p not in AUDIO_PROFILES]
+    if unknown:
+        raise SystemExit(f"Неизвестные профили: {', '.join(unknown)} (доступны: {', '.join(AUDIO_PROFILES)})")
+    if args.transcribe and "passthrough" not in profiles:
+        profiles.insert(0, "passthrough")   # эталон для сравнения расшифровок
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY", "bench"), base_url=args.base_url) if args.transcribe else None
+    rows: Dict[str, Dict[str, list]] = {p: {"in": [], "out": [], "ffmpeg": [], "whisper": [], "match": []} for p in profiles}
+    reference: Dict[str, str] = {}
+    try:
+        for number, path in enumerate(files, 1):
+            with open(path, "rb") as f:
+                data = f.read()
+            for profile in profiles:
+                row = rows[profile]
+                started = time.monotonic()
+                try:
+                    audio, ext = await prepare_for_transcription(data, profile)
+                except TranscodeError as e:
+                    print(f"[{number}] {profile}: ошибка ffmpeg {e}")
+                    continue
+                row["ffmpeg"].append(time.monotonic() - started)
+                row["in"].append(len(data))
+                row["out"].append(len(audio))
+                line = f"[{number}] {profile:<12}{len(data):>9} → {len(audio):>9} байт"
+                if client is not None:
+                    started = time.monotonic()
+                    resp = await client.audio.transcriptions.create(model=WHISPER_MODEL, file=(f"voice.{ext}", audio))
+                    row["whisper"].append(time.monotonic() - started)
+                    reference.setdefault(path, resp.text)
+                    row["match"].append(word_match(reference[path], resp.text))
+                    line += f", Whisper {row['whisper'][-1]:.2f} с, совпадение слов {row['match'][-1]:.0%}"
+                print(line)
+    finally:
+        if client is not None:
+            await client.close()
+
+    base = rows.get("passthrough")
+    base_whisper = statistics.median(base["whisper"]) if base and base["whisper"] else None
+    print(f"\n{'профиль':<13}{'файлов':>7}{'байт до':>11}{'байт после':>12}{'доля':>7}"
+          f"{'ffmpeg p50':>11}{'Whisper p50':>12}{'Δ Whisper':>10}{'слова':>7}")
+    for profile in profiles:
+        row = rows[profile]
+        if not row["in"]:
+            continue
+        size_in, size_out = sum(row["in"]), sum(row["out"])
+        line = (f"{profile:<13}{len(row['in']):>7}{size_in:>11}{size_out:>12}{size_out / size_in:>7.0%}"
+                f"{statistics.median(row['ffmpeg']):>10.2f}с")
+        if row["whisper"]:
+            whisper = statistics.median(row["whisper"])
+            delta = f"{whisper - base_whisper:+.2f}с" if base_whisper is not None else "—"
+            line += f"{whisper:>11.2f}с{delta:>10}{statistics.mean(row['match']):>7.0%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Размер аудио и задержка Whisper по профилям предобработки")
+    parser.add_argument("paths", nargs="+", help="аудиофайлы или папки с ними")
+    parser.add_argument("--profiles", default=",".join(AUDIO_PROFILES), help="профили через запятую")
+    parser.add_argument("--limit", type=int, default=0, help="сколько файлов взять (0 — все)")
+    parser.add_argument("--transcribe", action="store_true", help="отправлять результат в Whisper")
+    parser.add_argument("--base-url", help="адрес OpenAI-совместимого API (например, локального стенда)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
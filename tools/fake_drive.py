@@ -0,0 +1,171 @@
+"""
+Локальная заглушка Google Drive v3 для проверки возобновляемой выгрузки (drive_upload.py).
+
+Поддерживает:
+    GET   /drive/v3/files?q=name = '<имя>' ...                  — поиск файла по имени (files.list)
+    POST  /upload/drive/v3/files?uploadType=resumable           — новая сессия (создание файла)
+    PATCH /upload/drive/v3/files/<id>?uploadType=resumable      — новая сессия (обновление)
+    PUT   /upload/session/<sid>                                 — куски и запрос статуса
+
+Сбои внедряются параметрами: --fail-rate (доля кусков с ответом 503),
+--drop-rate (доля кусков, принятых наполовину с обрывом соединения),
+--bandwidth (байт/с на приём). С --token запросы без заголовка
+"Authorization: Bearer <token>" получают 401.
+
+Запуск:
+    python tools/fake_drive.py --port 8089 --fail-rate 0.2 --token local
+    GOOGLE_ACCESS_TOKEN=local DRIVE_API_URL=http://127.0.0.1:8089/drive/v3/ \
+        DRIVE_UPLOAD_URL=http://127.0.0.1:8089/upload/drive/v3/files python main3.py
+"""
+import re
+import json
+import uuid
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+
+class FakeDrive:
+    def __init__(self, fail_rate: float = 0.0, drop_rate: float = 0.0, bandwidth: int = 0, token: str = None):
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.bandwidth = bandwidth
+        self.token = token
+        self.sessions = {}   # sid → {"file_id", "total", "data", "done"}
+        self.files = {}      # file_id → bytes
+        self.metadata = {}   # file_id → {"name", "parents"}
+        self.stats = {"sessions": 0, "chunks": 0, "failures": 0, "drops": 0, "lists": 0, "unauthorized": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=1024 ** 3, middlewares=[self.check_token])
+        app.router.add_get("/drive/v3/files", self.list_files)
+        app.router.add_post("/upload/drive/v3/files", self.start_session)
+        app.router.add_patch("/upload/drive/v3/files/{file_id}", self.start_session)
+        app.router.add_put("/upload/session/{sid}", self.put_chunk)
+        return app
+
+    @web.middleware
+    async def check_token(self, request: web.Request, handler):
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            self.stats["unauthorized"] += 1
+            return web.Response(status=401)
+        return await handler(request)
+
+    async def list_files(self, request: web.Request) -> web.Response:
+        # Понимаем только запросы вида "name = '<имя>' and ... and '<папка>' in parents"
+        self.stats["lists"] += 1
+        query = request.query.get("q", "")
+        name = re.search(r"name = '((?:[^'\\]|\\.)*)'", query)
+        parent = re.search(r"'([^']*)' in parents", query)
+        found = [
+            {"id": file_id, "name": meta["name"]}
+            for file_id, meta in self.metadata.items()
+            if name and meta["name"] == re.sub(r"\\(.)", r"\1", name.group(1))
+            and (parent is None or parent.group(1) in meta["parents"])
+        ]
+        return web.json_response({"files": found})
+
+    async def start_session(self, request: web.Request) -> web.Response:
+        if request.query.get("uploadType") != "resumable":
+            return web.Response(status=400)
+        file_id = request.match_info.get("file_id")
+        if file_id is not None and file_id not in self.files:
+            return web.Response(status=404)
+        if file_id is None:
+            body = await request.text()
+            metadata = json.loads(body) if body else {}
+            file_id = uuid.uuid4().hex[:16]
+            self.metadata[file_id] = {"name": metadata.get("name", file_id), "parents": metadata.get("parents", [])}
+        sid = uuid.uuid4().hex
+        self.sessions[sid] = {
+            "file_id": file_id,
+            "total": int(request.headers.get("X-Upload-Content-Length", "0")),
+            "data": bytearray(),
+        }
+        self.stats["sessions"] += 1
+        location = str(request.url.with_path(f"/upload/session/{sid}").with_query(None))
+        return web.Response(status=200, headers={"Location": location})
+
+    def _incomplete(self, session) -> web.Response:
+        headers = {}
+        if session["data"]:
+            headers["Range"] = f"bytes=0-{len(session['data']) - 1}"
+        return web.Response(status=308, headers=headers)
+
+    def _complete(self, sid, session) -> web.Response:
+        # Как Drive: завершённая сессия и дальше отвечает ресурсом файла на запрос статуса
+        if not session.get("done"):
+            self.files[session["file_id"]] = bytes(session["data"])
+            session["done"] = True
+        return web.json_response({"id": session["file_id"]})
+
+    def expire_sessions(self) -> None:
+        """Все открытые сессии становятся недействительными (404), как истёкшие."""
+        self.sessions.clear()
+
+    async def put_chunk(self, request: web.Request) -> web.Response:
+        sid = request.match_info["sid"]
+        session = self.sessions.get(sid)
+        if session is None:
+            return web.Response(status=404)
+
+        content_range = request.headers.get("Content-Range", "")
+        body = await request.read()
+        if self.bandwidth:
+            await asyncio.sleep(len(body) / self.bandwidth)
+
+        if session.get("done"):
+            return self._complete(sid, session)
+
+        # Запрос статуса: "bytes */<total>"
+        if re.fullmatch(r"bytes \*/\d+", content_range):
+            if len(session["data"]) >= session["total"]:
+                return self._complete(sid, session)
+            return self._incomplete(session)
+
+        m = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+        if not m:
+            return web.Response(status=400)
+        start, end = int(m.group(1)), int(m.group(2))
+        received = len(session["data"])
+        if start > received or end - start + 1 != len(body):
+            return web.Response(status=400, text="offset mismatch")
+        # Как и настоящий Drive, уже принятые байты повторного куска пропускаем
+        body = body[received - start:]
+
+        self.stats["chunks"] += 1
+        roll = random.random()
+        if roll < self.fail_rate:
+            self.stats["failures"] += 1
+            return web.Response(status=503)
+        if roll < self.fail_rate + self.drop_rate:
+            # Приняли половину куска, затем «оборвали» соединение
+            self.stats["drops"] += 1
+            session["data"] += body[: len(body) // 2]
+            request.transport.close()
+            return web.Response(status=503)
+
+        session["data"] += body
+        if len(session["data"]) >= session["total"]:
+            return self._complete(sid, session)
+        return self._incomplete(session)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка Google Drive для resumable upload")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=int, default=0)
+    parser.add_argument("--token", help="ожидаемый OAuth-токен (без него авторизация не проверяется)")
+    args = parser.parse_args()
+
+    drive = FakeDrive(args.fail_rate, args.drop_rate, args.bandwidth, args.token)
+    web.run_app(drive.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
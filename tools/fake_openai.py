@@ -0,0 +1,217 @@
+"""
+Локальная заглушка OpenAI API для нагрузочных тестов (tools/loadtest.py).
+
+Поддерживает:
+    GET  /v1/models/<id>               — прогрев клиента
+    POST /v1/audio/transcriptions      — Whisper
+    POST /v1/chat/completions          — оценка: обычный ответ, поток (stream=True)
+                                         и JSON по схеме (response_format=json_schema)
+
+Задержки настраиваются: --whisper-latency, --ttft (время до первого токена),
+--tps (токенов в секунду), --completion-tokens (длина ответа), --fail-rate
+(доля ответов 500). Метка запроса вида [lt:...] из аудио или текста
+возвращается в конце ответа — по ней стенд связывает этапы одного запроса.
+
+Запуск отдельно:
+    python tools/fake_openai.py --port 8087 --ttft 0.8 --tps 80
+    OPENAI_BASE_URL=http://127.0.0.1:8087/v1 python main3.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Callable, Optional
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tutor_bot.structured_report import ASPECTS, GENERAL  # noqa: E402
+
+TAG_RE = re.compile(r"\[lt:[^\]]+\]")
+
+TRANSCRIPT = (
+    "Foreign languages are very important for international cooperation in science. "
+    "Many scientists must communicate in English because it is a global language. "
+    "Without a common language, research ideas stay inside national borders. "
+    "International groups help scientists to find better solutions faster. "
+    "However, the language barrier sometimes makes it difficult to understand each other. "
+    "For example, my research group worked with colleagues from France last year. "
+    "It was hard to explain complicated ideas during our online meetings. "
+    "Translators help, but they sometimes make serious mistakes. "
+    "Therefore, learning a foreign language helps scientists to avoid misunderstanding. "
+    "Some people think that translation technology solves the problem, but I disagree. "
+    "It is better when we can understand each other directly. "
+    "So foreign languages are useful for collaboration and for solving scientific issues."
+)
+REPORT_LINE = "Ответ в целом соответствует теме, но содержит ошибки в согласовании и артиклях. "
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 3 + 1
+
+
+class FakeOpenAI:
+    def __init__(
+        self,
+        whisper_latency: float = 1.0,
+        ttft: float = 0.5,
+        tps: float = 100.0,
+        completion_tokens: int = 800,
+        fail_rate: float = 0.0,
+        on_event: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.whisper_latency = whisper_latency
+        self.ttft = ttft
+        self.tps = tps
+        self.completion_tokens = completion_tokens
+        self.fail_rate = fail_rate
+        self.on_event = on_event
+        self.stats = {"transcriptions": 0, "completions": 0, "streams": 0, "failures": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_get("/v1/models/{model}", self.model)
+        app.router.add_post("/v1/audio/transcriptions", self.transcribe)
+        app.router.add_post("/v1/chat/completions", self.complete)
+        return app
+
+    def _event(self, name: str, tag: str) -> None:
+        if self.on_event is not None and tag:
+            self.on_event(name, tag)
+
+    def _fail(self) -> Optional[web.Response]:
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.stats["failures"] += 1
+            return web.json_response({"error": {"message": "injected failure", "type": "server_error"}}, status=500)
+        return None
+
+    async def model(self, request: web.Request) -> web.Response:
+        return web.json_response({"id": request.match_info["model"], "object": "model", "created": 0, "owned_by": "fake"})
+
+    # ─── Whisper ────────────────────────────────────────────────────────────
+    async def transcribe(self, request: web.Request) -> web.Response:
+        audio = b""
+        async for part in await request.multipart():
+            if part.name == "file":
+                audio = await part.read()
+        # Метка — в конце файла (образцы из --audio-dir) или в метаданных (синтетический WAV и его перекодировка)
+        match = TAG_RE.search(audio.decode("latin-1"))
+        tag = match.group(0) if match else ""
+        self._event("whisper_start", tag)
+        await asyncio.sleep(self.whisper_latency)
+        failure = self._fail()
+        if failure is not None:
+            return failure
+        self.stats["transcriptions"] += 1
+        self._event("whisper_end", tag)
+        return web.json_response({"text": f"{TRANSCRIPT} {tag}".strip()})
+
+    # ─── Chat completions ───────────────────────────────────────────────────
+    def _content(self, body: dict, tag: str) -> str:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            name = response_format["json_schema"]["name"]
+            return json.dumps(self._structured(name.replace("oral_assessment", "").lstrip("_") or "full", tag), ensure_ascii=False)
+        lines = max(1, self.completion_tokens * 3 // len(REPORT_LINE))
+        return "Общая оценка: 3\n" + "\n".join(REPORT_LINE for _ in range(lines)) + f"\n{tag}"
+
+    def _structured(self, part: str, tag: str) -> dict:
+        aspect = {"score": 3, "comment": REPORT_LINE.strip(), "pros": [], "cons": []}
+        if part in dict(ASPECTS):
+            return aspect
+        general = {
+            "overall": 3,
+            "sentences": 12,
+            "summary": REPORT_LINE.strip(),
+            "aspect_comments": [],
+            "recommendations": REPORT_LINE.strip(),
+            "errors": [{"original": "many scientist", "corrected": "many scientists", "explanation": "Число"}],
+            "exercises": [{"task": "Исправьте ошибку:", "items": ["Many scientist must communicate."]}],
+            "theory": [tag or "—"],
+        }
+        if part == GENERAL:
+            return general
+        return {**general, "aspects": [{"aspect": key, **aspect} for key, _ in ASPECTS]}
+
+    async def complete(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        last = body["messages"][-1]["content"] if body.get("messages") else ""
+        match = TAG_RE.search(last if isinstance(last, str) else json.dumps(last))
+        tag = match.group(0) if match else ""
+        self._event("assess_start", tag)
+
+        failure = self._fail()
+        if failure is not None:
+            return failure
+
+        content = self._content(body, tag)
+        prompt_tokens = estimate_tokens(json.dumps(body["messages"], ensure_ascii=False))
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": prompt_tokens // 128 * 128 if prompt_tokens >= 1024 else 0},
+        }
+        base = {"id": f"chatcmpl-{random.getrandbits(48):x}", "created": int(time.time()), "model": body.get("model", "fake")}
+
+        await asyncio.sleep(self.ttft)
+        self._event("assess_first_token", tag)
+
+        if not body.get("stream"):
+            await asyncio.sleep(completion_tokens / self.tps)
+            self.stats["completions"] += 1
+            self._event("assess_end", tag)
+            return web.json_response({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        self.stats["streams"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(payload: dict) -> None:
+            await response.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        # Куски примерно по 4 токена, темп — --tps
+        step = 12
+        for start in range(0, len(content), step):
+            await send({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}
+            ]})
+            await asyncio.sleep(len(content[start:start + step]) / 3 / self.tps)
+        await send({**base, "object": "chat.completion.chunk", "choices": [
+            {"index": 0, "delta": {}, "finish_reason": "stop"}
+        ]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        self._event("assess_end", tag)
+        await response.write_eof()
+        return response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8087)
+    parser.add_argument("--whisper-latency", type=float, default=1.0)
+    parser.add_argument("--ttft", type=float, default=0.5, help="время до первого токена, с")
+    parser.add_argument("--tps", type=float, default=100.0, help="скорость генерации, токенов/с")
+    parser.add_argument("--completion-tokens", type=int, default=800)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.whisper_latency, args.ttft, args.tps, args.completion_tokens, args.fail_rate)
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
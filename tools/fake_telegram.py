@@ -0,0 +1,189 @@
+"""
+Локальная заглушка Telegram Bot API для нагрузочных тестов (tools/loadtest.py).
+
+Поддерживает то, чем пользуется бот:
+    POST /bot<token>/getMe, getUpdates, getFile, sendMessage, editMessageText,
+         sendChatAction, sendDocument, deleteWebhook, setWebhook
+    GET  /file/bot<token>/<path>   — скачивание голосовых
+
+Обновления ставятся в очередь методами push_text() / push_voice() и отдаются
+боту через getUpdates (long polling). Исходящие сообщения бота передаются
+в колбэк on_message — так стенд узнаёт, что ответ дошёл до «студента».
+
+Запуск отдельно (голосовые — файлы .oga из --audio-dir):
+    python tools/fake_telegram.py --port 8088 --audio-dir samples/
+    TELEGRAM_API_URL=http://127.0.0.1:8088 python main3.py
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 777000, "is_bot": True, "first_name": "LoadTestBot", "username": "loadtest_bot"}
+
+
+class FakeTelegram:
+    def __init__(self, on_message: Optional[Callable[[int, str], None]] = None):
+        self.on_message = on_message
+        # Колбэки стенда: обновление отдано боту / голосовое запрошено / скачано
+        self.on_delivered: Optional[Callable[[dict], None]] = None
+        self.on_file: Optional[Callable[[str, str], None]] = None
+        self.files: Dict[str, bytes] = {}        # file_path → содержимое
+        self.file_paths: Dict[str, str] = {}     # file_id → file_path
+        self.polled = asyncio.Event()            # бот хотя бы раз вызвал getUpdates
+        self.stats = {"updates": 0, "sent": 0, "edited": 0, "downloads": 0}
+        self._updates: List[dict] = []
+        self._new_update = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_route("*", "/bot{token}/{method}", self.call)
+        app.router.add_get("/file/bot{token}/{path:.+}", self.download)
+        return app
+
+    # ─── Входящие (от «студентов») ──────────────────────────────────────────
+    def _message(self, chat_id: int, **fields) -> dict:
+        user = {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"}
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            **fields,
+        }
+
+    def _push(self, message: dict) -> dict:
+        update = {"update_id": next(self._update_ids), "message": message}
+        self._updates.append(update)
+        self.stats["updates"] += 1
+        self._new_update.set()
+        return update
+
+    def push_text(self, chat_id: int, text: str) -> dict:
+        return self._push(self._message(chat_id, text=text))
+
+    def push_voice(self, chat_id: int, audio: bytes, duration: int = 60) -> dict:
+        number = len(self.file_paths) + 1
+        file_id = f"voice-{chat_id}-{number}"
+        path = f"voice/file_{chat_id}_{number}.oga"
+        self.files[path] = audio
+        self.file_paths[file_id] = path
+        voice = {
+            "file_id": file_id,
+            "file_unique_id": f"u{chat_id}x{number}",
+            "duration": duration,
+            "mime_type": "audio/ogg",
+            "file_size": len(audio),
+        }
+        return self._push(self._message(chat_id, voice=voice))
+
+    # ─── Bot API ────────────────────────────────────────────────────────────
+    async def call(self, request: web.Request) -> web.Response:
+        params = dict(await request.post()) if request.method == "POST" else dict(request.query)
+        if request.content_type == "application/json":
+            params = await request.json()
+        method = request.match_info["method"]
+        handler = getattr(self, f"m_{method}", None)
+        if handler is None:
+            return web.json_response({"ok": True, "result": True})
+        result = await handler(params)
+        return web.json_response({"ok": True, "result": result})
+
+    async def m_getMe(self, params: dict):
+        return BOT_USER
+
+    async def m_getUpdates(self, params: dict):
+        self.polled.set()
+        offset = int(params.get("offset") or 0)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout=float(params.get("timeout") or 0) or 0.1)
+            except asyncio.TimeoutError:
+                return []
+        limit = int(params.get("limit") or 100)
+        batch = self._updates[:limit]
+        if self.on_delivered is not None:
+            for update in batch:
+                self.on_delivered(update)
+        # Отданные обновления подтверждаются следующим offset; держать их дальше не нужно
+        self._updates = self._updates[limit:]
+        return batch
+
+    async def m_getFile(self, params: dict):
+        file_id = params["file_id"]
+        path = self.file_paths.get(file_id, file_id)
+        if self.on_file is not None:
+            self.on_file("get_file", path)
+        return {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self.files.get(path, b"")), "file_path": path}
+
+    async def download(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        if path not in self.files:
+            return web.Response(status=404)
+        self.stats["downloads"] += 1
+        if self.on_file is not None:
+            self.on_file("downloaded", path)
+        return web.Response(body=self.files[path], content_type="audio/ogg")
+
+    def _outgoing(self, params: dict, message_id: Optional[int] = None) -> dict:
+        chat_id = int(params["chat_id"])
+        text = params.get("text", "")
+        if self.on_message is not None:
+            self.on_message(chat_id, text)
+        message = {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if text:
+            message["text"] = text
+        return message
+
+    async def m_sendMessage(self, params: dict):
+        self.stats["sent"] += 1
+        return self._outgoing(params)
+
+    async def m_editMessageText(self, params: dict):
+        self.stats["edited"] += 1
+        return self._outgoing(params, message_id=int(params["message_id"]))
+
+    async def m_sendDocument(self, params: dict):
+        self.stats["sent"] += 1
+        return self._outgoing({"chat_id": params["chat_id"], "text": params.get("caption", "")})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--audio-dir", help="папка с .oga: каждый файл приходит боту голосовым от своего чата")
+    args = parser.parse_args()
+
+    telegram = FakeTelegram(on_message=lambda chat_id, text: print(f"→ {chat_id}: {text[:80]!r}"))
+
+    async def push_samples(app: web.Application) -> None:
+        if not args.audio_dir:
+            return
+        for number, name in enumerate(sorted(os.listdir(args.audio_dir)), 1):
+            if name.endswith((".oga", ".ogg")):
+                with open(os.path.join(args.audio_dir, name), "rb") as f:
+                    telegram.push_voice(100000 + number, f.read())
+
+    app = telegram.app()
+    app.on_startup.append(push_samples)
+    print(json.dumps({"host": args.host, "port": args.port}))
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Сравнение задержки оценки: один текстовый запрос, один структурированный (JSON)
+и параллельные запросы по аспектам (fanout.py).
+
+Промпт и примеры берутся из исходника бота через ast (бот не импортируется),
+тексты — из журнала записей. Каждый текст оценивается всеми режимами по очереди.
+
+Использование:
+    OPENAI_API_KEY=... python tools/fanout_bench.py tutor_bot/prompts.py records.json
+    python tools/fanout_bench.py tutor_bot/prompts.py records.json --limit 3 --modes single,fanout
+    python tools/fanout_bench.py tutor_bot/prompts.py records.json --base-url http://127.0.0.1:8081/v1
+
+--base-url позволяет направить запросы на локальный стенд вместо OpenAI.
+"""
+import os
+import sys
+import ast
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from openai import AsyncOpenAI  # noqa: E402
+
+from tutor_bot.fanout import assess_fanout, build_part_prefixes  # noqa: E402
+from tutor_bot.structured_report import RESPONSE_FORMAT, STRUCTURED_INSTRUCTIONS, validate_report  # noqa: E402
+
+NAMES = [
+    "SYSTEM_PROMPT",
+    "EXAMPLE_1_INPUT", "EXAMPLE_1_OUTPUT", "EXAMPLE_1_JSON",
+    "EXAMPLE_2_INPUT", "EXAMPLE_2_OUTPUT", "EXAMPLE_2_JSON",
+]
+MODES = ("single", "structured", "fanout")
+
+
+def load_prompt(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in NAMES:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+    missing = [name for name in NAMES if name not in values]
+    if missing:
+        raise ValueError(f"{path}: не найдены {', '.join(missing)}")
+    return values
+
+
+def load_texts(path: str, limit: int) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    return [e["request"] for e in entries if e.get("request")][:limit]
+
+
+class Bench:
+    def __init__(self, client: AsyncOpenAI, prompt: dict, model: str, temperature: float):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        p = prompt
+        self.text_prefix = [
+            {"role": "system", "content": p["SYSTEM_PROMPT"]},
+            {"role": "user", "content": p["EXAMPLE_1_INPUT"]},
+            {"role": "assistant", "content": p["EXAMPLE_1_OUTPUT"]},
+            {"role": "user", "content": p["EXAMPLE_2_INPUT"]},
+            {"role": "assistant", "content": p["EXAMPLE_2_OUTPUT"]},
+        ]
+        self.structured_prefix = [
+            {"role": "system", "content": p["SYSTEM_PROMPT"] + STRUCTURED_INSTRUCTIONS},
+            {"role": "user", "content": p["EXAMPLE_1_INPUT"]},
+            {"role": "assistant", "content": json.dumps(p["EXAMPLE_1_JSON"], ensure_ascii=False)},
+            {"role": "user", "content": p["EXAMPLE_2_INPUT"]},
+            {"role": "assistant", "content": json.dumps(p["EXAMPLE_2_JSON"], ensure_ascii=False)},
+        ]
+        self.part_prefixes = build_part_prefixes(
+            p["SYSTEM_PROMPT"],
+            [(p["EXAMPLE_1_INPUT"], p["EXAMPLE_1_JSON"]), (p["EXAMPLE_2_INPUT"], p["EXAMPLE_2_JSON"])],
+        )
+
+    async def single(self, text: str) -> int:
+        resp = await self.client.chat.completions.create(
+            model=self.model, messages=[*self.text_prefix, {"role": "user", "content": text}],
+            temperature=self.temperature, max_tokens=5000,
+        )
+        return resp.usage.completion_tokens if resp.usage else 0
+
+    async def structured(self, text: str) -> int:
+        resp = await self.client.chat.completions.create(
+            model=self.model, messages=[*self.structured_prefix, {"role": "user", "content": text}],
+            temperature=self.temperature, max_tokens=3000, response_format=RESPONSE_FORMAT,
+        )
+        validate_report(json.loads(resp.choices[0].message.content))
+        return resp.usage.completion_tokens if resp.usage else 0
+
+    async def fanout(self, text: str) -> int:
+        _, usages, _ = await assess_fanout(
+            self.client, self.part_prefixes, text,
+            model=self.model, temperature=self.temperature, max_tokens=1500, prompt_cache_key="bench",
+        )
+        return sum(u.completion_tokens for u in usages.values() if u is not None)
+
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run(args) -> None:
+    prompt = load_prompt(args.script)
+    texts = load_texts(args.records, args.limit)
+    if not texts:
+        print("Нет текстов для оценки")
+        return
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        raise SystemExit(f"Неизвестные режимы: {', '.join(unknown)}")
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY", "bench"), base_url=args.base_url)
+    bench = Bench(client, prompt, args.model, args.temperature)
+    latencies = {mode: [] for mode in modes}
+    completions = {mode: [] for mode in modes}
+    failures = {mode: 0 for mode in modes}
+    try:
+        for number, text in enumerate(texts, 1):
+            for mode in modes:
+                started = time.monotonic()
+                try:
+                    tokens = await getattr(bench, mode)(text)
+                except Exception as e:
+                    failures[mode] += 1
+                    print(f"[{number}] {mode}: ошибка {e!r}")
+                    continue
+                latencies[mode].append(time.monotonic() - started)
+                completions[mode].append(tokens)
+                print(f"[{number}] {mode:<10} {latencies[mode][-1]:6.2f} с, {tokens} выходных токенов")
+    finally:
+        await client.close()
+
+    print(f"\n{'режим':<12}{'p50, с':>8}{'p95, с':>8}{'макс, с':>9}{'токенов (медиана)':>20}{'ошибок':>8}")
+    for mode in modes:
+        if not latencies[mode]:
+            print(f"{mode:<12}{'—':>8}{'—':>8}{'—':>9}{'—':>20}{failures[mode]:>8}")
+            continue
+        print(
+            f"{mode:<12}{pct(latencies[mode], 0.5):>8.2f}{pct(latencies[mode], 0.95):>8.2f}"
+            f"{max(latencies[mode]):>9.2f}{int(statistics.median(completions[mode])):>20}{failures[mode]:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Задержка оценки: один запрос против параллельных по аспектам")
+    parser.add_argument("script", help="файл с SYSTEM_PROMPT и EXAMPLE_* (tutor_bot/prompts.py)")
+    parser.add_argument("records", help="журнал (.json/.jsonl) с текстами для оценки")
+    parser.add_argument("--limit", type=int, default=5, help="сколько текстов взять")
+    parser.add_argument("--modes", default=",".join(MODES), help="режимы через запятую: single,structured,fanout")
+    parser.add_argument("--model", default="gpt-4.1")
+    parser.add_argument("--temperature", type=float, default=0.1)
+    parser.add_argument("--base-url", help="адрес OpenAI-совместимого API (например, локального стенда)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Сквозной нагрузочный тест бота на локальных заглушках Telegram, OpenAI и Drive.
+
+Стенд поднимает tools/fake_telegram.py, tools/fake_openai.py и tools/fake_drive.py
+в одном процессе, запускает бота (любой mainN.py) отдельным процессом во
+временной папке и гоняет сценарий: --users «студентов» одновременно, каждый
+отправляет --requests сообщений (доля голосовых — --voice-ratio) и ждёт
+оценку, прежде чем отправить следующее. Квота реальных API не расходуется.
+
+Каждый запрос помечается меткой [lt:<чат>:<номер>], которая проходит через
+аудио, расшифровку и оценку, — по ней заглушки отмечают время этапов:
+    intake      — обновление отправлено → бот забрал его через getUpdates
+    download    — getFile → голосовое скачано
+    whisper     — запрос к Whisper → ответ
+    transcript  — ответ Whisper → сообщение «Расшифровка» у студента
+    assess      — первый запрос к модели → последний ответ (все части fan-out)
+    ttft        — запрос к модели → первый токен
+    delivery    — ответ модели → оценка у студента
+    total       — обновление отправлено → оценка у студента
+
+Использование:
+    python tools/loadtest.py main3.py --users 20 --requests 3
+    python tools/loadtest.py main3.py --users 50 --voice-ratio 1 --ttft 1.5 --tps 60 --json report.json
+    python tools/loadtest.py main3.py --env STRUCTURED_ASSESSMENT=1 --max-p95 20
+
+Синтетическое голосовое — настоящий WAV (тон 16 кГц моно) с меткой запроса
+в метаданных. Если ffmpeg установлен, бот запускается с WHISPER_PASSTHROUGH=0,
+и каждое голосовое проходит перекодирование; метка переносится ffmpeg в выходной файл.
+Выгрузки идут в заглушку Drive с фиктивным токеном (GOOGLE_ACCESS_TOKEN, DRIVE_API_URL).
+
+Бот запускается со сторожем event loop (LOOP_WATCHDOG=1, см. loop_watchdog.py):
+каждая блокировка loop'а дольше порога — провал теста, если их больше --max-stalls.
+Отключить: --env LOOP_WATCHDOG=0.
+
+Код выхода 1, если есть тайм-ауты, p95 total больше --max-p95
+или блокировок event loop больше --max-stalls.
+"""
+import os
+import sys
+import json
+import math
+import time
+import array
+import random
+import shutil
+import signal
+import struct
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+from aiohttp import web
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, REPO_DIR)
+from fake_drive import FakeDrive  # noqa: E402
+from fake_openai import FakeOpenAI, TAG_RE, TRANSCRIPT  # noqa: E402
+from fake_telegram import FakeTelegram  # noqa: E402
+from tutor_bot.loop_watchdog import STALL_MARKER  # noqa: E402
+
+STAGES = ("intake", "download", "whisper", "transcript", "assess", "ttft", "delivery", "total")
+# Отметки, для которых важен последний момент (fan-out: несколько запросов на одну оценку)
+LAST_MARKS = ("assess_end",)
+DRIVE_TOKEN = "loadtest"
+
+
+class Recorder:
+    """
+    Отметки времени по меткам запросов и ожидание оценки.
+    """
+
+    def __init__(self):
+        self.marks: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.done: Dict[str, asyncio.Event] = {}
+
+    def mark(self, name: str, tag: str) -> None:
+        if name in LAST_MARKS or name not in self.marks[tag]:
+            self.marks[tag][name] = time.monotonic()
+
+    def expect(self, tag: str) -> asyncio.Event:
+        self.done[tag] = asyncio.Event()
+        return self.done[tag]
+
+    def on_message(self, chat_id: int, text: str) -> None:
+        match = TAG_RE.search(text)
+        if match is None:
+            return
+        tag = match.group(0)
+        if text.startswith("Расшифровка"):
+            self.mark("transcript_sent", tag)
+        elif tag in self.done:
+            # Метка в конце оценки: при потоковой отправке она появляется только в последней правке
+            self.mark("reply_sent", tag)
+            self.done[tag].set()
+
+    def durations(self, tag: str) -> Dict[str, float]:
+        m = self.marks[tag]
+
+        def span(start: str, end: str):
+            return m[end] - m[start] if start in m and end in m else None
+
+        result = {
+            "intake": span("sent", "delivered"),
+            "download": span("get_file", "downloaded"),
+            "whisper": span("whisper_start", "whisper_end"),
+            "transcript": span("whisper_end", "transcript_sent"),
+            "assess": span("assess_start", "assess_end"),
+            "ttft": span("assess_start", "assess_first_token"),
+            "delivery": span("assess_end", "reply_sent"),
+            "total": span("sent", "reply_sent"),
+        }
+        return {stage: value for stage, value in result.items() if value is not None}
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def load_texts(path: str) -> List[str]:
+    if not path or not os.path.isfile(path):
+        return [TRANSCRIPT]
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    return [e["request"] for e in entries if e.get("request")] or [TRANSCRIPT]
+
+
+def load_audio(args) -> List[bytes]:
+    samples = []
+    if args.audio_dir:
+        for name in sorted(os.listdir(args.audio_dir)):
+            if name.endswith((".oga", ".ogg")):
+                with open(os.path.join(args.audio_dir, name), "rb") as f:
+                    samples.append(f.read())
+    return samples
+
+
+def tone_pcm(size: int, rate: int = 16000) -> bytes:
+    # Тон 440 Гц: тишину предобработка обрезала бы целиком
+    samples = array.array("h", (int(8000 * math.sin(2 * math.pi * 440 * n / rate)) for n in range(size // 2)))
+    return samples.tobytes()
+
+
+def synthetic_voice(pcm: bytes, tag: str, rate: int = 16000) -> bytes:
+    """
+    WAV (16 бит, моно) с меткой запроса в LIST/INFO INAM перед данными:
+    ffmpeg переносит её в метаданные выходного файла, поэтому заглушка Whisper
+    находит метку и после перекодирования.
+    """
+    title = tag.encode() + b"\0"
+    if len(title) % 2:
+        title += b"\0"
+    info = b"INFO" + b"INAM" + struct.pack("<I", len(title)) + title
+    fmt = struct.pack("<HHIIHH", 1, 1, rate, rate * 2, 2, 16)
+    body = (
+        b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"LIST" + struct.pack("<I", len(info)) + info
+        + b"data" + struct.pack("<I", len(pcm)) + pcm
+    )
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+async def start_site(app: web.Application) -> (web.AppRunner, int):
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port
+
+
+async def run(args) -> int:
+    recorder = Recorder()
+    telegram = FakeTelegram(on_message=recorder.on_message)
+    telegram.on_delivered = lambda update: recorder.mark("delivered", update.get("_tag", ""))
+    file_tags: Dict[str, str] = {}
+    telegram.on_file = lambda name, path: recorder.mark(name, file_tags.get(path, ""))
+    openai = FakeOpenAI(args.whisper_latency, args.ttft, args.tps, args.completion_tokens, args.fail_rate,
+                        on_event=recorder.mark)
+    drive = FakeDrive(token=DRIVE_TOKEN)
+
+    runners = []
+    telegram_runner, telegram_port = await start_site(telegram.app())
+    openai_runner, openai_port = await start_site(openai.app())
+    drive_runner, drive_port = await start_site(drive.app())
+    runners += [telegram_runner, openai_runner, drive_runner]
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    script = os.path.abspath(args.script)
+    env = {
+        **os.environ,
+        "TELEGRAM_TOKEN": "123456:LOADTEST",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{telegram_port}",
+        "OPENAI_API_KEY": "sk-loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "GOOGLE_ACCESS_TOKEN": DRIVE_TOKEN,
+        "GOOGLE_DRIVE_FOLDER_ID": "loadtest",
+        "DRIVE_API_URL": f"http://127.0.0.1:{drive_port}/drive/v3/",
+        "DRIVE_UPLOAD_URL": f"http://127.0.0.1:{drive_port}/upload/drive/v3/files",
+        "PYTHONPATH": os.path.dirname(script) + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "LOOP_WATCHDOG": "1",
+    }
+    audio = load_audio(args)
+    pcm = tone_pcm(args.audio_kb * 1024)
+    if not audio:
+        if shutil.which(env.get("FFMPEG_BINARY", "ffmpeg")):
+            env["WHISPER_PASSTHROUGH"] = "0"
+        else:
+            print("ffmpeg не найден: синтетические голосовые идут в Whisper без перекодирования")
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    log_path = os.path.join(workdir, "bot.log")
+    log_file = open(log_path, "wb")
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, script, cwd=workdir, env=env, stdout=log_file, stderr=asyncio.subprocess.STDOUT,
+    )
+    print(f"Бот {args.script} запущен (pid {bot.pid}), рабочая папка {workdir}")
+
+    texts = load_texts(args.records)
+    timeouts = 0
+    completed: List[str] = []
+
+    async def user(chat_id: int) -> None:
+        nonlocal timeouts
+        rng = random.Random(chat_id)
+        for number in range(args.requests):
+            tag = f"[lt:{chat_id}:{number}]"
+            done = recorder.expect(tag)
+            recorder.mark("sent", tag)
+            if rng.random() < args.voice_ratio:
+                voice = rng.choice(audio) + f"\n{tag}".encode() if audio else synthetic_voice(pcm, tag)
+                update = telegram.push_voice(chat_id, voice)
+                file_tags[telegram.file_paths[update["message"]["voice"]["file_id"]]] = tag
+            else:
+                update = telegram.push_text(chat_id, f"{rng.choice(texts)} {tag}")
+            update["_tag"] = tag
+            try:
+                await asyncio.wait_for(done.wait(), timeout=args.timeout)
+                completed.append(tag)
+            except asyncio.TimeoutError:
+                timeouts += 1
+                print(f"Тайм-аут: {tag}")
+            if args.think:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think))
+
+    status = 0
+    started = None
+    try:
+        try:
+            await asyncio.wait_for(telegram.polled.wait(), timeout=args.startup_timeout)
+        except asyncio.TimeoutError:
+            print(f"Бот не начал опрос за {args.startup_timeout:.0f} с, см. {log_path}")
+            return 1
+        started = time.monotonic()
+        await asyncio.gather(*(user(200000 + n) for n in range(args.users)))
+    finally:
+        elapsed = time.monotonic() - started if started else 0.0
+        if bot.returncode is None:
+            bot.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(bot.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                bot.kill()
+                await bot.wait()
+        log_file.close()
+        for runner in runners:
+            await runner.cleanup()
+
+    if started is None:
+        return 1
+
+    stage_values: Dict[str, List[float]] = defaultdict(list)
+    for tag in completed:
+        for stage, value in recorder.durations(tag).items():
+            stage_values[stage].append(value)
+
+    report = {
+        "script": args.script,
+        "users": args.users,
+        "requests": args.users * args.requests,
+        "completed": len(completed),
+        "timeouts": timeouts,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(completed) / elapsed, 3) if elapsed else 0.0,
+        "stages": {},
+        "fakes": {"telegram": telegram.stats, "openai": openai.stats, "drive": drive.stats},
+    }
+    print(f"\nЗавершено {len(completed)} из {report['requests']} за {elapsed:.1f} с "
+          f"({report['throughput']:.2f} оценок/с), тайм-аутов: {timeouts}")
+    print(f"{'этап':<12}{'n':>6}{'p50, с':>9}{'p95, с':>9}{'p99, с':>9}{'макс, с':>9}")
+    for stage in STAGES:
+        values = stage_values.get(stage)
+        if not values:
+            continue
+        row = {
+            "n": len(values),
+            "p50": round(percentile(values, 0.50), 3),
+            "p95": round(percentile(values, 0.95), 3),
+            "p99": round(percentile(values, 0.99), 3),
+            "max": round(max(values), 3),
+        }
+        report["stages"][stage] = row
+        print(f"{stage:<12}{row['n']:>6}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}{row['max']:>9.2f}")
+
+    print(f"Drive: файлов {len(drive.files)}, сессий выгрузки {drive.stats['sessions']}, "
+          f"поисков {drive.stats['lists']}, отказов 401 {drive.stats['unauthorized']}")
+
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        bot_log = f.read()
+    tracebacks = bot_log.count("Traceback")
+    report["tracebacks"] = tracebacks
+    if tracebacks:
+        print(f"В журнале бота {tracebacks} трассировок исключений: {log_path}")
+    stalls = bot_log.count(STALL_MARKER)
+    report["loop_stalls"] = stalls
+    if stalls:
+        print(f"В журнале бота {stalls} блокировок event loop (стеки — там же): {log_path}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"Отчёт сохранён в {args.json}")
+
+    if timeouts:
+        status = 1
+    total = report["stages"].get("total")
+    if args.max_p95 and total and total["p95"] > args.max_p95:
+        print(f"p95 total {total['p95']:.2f} с больше допустимых {args.max_p95:.2f} с")
+        status = 1
+    if stalls > args.max_stalls:
+        print(f"Блокировок event loop {stalls}, допустимо {args.max_stalls}")
+        status = 1
+    if not args.keep_workdir and status == 0:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота на локальных заглушках")
+    parser.add_argument("script", help="файл бота (main.py, main2.py, main3.py)")
+    parser.add_argument("--users", type=int, default=10, help="одновременных студентов")
+    parser.add_argument("--requests", type=int, default=3, help="сообщений от каждого")
+    parser.add_argument("--voice-ratio", type=float, default=0.5, help="доля голосовых")
+    parser.add_argument("--think", type=float, default=0.0, help="средняя пауза между сообщениями, с")
+    parser.add_argument("--timeout", type=float, default=120.0, help="ожидание оценки, с")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--records", default=os.path.join(REPO_DIR, "records.json"), help="тексты для текстовых сообщений")
+    parser.add_argument("--audio-dir", help="папка с образцами .oga (по умолчанию — синтетическое аудио)")
+    parser.add_argument("--audio-kb", type=int, default=64, help="размер синтетического аудио (PCM), КБ")
+    parser.add_argument("--whisper-latency", type=float, default=1.0)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--tps", type=float, default=100.0)
+    parser.add_argument("--completion-tokens", type=int, default=800)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 500 от заглушки OpenAI")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE для процесса бота (можно несколько)")
+    parser.add_argument("--json", help="сохранить отчёт в JSON")
+    parser.add_argument("--max-p95", type=float, default=0.0, help="порог p95 total, с (0 — без проверки)")
+    parser.add_argument("--max-stalls", type=int, default=0, help="допустимое число блокировок event loop")
+    parser.add_argument("--keep-workdir", action="store_true", help="не удалять рабочую папку бота")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
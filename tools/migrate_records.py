@@ -0,0 +1,49 @@
+"""
+Однократная миграция журнала records.json (JSON-массив) в формат JSONL.
+
+Использование:
+    python tools/migrate_records.py records.json records.jsonl
+    python tools/migrate_records.py records_new.json records_new.jsonl --append
+
+Без --append целевой файл не должен существовать. Исходный файл не изменяется.
+"""
+import os
+import sys
+import json
+import argparse
+
+
+def migrate(src: str, dst: str, append: bool = False) -> int:
+    with open(src, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{src}: ожидался JSON-массив записей")
+
+    if os.path.exists(dst) and not append:
+        raise FileExistsError(f"{dst} уже существует (используйте --append)")
+
+    with open(dst, "a" if append else "x", encoding="utf-8") as f:
+        for entry in data:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return len(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Перенос records.json в JSONL-журнал")
+    parser.add_argument("src", help="исходный JSON-файл (массив записей)")
+    parser.add_argument("dst", help="целевой JSONL-файл")
+    parser.add_argument("--append", action="store_true", help="дописать в существующий JSONL")
+    args = parser.parse_args()
+
+    try:
+        count = migrate(args.src, args.dst, append=args.append)
+    except (OSError, ValueError, json.JSONDecodeError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Перенесено записей: {count} → {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Бенчмарк локальной предпроверки объёма (sentence_check) на сохранённых записях.
+
+Для каждой записи журнала считает предложения и слова, вердикт предпроверки
+и время на запрос; если в оценке модели указано число предложений
+(«содержит 11 предложений», «(12 предложений)»), сравнивает с ним.
+
+Использование:
+    python tools/precheck_bench.py records.json
+    python tools/precheck_bench.py records_new.jsonl --repeat 200 --show
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tutor_bot.sentence_check import precheck, REQUIRED_SENTENCES  # noqa: E402
+
+MODEL_COUNT_RE = re.compile(r"(\d+)\s+предложени")
+
+
+def load_records(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк локальной предпроверки объёма ответа")
+    parser.add_argument("records", nargs="+", help="журналы (.json/.jsonl)")
+    parser.add_argument("--repeat", type=int, default=100, help="повторов на запись для замера времени")
+    parser.add_argument("--show", action="store_true", help="печатать результат по каждой записи")
+    args = parser.parse_args()
+
+    records = []
+    for path in args.records:
+        records.extend(load_records(path))
+    records = [r for r in records if r.get("request")]
+    if not records:
+        print("Нет записей с полем request")
+        return
+
+    verdicts = Counter()
+    timings = []
+    diffs = []
+    disagreements = 0   # модель насчитала >= 10, а мы отсекли бы как «short»
+    for record in records:
+        text = record["request"]
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            result = precheck(text)
+        timings.append((time.perf_counter() - started) / args.repeat * 1e6)
+        verdicts[result.verdict] += 1
+
+        match = MODEL_COUNT_RE.search(record.get("response", ""))
+        model_count = int(match.group(1)) if match else None
+        if model_count is not None:
+            diffs.append(result.sentences - model_count)
+            if result.verdict == "short" and model_count >= REQUIRED_SENTENCES:
+                disagreements += 1
+        if args.show:
+            print(f"{result.sentences:>3} предл. {result.words:>4} сл. {result.verdict:<10} "
+                  f"модель: {model_count if model_count is not None else '—'}")
+
+    total = len(records)
+    print(f"Записей: {total}")
+    for verdict in ("short", "borderline", "ok"):
+        print(f"  {verdict:<10} {verdicts[verdict]:>5} ({verdicts[verdict] / total:.0%})")
+    print(f"Время предпроверки: медиана {statistics.median(timings):.1f} мкс, максимум {max(timings):.1f} мкс")
+    if diffs:
+        exact = sum(1 for d in diffs if d == 0)
+        within = sum(1 for d in diffs if abs(d) <= 1)
+        print(f"Сравнение с подсчётом модели ({len(diffs)} записей): совпадает {exact}, "
+              f"±1 предложение {within}, средняя разница {statistics.mean(diffs):+.2f}")
+        print(f"Отсечено бы ошибочно (модель насчитала ≥ {REQUIRED_SENTENCES}): {disagreements}")
+    print(f"Запросов к модели сэкономлено: {verdicts['short']} из {total}")
+
+
+if __name__ == "__main__":
+    main()
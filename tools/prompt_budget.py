@@ -0,0 +1,149 @@
+"""
+Офлайн-подсчёт токенов промпта оценки: системный промпт и few-shot примеры.
+
+Скрипт не импортирует бота (и не требует токенов и ключей): строки
+SYSTEM_PROMPT / EXAMPLE_* извлекаются из исходника через ast.
+Точный подсчёт — через tiktoken (если установлен), иначе грубая оценка.
+
+Использование:
+    python tools/prompt_budget.py tutor_bot/prompts.py
+    python tools/prompt_budget.py tutor_bot/prompts.py --records records_new.jsonl
+    python tools/prompt_budget.py tutor_bot/prompts.py --baseline tools/prompt_budget.json
+    python tools/prompt_budget.py tutor_bot/prompts.py --baseline tools/prompt_budget.json --write-baseline
+
+С --baseline печатается разница с сохранённым отчётом; код выхода 1,
+если префикс вырос больше чем на --max-growth токенов.
+"""
+import os
+import sys
+import ast
+import json
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tutor_bot.cache import prompt_fingerprint  # noqa: E402
+
+PARTS = ["SYSTEM_PROMPT", "EXAMPLE_1_INPUT", "EXAMPLE_1_OUTPUT", "EXAMPLE_2_INPUT", "EXAMPLE_2_OUTPUT"]
+
+# Кэш префиксов OpenAI работает для промптов от 1024 токенов, шагами по 128
+PROMPT_CACHE_MIN = 1024
+PROMPT_CACHE_STEP = 128
+# Служебные токены на каждое сообщение чата (роль и разделители)
+MESSAGE_OVERHEAD = 4
+
+
+def load_parts(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    parts = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in PARTS:
+                parts[name] = ast.literal_eval(node.value)
+    missing = [name for name in PARTS if name not in parts]
+    if missing:
+        raise ValueError(f"{path}: не найдены {', '.join(missing)}")
+    return parts
+
+
+def make_counter(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return (lambda text: len(text) // 3 + 1), "оценка (~3 символа на токен, tiktoken не установлен)"
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Словарь tiktoken скачивается при первом использовании; без сети — оценка
+        return (lambda text: len(text) // 3 + 1), f"оценка (~3 символа на токен, tiktoken недоступен: {type(e).__name__})"
+    return (lambda text: len(encoding.encode(text))), f"tiktoken ({encoding.name})"
+
+
+def sample_requests(path: str, count_tokens) -> list:
+    tokens = []
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            entries = (json.loads(line) for line in f if line.strip())
+        else:
+            entries = json.load(f)
+        for entry in entries:
+            tokens.append(count_tokens(entry.get("request", "")))
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бюджет токенов промпта оценки")
+    parser.add_argument("script", help="файл с SYSTEM_PROMPT и EXAMPLE_* (tutor_bot/prompts.py)")
+    parser.add_argument("--model", default="gpt-4.1")
+    parser.add_argument("--max-tokens", type=int, default=5000, help="max_tokens ответа")
+    parser.add_argument("--records", help="журнал (.json/.jsonl) для статистики длины запросов")
+    parser.add_argument("--baseline", help="JSON с прошлым отчётом для сравнения")
+    parser.add_argument("--write-baseline", action="store_true", help="перезаписать --baseline текущим отчётом")
+    parser.add_argument("--max-growth", type=int, default=200, help="допустимый рост префикса, токенов")
+    args = parser.parse_args()
+
+    parts = load_parts(args.script)
+    count_tokens, method = make_counter(args.model)
+
+    report = {
+        "fingerprint": prompt_fingerprint(*(parts[name] for name in PARTS)),
+        "method": method,
+        "parts": {},
+    }
+    print(f"Промпт из {args.script}, модель {args.model}, подсчёт: {method}")
+    print(f"Отпечаток промпта (PROMPT_VERSION): {report['fingerprint']}\n")
+    print(f"{'часть':<20}{'символов':>10}{'токенов':>10}")
+    prefix = 0
+    for name in PARTS:
+        tokens = count_tokens(parts[name]) + MESSAGE_OVERHEAD
+        report["parts"][name] = tokens
+        prefix += tokens
+        print(f"{name:<20}{len(parts[name]):>10}{tokens:>10}")
+    report["prefix_tokens"] = prefix
+
+    cacheable = 0
+    if prefix >= PROMPT_CACHE_MIN:
+        cacheable = prefix // PROMPT_CACHE_STEP * PROMPT_CACHE_STEP
+    print(f"\nСтатический префикс: {prefix} токенов, кэшируемо провайдером: {cacheable}")
+    if not cacheable:
+        print(f"  префикс короче {PROMPT_CACHE_MIN} токенов — кэш префиксов не сработает")
+
+    if args.records:
+        requests = sample_requests(args.records, count_tokens)
+        if requests:
+            median = int(statistics.median(requests))
+            print(f"Запросы из {args.records}: {len(requests)} шт., медиана {median}, максимум {max(requests)} токенов")
+            report["request_median"] = median
+            print(f"Типичный запрос: {prefix + median} токенов промпта + до {args.max_tokens} токенов ответа")
+    print(f"Худший случай на ответ: {prefix} + запрос + {args.max_tokens} токенов")
+
+    status = 0
+    if args.baseline and os.path.isfile(args.baseline) and not args.write_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("method") != method:
+            print(f"\nВнимание: отчёт {args.baseline} посчитан другим способом ({baseline.get('method')})")
+        growth = prefix - baseline.get("prefix_tokens", prefix)
+        print(f"\nСравнение с {args.baseline}: префикс {baseline.get('prefix_tokens')} → {prefix} ({growth:+d})")
+        for name in PARTS:
+            old = baseline.get("parts", {}).get(name)
+            if old is not None and old != report["parts"][name]:
+                print(f"  {name}: {old} → {report['parts'][name]}")
+        if growth > args.max_growth:
+            print(f"Префикс вырос больше чем на {args.max_growth} токенов")
+            status = 1
+
+    if args.baseline and args.write_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"\nОтчёт сохранён в {args.baseline}")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Отправка записанных обновлений Telegram на локальный вебхук бота.
+
+Обновления берутся из файла: JSON-массив или JSONL (одно обновление в строке),
+в том виде, в каком их присылает Telegram (см. tools/sample_updates.jsonl).
+Печатается время приёма (до ответа 200) — обработка идёт уже после него.
+
+Использование:
+    WEBHOOK_ENABLED=1 WEBHOOK_SECRET=test python main3.py
+    python tools/replay_updates.py tools/sample_updates.jsonl --secret test
+    python tools/replay_updates.py updates.jsonl --secret test --repeat 50 --concurrency 20
+
+С --repeat обновления отправляются повторно с новыми update_id и message_id;
+--chats раскидывает их по N разным чатам.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+
+import aiohttp
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+
+def expand(updates: list, repeat: int, chats: int) -> list:
+    """
+    Копии обновлений с уникальными update_id/message_id; при chats > 1
+    копии получают разные chat.id и from.id.
+    """
+    result = []
+    ids = itertools.count(int(time.time()) * 1000)
+    for _ in range(repeat):
+        for update in updates:
+            copy = json.loads(json.dumps(update))
+            copy["update_id"] = next(ids)
+            message = copy.get("message")
+            if message is not None:
+                message["message_id"] = copy["update_id"] % 2_000_000_000
+                if chats > 1:
+                    shift = len(result) % chats
+                    message["chat"]["id"] += shift
+                    if "from" in message:
+                        message["from"]["id"] += shift
+            result.append(copy)
+    return result
+
+
+async def run(args) -> int:
+    updates = expand(load_updates(args.updates), args.repeat, args.chats)
+    headers = {SECRET_HEADER: args.secret} if args.secret else {}
+    statuses = Counter()
+    timings = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def send(session: aiohttp.ClientSession, update: dict) -> None:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                async with session.post(args.url, json=update, headers=headers) as resp:
+                    await resp.read()
+                    statuses[resp.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+                return
+            timings.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(send(session, update) for update in updates))
+    elapsed = time.monotonic() - started
+
+    print(f"Отправлено {len(updates)} обновлений за {elapsed:.2f} с на {args.url}")
+    print("Ответы: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+    if timings:
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"Время приёма: p50 {p50 * 1000:.1f} мс, p95 {p95 * 1000:.1f} мс, макс {timings[-1] * 1000:.1f} мс")
+    return 0 if set(statuses) == {200} else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отправка записанных обновлений на вебхук бота")
+    parser.add_argument("updates", help="файл с обновлениями (.json или .jsonl)")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram/webhook")
+    parser.add_argument("--secret", help="значение WEBHOOK_SECRET бота")
+    parser.add_argument("--repeat", type=int, default=1, help="сколько раз отправить набор")
+    parser.add_argument("--chats", type=int, default=1, help="на сколько разных чатов раскидать копии")
+    parser.add_argument("--concurrency", type=int, default=10, help="одновременных запросов")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
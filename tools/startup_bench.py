@@ -0,0 +1,151 @@
+"""
+Время холодного старта бота: импорт tutor_bot.bot под профилем (main.py, main2.py,
+main3.py) через `python -X importtime`.
+
+Профиль не запускается: значения по умолчанию из его вызова run(...) читаются
+через ast и подставляются в окружение отдельного процесса Python, который
+только импортирует бота (Telegram и OpenAI не вызываются, ключи — фиктивные).
+Процесс работает во временной папке, первый прогон (компиляция .pyc) отбрасывается.
+Печатается медиана времени импорта и самые тяжёлые пакеты по собственному времени.
+
+Использование:
+    python tools/startup_bench.py main3.py
+    python tools/startup_bench.py main.py --forbid googleapiclient --forbid multiprocessing
+    python tools/startup_bench.py main3.py --runs 7 --max-ms 3000 --json startup.json
+    python tools/startup_bench.py main3.py --env SHARD_WORKERS=2
+
+Код выхода 1, если медиана больше --max-ms или импортирован модуль из --forbid.
+"""
+import os
+import re
+import sys
+import ast
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import Counter
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = "tutor_bot.bot"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+DUMMY_ENV = {
+    "TELEGRAM_TOKEN": "123456:STARTUP",
+    "OPENAI_API_KEY": "sk-startup",
+    "GOOGLE_SERVICE_ACCOUNT_JSON": "{}",
+    "GOOGLE_DRIVE_FOLDER_ID": "startup",
+}
+
+
+def profile_defaults(path: str) -> Dict[str, str]:
+    """
+    Аргументы вызова run(...) в скрипте профиля.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "run":
+            return {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords}
+    raise SystemExit(f"В {path} нет вызова run(...)")
+
+
+def measure(env: Dict[str, str], workdir: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Один прогон: (время импорта бота, мс; собственное время по модулям, мкс).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"Импорт {TARGET} завершился ошибкой:\n{proc.stderr[-3000:]}")
+    own: Dict[str, int] = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        own[match.group(4)] = int(match.group(1))
+        # `import tutor_bot.bot` — две записи верхнего уровня: пакет и сам модуль бота
+        if len(match.group(3)) == 1 and match.group(4) in ("tutor_bot", TARGET):
+            total += int(match.group(2))
+    return total / 1000, own
+
+
+def by_package(own: Dict[str, int]) -> Counter:
+    packages: Counter = Counter()
+    for module, micros in own.items():
+        packages[module.split(".")[0]] += micros
+    return packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Время импорта бота под профилем (python -X importtime)")
+    parser.add_argument("profile", help="скрипт профиля (main.py, main2.py, main3.py)")
+    parser.add_argument("--runs", type=int, default=5, help="замеров после прогревочного")
+    parser.add_argument("--top", type=int, default=15, help="сколько тяжёлых пакетов показать")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE поверх профиля (можно несколько)")
+    parser.add_argument("--forbid", action="append", default=[], help="модуль, который не должен импортироваться")
+    parser.add_argument("--max-ms", type=float, default=0.0, help="порог медианы, мс (0 — без проверки)")
+    parser.add_argument("--json", help="сохранить отчёт в JSON")
+    args = parser.parse_args()
+
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("STORAGE_BACKEND", "STREAM_ASSESSMENT", "AUDIO_DIR", "LOG_FILE")
+    }
+    env.update(DUMMY_ENV)
+    env.update(profile_defaults(args.profile))
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")
+
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    try:
+        measure(env, workdir)  # прогрев: компиляция .pyc и дисковый кэш
+        runs: List[Tuple[float, Dict[str, int]]] = [measure(env, workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    totals = [total for total, _ in runs]
+    median = statistics.median(totals)
+    own = runs[totals.index(sorted(totals)[len(totals) // 2])][1]
+    packages = by_package(own)
+    imported = set(own)
+
+    print(f"Профиль {args.profile}: импорт {TARGET} — медиана {median:.0f} мс "
+          f"(мин {min(totals):.0f}, макс {max(totals):.0f}, прогонов {len(totals)}), модулей {len(imported)}")
+    print(f"{'пакет':<28}{'мс':>9}")
+    for package, micros in packages.most_common(args.top):
+        print(f"{package:<28}{micros / 1000:>9.1f}")
+
+    status = 0
+    found = [name for name in args.forbid if name in imported]
+    for name in found:
+        print(f"Импортирован запрещённый модуль: {name}")
+        status = 1
+    if args.max_ms and median > args.max_ms:
+        print(f"Медиана {median:.0f} мс больше допустимых {args.max_ms:.0f} мс")
+        status = 1
+
+    if args.json:
+        report = {
+            "profile": args.profile,
+            "median_ms": round(median, 1),
+            "runs_ms": [round(total, 1) for total in totals],
+            "modules": len(imported),
+            "packages_ms": {package: round(micros / 1000, 1) for package, micros in packages.most_common(args.top)},
+            "forbidden": found,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"Отчёт сохранён в {args.json}")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+
+# ─── БОТ ДЛЯ ОЦЕНКИ УСТНОЙ АКАДЕМИЧЕСКОЙ РЕЧИ ────────────────────────────────
+# Пакет импортируется без побочных эффектов: бот (tutor_bot.bot) создаётся
+# только в run(), а тяжёлые бэкенды — только выбранные (см. backends.py).
+# Скрипты main.py, main2.py и main3.py — профили: наборы значений переменных
+# окружения по умолчанию для одного и того же бота.
+
+
+def run(**defaults: str) -> None:
+    """
+    Запускает бота. defaults — значения переменных окружения по умолчанию;
+    окружение и .env имеют приоритет над ними.
+    """
+    import asyncio
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+    from .bot import main
+    asyncio.run(main())
@@ -0,0 +1,4 @@
+# python -m tutor_bot — бот с настройками только из окружения и .env
+from . import run
+
+run()
@@ -0,0 +1,78 @@
+import os
+import importlib
+from typing import Any, Dict
+
+# ─── ПОДКЛЮЧАЕМЫЕ БЭКЕНДЫ: ХРАНИЛИЩЕ, РАСШИФРОВКА, LLM ───────────────────────
+# Бэкенд выбирается переменной окружения, а его модуль импортируется только
+# после выбора: без Google Drive не загружаются googleapiclient и google.oauth2
+# и не проверяются их настройки. Вместо имени из BACKENDS можно указать свой
+# бэкенд строкой "модуль:атрибут" (например, STORAGE_BACKEND=mycorp.s3:create_storage).
+#
+#   storage       — фабрика create_storage() → объект с корутинами upload(path, is_log=False)
+#                   и close() либо None: файлы остаются только на диске
+#   transcription — корутина transcribe(audio: bytes, filename) → текст,
+#                   ошибки — transcription.TranscriptionError
+#   llm           — фабрика create_client(api_key) → клиент с интерфейсом AsyncOpenAI
+#                   (OpenAI-совместимые серверы подключаются и через OPENAI_BASE_URL)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+
+BACKENDS: Dict[str, Dict[str, str]] = {
+    "storage": {
+        "gdrive": "tutor_bot.gdrive:create_storage",
+        "local": "tutor_bot.backends:local_storage",
+    },
+    "transcription": {
+        "openai": "tutor_bot.transcription:transcribe_audio",
+    },
+    "llm": {
+        "openai": "tutor_bot.openai_client:create_openai_client",
+    },
+}
+
+
+class BackendError(RuntimeError):
+    """Бэкенд не найден или его модуль не импортируется (не установлен пакет)."""
+
+
+def load_backend(kind: str, name: str) -> Any:
+    """
+    Импортирует и возвращает объект бэкенда kind с именем name.
+    """
+    target = BACKENDS[kind].get(name, name)
+    module_name, _, attr = target.partition(":")
+    if not attr:
+        known = ", ".join(BACKENDS[kind])
+        raise BackendError(f"Неизвестный бэкенд {kind}: {name!r} (доступны: {known} или \"модуль:атрибут\")")
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise BackendError(f"Бэкенд {kind} {name!r} недоступен: {e}") from e
+    try:
+        return getattr(module, attr)
+    except AttributeError:
+        raise BackendError(f"В модуле {module_name} нет {attr} (бэкенд {kind} {name!r})") from None
+
+
+def local_storage() -> None:
+    """
+    Локальное хранилище: журнал и аудио остаются в рабочей папке бота, выгрузки нет.
+    """
+    return None
+
+
+def create_storage():
+    return load_backend("storage", STORAGE_BACKEND)()
+
+
+def create_llm_client(api_key: str):
+    """
+    Создаёт клиент LLM выбранного бэкенда и делает его общим клиентом процесса
+    (им же пользуются прогрев, расшифровка и закрытие при остановке).
+    """
+    from .openai_client import register_openai_client
+    client = load_backend("llm", LLM_BACKEND)(api_key)
+    register_openai_client(client)
+    return client
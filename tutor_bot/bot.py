@@ -0,0 +1,779 @@
+import os
+import json
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+from dotenv import load_dotenv
+from aiogram import Bot, Dispatcher, F
+from aiogram.filters import Command, CommandStart
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message, InputFile
+
+from .backends import TRANSCRIPTION_BACKEND, create_llm_client, create_storage, load_backend
+from .openai_client import warm_up_openai_client, close_openai_client, record_usage, USAGE_TOTALS
+from .transcription import TranscriptionError
+from .long_audio import LONG_AUDIO_STATS, is_long_audio, transcribe_long_audio
+from .transcoder import prepare_for_transcription, TranscodeError, TRANSCODE_STATS, PREPROCESS_STATS
+from .interaction_log import InteractionLog
+from .drive_sync import DriveSyncWorker
+from .cache import TieredCache, assessment_key, prompt_fingerprint
+from .telegram_stream import StreamingReply
+from .webhook import WEBHOOK_ENABLED, run_webhook
+from .sharding import SHARD_WORKERS, ShardPool, shard_index
+from .job_store import JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, Job, JobStore, job_id_of
+from .scheduler import FairScheduler, TokenBucket, estimate_tokens, OPENAI_TPM_LIMIT
+from .sentence_check import precheck, short_response_reply
+from .fanout import FanoutError, assess_fanout, build_part_prefixes
+from .loop_watchdog import start_watchdog
+from .metrics import (
+    METRICS_HOST, METRICS_PORT, counter_samples, inc, register_collector, span, start_metrics_server, stats_summary, timed,
+)
+from .structured_report import (
+    RESPONSE_FORMAT, STRUCTURED_INSTRUCTIONS, ReportValidationError, render_report, scores_of, validate_report,
+)
+from .prompts import (
+    SYSTEM_PROMPT, EXAMPLE_1_INPUT, EXAMPLE_1_OUTPUT, EXAMPLE_1_JSON, EXAMPLE_2_INPUT, EXAMPLE_2_OUTPUT, EXAMPLE_2_JSON,
+)
+
+# ─── ЗАГРУЗКА КОНФИГА И ПЕРЕМЕННЫХ ОКРУЖЕНИЯ ─────────────────────────────────
+load_dotenv()
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+if not TELEGRAM_TOKEN:
+    raise RuntimeError("Переменная окружения TELEGRAM_TOKEN не установлена")
+if not OPENAI_API_KEY:
+    raise RuntimeError("Переменная окружения OPENAI_API_KEY не установлена")
+
+logging.basicConfig(level=logging.INFO)
+# Свой сервер Bot API (например, локальный стенд tools/fake_telegram.py); по умолчанию — api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+bot = Bot(token=TELEGRAM_TOKEN, session=session)
+dp = Dispatcher()
+openai_client = create_llm_client(OPENAI_API_KEY)
+transcribe_audio = load_backend("transcription", TRANSCRIPTION_BACKEND)
+# Хранилище журнала и аудио (STORAGE_BACKEND): None — файлы остаются только на диске
+storage = create_storage()
+
+# ─── ПАПКИ ДЛЯ ЛОКАЛЬНЫХ ФАЙЛОВ ──────────────────────────────────────────────
+AUDIO_DIR = os.getenv("AUDIO_DIR", "voice_records_mp3")
+os.makedirs(AUDIO_DIR, exist_ok=True)
+TEXT_DIR = "text_records"
+os.makedirs(TEXT_DIR, exist_ok=True)
+
+# Журнал запрос–ответ в формате JSONL; перенос старого файла:
+# python tools/migrate_records.py records_new.json records_new.jsonl
+LOG_FILE = os.getenv("LOG_FILE", "records_new.jsonl")
+if shard_index() is not None:
+    # У каждого процесса-обработчика свой журнал (см. sharding.py)
+    LOG_FILE = f"{os.path.splitext(LOG_FILE)[0]}-shard{shard_index()}.jsonl"
+TELEGRAM_MESSAGE_LIMIT = 4000  # примерно 4096 символов
+
+# Telegram ID администраторов через запятую: им доступна команда /stats
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if x}
+
+# ─── ФУНКЦИЯ ОЦЕНИВАНИЯ ТЕКСТА ─────────────────────────────────────────────────────────────
+ASSESS_MODEL = "gpt-4.1"
+ASSESS_TEMPERATURE = 0.1
+# Меняется при любой правке промпта или примеров — старые оценки из кэша не отдаются
+PROMPT_VERSION = prompt_fingerprint(
+    SYSTEM_PROMPT, EXAMPLE_1_INPUT, EXAMPLE_1_OUTPUT, EXAMPLE_2_INPUT, EXAMPLE_2_OUTPUT
+)
+
+# Кэш оценок: повторная отправка того же текста отвечает без обращения к модели
+assessment_cache = TieredCache(
+    "assessment",
+    os.getenv("ASSESSMENT_CACHE_PATH", "cache/assessments.sqlite3"),
+    ttl=float(os.getenv("ASSESSMENT_CACHE_TTL", str(30 * 24 * 3600))),
+    max_rows=int(os.getenv("ASSESSMENT_CACHE_MAX_ROWS", "20000")),
+    max_bytes=int(os.getenv("ASSESSMENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    memory_size=int(os.getenv("ASSESSMENT_CACHE_MEMORY", "512")),
+)
+
+# Потоковый режим: оценка показывается по мере генерации (STREAM_ASSESSMENT=0 — выключить)
+STREAM_ASSESSMENT = os.getenv("STREAM_ASSESSMENT", "1") != "0"
+
+# Статический префикс запроса: системный промпт и few-shot примеры собираются один раз
+# и идут первыми без изменений, поэтому OpenAI может брать их из кэша префиксов.
+# Всё, что зависит от запроса, добавляется только в конец.
+STATIC_PREFIX = (
+    {"role": "system", "content": SYSTEM_PROMPT},
+    {"role": "user", "content": EXAMPLE_1_INPUT},
+    {"role": "assistant", "content": EXAMPLE_1_OUTPUT},
+    {"role": "user", "content": EXAMPLE_2_INPUT},
+    {"role": "assistant", "content": EXAMPLE_2_OUTPUT},
+)
+
+def build_messages(text: str) -> list:
+    return [*STATIC_PREFIX, {"role": "user", "content": text}]
+
+# Структурированный режим (STRUCTURED_ASSESSMENT=1): модель отвечает JSON по схеме,
+# отчёт собирается локально (structured_report). Выходных токенов заметно меньше,
+# а оценки попадают в журнал в машиночитаемом виде.
+STRUCTURED_ASSESSMENT = os.getenv("STRUCTURED_ASSESSMENT", "0") == "1"
+STRUCTURED_PREFIX = (
+    {"role": "system", "content": SYSTEM_PROMPT + STRUCTURED_INSTRUCTIONS},
+    {"role": "user", "content": EXAMPLE_1_INPUT},
+    {"role": "assistant", "content": json.dumps(EXAMPLE_1_JSON, ensure_ascii=False)},
+    {"role": "user", "content": EXAMPLE_2_INPUT},
+    {"role": "assistant", "content": json.dumps(EXAMPLE_2_JSON, ensure_ascii=False)},
+)
+STRUCTURED_PROMPT_VERSION = prompt_fingerprint(*(m["content"] for m in STRUCTURED_PREFIX))
+
+def build_structured_messages(text: str) -> list:
+    return [*STRUCTURED_PREFIX, {"role": "user", "content": text}]
+
+# Параллельный режим (FANOUT_ASSESSMENT=1): каждый аспект и общая часть (ошибки,
+# упражнения) запрашиваются одновременно отдельными запросами, см. fanout.py.
+# Ответ — тот же JSON, что и в структурированном режиме.
+FANOUT_ASSESSMENT = os.getenv("FANOUT_ASSESSMENT", "0") == "1"
+FANOUT_PREFIXES = build_part_prefixes(
+    SYSTEM_PROMPT, [(EXAMPLE_1_INPUT, EXAMPLE_1_JSON), (EXAMPLE_2_INPUT, EXAMPLE_2_JSON)]
+)
+FANOUT_PROMPT_VERSION = prompt_fingerprint(
+    *(m["content"] for prefix in FANOUT_PREFIXES.values() for m in prefix)
+)
+
+# ─── ПЛАНИРОВЩИКИ ЗАПРОСОВ К OPENAI ──────────────────────────────────────────
+# Честная очередь по чатам перед оценкой и расшифровкой; оценки дополнительно
+# ограничены общим бюджетом токенов в минуту (OPENAI_TPM_LIMIT)
+ASSESS_MAX_TOKENS = 5000
+# Оценка длины ответа для бюджета TPM (обычно оценка короче max_tokens)
+ASSESS_COMPLETION_ESTIMATE = int(os.getenv("ASSESS_COMPLETION_ESTIMATE", "2000"))
+PROMPT_PREFIX_TOKENS = estimate_tokens(
+    SYSTEM_PROMPT + EXAMPLE_1_INPUT + EXAMPLE_1_OUTPUT + EXAMPLE_2_INPUT + EXAMPLE_2_OUTPUT
+)
+STRUCTURED_MAX_TOKENS = 3000
+STRUCTURED_COMPLETION_ESTIMATE = int(os.getenv("STRUCTURED_COMPLETION_ESTIMATE", "1200"))
+STRUCTURED_PREFIX_TOKENS = estimate_tokens("".join(m["content"] for m in STRUCTURED_PREFIX))
+FANOUT_MAX_TOKENS = 1500  # на одну часть
+FANOUT_PREFIX_TOKENS = estimate_tokens(
+    "".join(m["content"] for prefix in FANOUT_PREFIXES.values() for m in prefix)
+)
+
+openai_tpm = TokenBucket(OPENAI_TPM_LIMIT)
+assessment_scheduler = FairScheduler(
+    "assessment", workers=int(os.getenv("ASSESSMENT_WORKERS", "8")), limiter=openai_tpm
+)
+transcription_scheduler = FairScheduler(
+    "transcription", workers=int(os.getenv("TRANSCRIPTION_WORKERS", "8"))
+)
+
+async def cached_assessment(text: str):
+    """
+    Возвращает (ключ кэша, оценка или None).
+    В структурированном режиме оценка в кэше — проверенный JSON (dict), см. render_cached().
+    """
+    if FANOUT_ASSESSMENT:
+        version = FANOUT_PROMPT_VERSION
+    elif STRUCTURED_ASSESSMENT:
+        version = STRUCTURED_PROMPT_VERSION
+    else:
+        version = PROMPT_VERSION
+    key = assessment_key(text, ASSESS_MODEL, version, ASSESS_TEMPERATURE)
+    cached = await assessment_cache.get(key)
+    if cached is not None:
+        logging.info(f"Оценка взята из кэша (hit rate {assessment_cache.hit_rate():.0%}, {dict(assessment_cache.stats)})")
+    return key, cached
+
+async def request_assessment(text: str):
+    """
+    Один запрос к модели без кэша и очереди. Возвращает (оценка, учёт токенов).
+    """
+    started = time.monotonic()
+    resp = await openai_client.chat.completions.create(
+        model=ASSESS_MODEL,
+        messages=build_messages(text),
+        temperature=ASSESS_TEMPERATURE,
+        max_tokens=ASSESS_MAX_TOKENS,
+        prompt_cache_key=PROMPT_VERSION,
+    )
+    usage = record_usage(resp.usage, latency=round(time.monotonic() - started, 3))
+    return resp.choices[0].message.content.strip(), usage
+
+async def request_structured_assessment(text: str):
+    """
+    Запрос оценки в виде JSON по схеме. Возвращает (проверенный JSON, учёт токенов).
+    Если ответ не прошёл проверку, повторяет запрос в обычном текстовом режиме
+    и возвращает (текст оценки, учёт токенов).
+    """
+    started = time.monotonic()
+    resp = await openai_client.chat.completions.create(
+        model=ASSESS_MODEL,
+        messages=build_structured_messages(text),
+        temperature=ASSESS_TEMPERATURE,
+        max_tokens=STRUCTURED_MAX_TOKENS,
+        prompt_cache_key=STRUCTURED_PROMPT_VERSION,
+        response_format=RESPONSE_FORMAT,
+    )
+    usage = record_usage(resp.usage, latency=round(time.monotonic() - started, 3), structured=True)
+    try:
+        data = validate_report(json.loads(resp.choices[0].message.content))
+    except (TypeError, json.JSONDecodeError, ReportValidationError) as e:
+        logging.error(f"Структурированная оценка не прошла проверку ({e}), повтор в текстовом режиме")
+        return await request_assessment(text)
+    usage["scores"] = scores_of(data)
+    return data, usage
+
+async def request_fanout_assessment(text: str):
+    """
+    Параллельные запросы по аспектам. Возвращает (проверенный JSON, учёт токенов
+    по всем частям вместе с задержкой каждой части). Если какая-то часть
+    не получена, оценка повторяется одним структурированным запросом.
+    """
+    started = time.monotonic()
+    try:
+        data, usages, latencies = await assess_fanout(
+            openai_client,
+            FANOUT_PREFIXES,
+            text,
+            model=ASSESS_MODEL,
+            temperature=ASSESS_TEMPERATURE,
+            max_tokens=FANOUT_MAX_TOKENS,
+            prompt_cache_key=FANOUT_PROMPT_VERSION,
+        )
+    except FanoutError as e:
+        logging.error(f"Параллельная оценка не удалась ({e}), повтор одним запросом")
+        return await request_structured_assessment(text)
+
+    totals = Counter()
+    for part, part_usage in usages.items():
+        record = record_usage(part_usage, part=part, latency=round(latencies[part], 3))
+        totals.update({k: record[k] for k in ("prompt_tokens", "cached_tokens", "completion_tokens") if k in record})
+    usage = {
+        **totals,
+        "latency": round(time.monotonic() - started, 3),
+        "latency_parts": {part: round(latency, 3) for part, latency in latencies.items()},
+        "fanout": True,
+        "scores": scores_of(data),
+    }
+    return data, usage
+
+def render_cached(value) -> str:
+    """
+    Текст отчёта из значения кэша: строка (текстовый режим) или JSON оценки.
+    """
+    return render_report(value) if isinstance(value, dict) else value
+
+async def stream_assessment(message: Message, text: str):
+    """
+    Потоковый запрос к модели: ответ показывается студенту по мере генерации.
+    Возвращает (полный текст оценки, учёт токенов с временем до первого токена).
+    """
+    started = time.monotonic()
+    first_token = None
+    usage = None
+    reply = StreamingReply(message, limit=TELEGRAM_MESSAGE_LIMIT)
+    stream = await openai_client.chat.completions.create(
+        model=ASSESS_MODEL,
+        messages=build_messages(text),
+        temperature=ASSESS_TEMPERATURE,
+        max_tokens=ASSESS_MAX_TOKENS,
+        prompt_cache_key=PROMPT_VERSION,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    async for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if first_token is None:
+                first_token = time.monotonic() - started
+            await reply.feed(chunk.choices[0].delta.content)
+    result = await reply.finish()
+
+    usage = record_usage(
+        usage,
+        latency=round(time.monotonic() - started, 3),
+        ttft=round(first_token, 3) if first_token is not None else None,
+    )
+    return result, usage
+
+async def reply_with_assessment(message: Message, text: str):
+    """
+    Оценивает текст и отправляет оценку студенту (потоково или одним ответом).
+    Повтор из кэша отвечает сразу, новый запрос проходит через очередь чата и бюджет TPM.
+    Явно короткий ответ (см. sentence_check) получает шаблонную оценку без запроса к модели.
+    Возвращает (оценка, учёт токенов или None для ответа из кэша).
+    """
+    check = precheck(text)
+    if check.verdict == "short":
+        result = short_response_reply(check)
+        await message.answer(result)
+        inc("assessments_total", source="precheck")
+        logging.info(f"Предпроверка: {check.sentences} предл., {check.words} сл. — ответ без модели")
+        return result, {"precheck": check._asdict()}
+
+    key, cached = await cached_assessment(text)
+    if cached is not None:
+        inc("assessments_total", source="cache")
+        result = render_cached(cached)
+        await send_long_message(message, result)
+        return result, {"scores": scores_of(cached)} if isinstance(cached, dict) else None
+
+    value = None
+    if FANOUT_ASSESSMENT or STRUCTURED_ASSESSMENT:
+        # JSON не показать по кусочкам — отчёт отправляется целиком после проверки
+        if FANOUT_ASSESSMENT:
+            cost = FANOUT_PREFIX_TOKENS + estimate_tokens(text) * len(FANOUT_PREFIXES) + STRUCTURED_COMPLETION_ESTIMATE
+            request = partial(request_fanout_assessment, text)
+        else:
+            cost = STRUCTURED_PREFIX_TOKENS + estimate_tokens(text) + STRUCTURED_COMPLETION_ESTIMATE
+            request = partial(request_structured_assessment, text)
+        value, usage = await assessment_scheduler.submit(message.chat.id, timed("assess", request), cost=cost)
+        result = render_cached(value)
+        await send_long_message(message, result)
+    elif STREAM_ASSESSMENT:
+        cost = PROMPT_PREFIX_TOKENS + estimate_tokens(text) + ASSESS_COMPLETION_ESTIMATE
+        # Потоковый ответ отправляется студенту по ходу генерации — отправка входит в этап assess
+        result, usage = await assessment_scheduler.submit(
+            message.chat.id, timed("assess", partial(stream_assessment, message, text)), cost=cost
+        )
+    else:
+        cost = PROMPT_PREFIX_TOKENS + estimate_tokens(text) + ASSESS_COMPLETION_ESTIMATE
+        result, usage = await assessment_scheduler.submit(
+            message.chat.id, timed("assess", partial(request_assessment, text)), cost=cost
+        )
+        if len(result) <= TELEGRAM_MESSAGE_LIMIT:
+            with span("send"):
+                await message.answer(result)
+        else:
+            await send_long_message(message, result)
+            # Или отправить как файл:
+            # await send_response_as_file(message, result, base_filename="response")
+
+    inc("assessments_total", source="model")
+    # Возвращаем в бюджет TPM разницу между оценкой и фактическим расходом
+    if "prompt_tokens" in usage:
+        openai_tpm.adjust(usage["prompt_tokens"] + usage["completion_tokens"] - cost)
+
+    await assessment_cache.put(key, value if value is not None else result)
+    return result, usage
+
+def sanitize_filename(name: str) -> str:
+    """
+    Убирает из строки все символы, неприемлемые в именах файлов, и заменяет пробелы на '_'
+    """
+    cleaned = re.sub(r"[^A-Za-z0-9А-Яа-яёЁ\s]", "", name)
+    return re.sub(r"\s+", "_", cleaned).strip("_")
+
+def log_interaction(request_text: str, response_text: str, usage: Optional[dict] = None) -> asyncio.Future:
+    """
+    Ставит запрос пользователя и ответ модели в очередь на дозапись в JSONL-журнал.
+    Возвращает future, который завершается после сброса записи на диск.
+    usage — учёт токенов и задержек запроса (None, если ответ взят из кэша);
+    оценки структурированного режима (usage["scores"]) пишутся отдельным полем.
+    После сброса на диск журнал помечается для фоновой выгрузки на Google Drive.
+    """
+    entry = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "request": request_text,
+        "response": response_text
+    }
+    if usage:
+        usage = dict(usage)
+        scores = usage.pop("scores", None)
+        if scores:
+            entry["scores"] = scores
+        if usage:
+            entry["usage"] = usage
+    return interaction_log.append(entry)
+
+# Фоновая синхронизация с хранилищем: журнал выгружается не чаще раза в DRIVE_SYNC_INTERVAL,
+# файлы, ушедшие в ротацию, — как новые файлы. С локальным хранилищем синхронизации нет.
+drive_sync = DriveSyncWorker(storage.upload) if storage is not None else None
+interaction_log = InteractionLog(
+    LOG_FILE,
+    on_rotate=drive_sync.schedule_file if drive_sync is not None else None,
+    on_flush=drive_sync.schedule_log if drive_sync is not None else None,
+)
+
+def schedule_upload(path: str) -> None:
+    """
+    Ставит файл в очередь на выгрузку в хранилище (каждый раз как новый файл).
+    """
+    if drive_sync is not None:
+        drive_sync.schedule_file(path)
+
+async def send_long_message(message: Message, text: str):
+    """
+    Разбивает большой текст на фрагменты по ~4000 символов и отправляет их последовательно.
+    """
+    with span("send"):
+        await _send_chunks(message, text)
+
+async def _send_chunks(message: Message, text: str):
+    if len(text) <= TELEGRAM_MESSAGE_LIMIT:
+        await message.answer(text)
+        return
+
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if len(current) + len(line) > TELEGRAM_MESSAGE_LIMIT:
+            chunks.append(current)
+            current = line
+        else:
+            current += line
+    if current:
+        chunks.append(current)
+
+    for chunk in chunks:
+        await message.answer(chunk)
+
+async def send_response_as_file(message: Message, text: str, base_filename: str):
+    """
+    Сохраняет текст в файл и отправляет его как документ.
+    Затем загружает этот файл на Google Drive как новый.
+    """
+    timestamp_str = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    filename = f"{base_filename}_{timestamp_str}.txt"
+    filepath = os.path.join(TEXT_DIR, filename)
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(text)
+    await message.answer_document(InputFile(filepath))
+
+    # Загружаем как новый файл в фоне
+    schedule_upload(filepath)
+
+# ─── ХЭНДЛЕР /start ─────────────────────────────────────────────────────────
+@dp.message(CommandStart())
+async def cmd_start(message: Message):
+    await bot.send_chat_action(message.chat.id, action="typing")
+    await message.answer(
+        "Привет, аспирант! Я бот для оценки устной академической речи. "
+        "Отправь текст или голосовое сообщение, и я выдам расшифровку и оценку по шаблону."
+    )
+
+# ─── РАСШИФРОВКА ГОЛОСОВОГО ──────────────────────────────────────────────────
+# Кэш расшифровок по file_unique_id: текст и длительность аудио, вытеснение по LRU
+transcription_cache = TieredCache(
+    "transcription",
+    os.getenv("TRANSCRIPTION_CACHE_PATH", "cache/transcriptions.sqlite3"),
+    max_rows=int(os.getenv("TRANSCRIPTION_CACHE_MAX_ROWS", "50000")),
+    max_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+    memory_size=int(os.getenv("TRANSCRIPTION_CACHE_MEMORY", "256")),
+)
+
+# ─── ДОЛГОВРЕМЕННЫЕ ЗАДАЧИ ───────────────────────────────────────────────────
+# Каждое голосовое и текстовое сообщение — задача в sqlite (job_store.py),
+# которая переживает перезапуск: после старта прерванные задачи продолжаются
+# с последнего завершённого этапа. Скачанное аудио до расшифровки лежит в JOB_SPOOL_DIR.
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs/jobs.sqlite3")
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "jobs/spool")
+os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+# Сообщения, пришедшие, пока бот был остановлен, обрабатываются после запуска;
+# DROP_PENDING_UPDATES=1 — отбросить их (polling и вебхук)
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "0") == "1"
+
+job_store = JobStore(JOB_DB_PATH)
+active_jobs = set()   # id задач, выполняющихся в этом процессе
+resumed_tasks = set()
+
+async def download_voice(message: Message, job_id: str) -> Optional[dict]:
+    """
+    Скачивает голосовое, готовит его для Whisper и сохраняет в JOB_SPOOL_DIR.
+    Возвращает результаты этапа downloaded или None, если студенту уже отправлено сообщение об ошибке.
+    """
+    # Скачиваем voice.oga в память; с профилем AUDIO_PROFILE перед Whisper тишина по краям
+    # обрезается, звук сводится в 16 кГц моно и сжимается (этап transcode, см. transcoder.py)
+    with span("download"):
+        fi = await bot.get_file(message.voice.file_id)
+        voice = await bot.download_file(fi.file_path)
+    try:
+        audio_bytes, audio_ext = await prepare_for_transcription(voice.read())
+        spool_path = os.path.join(JOB_SPOOL_DIR, f"{job_id.replace(':', '_')}.{audio_ext}")
+        with open(spool_path, "wb") as f:
+            f.write(audio_bytes)
+    except (TranscodeError, OSError) as e:
+        # OSError — нет ffmpeg или не удалось записать в JOB_SPOOL_DIR: повтор задачи не поможет
+        if isinstance(e, OSError):
+            logging.exception(f"Голосовое {job_id}: не удалось подготовить аудио")
+        await message.answer("Не удалось обработать голосовое сообщение. Попробуйте отправить его ещё раз.")
+        return None
+    return {"audio_path": spool_path, "audio_ext": audio_ext}
+
+async def transcribe_voice(message: Message, audio_path: str, audio_ext: str) -> Optional[str]:
+    """
+    Расшифровывает скачанное голосовое.
+    Возвращает текст расшифровки или None, если студенту уже отправлено сообщение об ошибке.
+    """
+    with open(audio_path, "rb") as f:
+        audio_bytes = f.read()
+
+    # Расшифровка через Whisper (в честной очереди по чатам); длинные монологи —
+    # кусками параллельно, см. long_audio.py
+    if is_long_audio(len(audio_bytes), message.voice.duration):
+        request = partial(transcribe_long_audio, audio_bytes, f"voice.{audio_ext}", transcribe_audio)
+    else:
+        request = partial(transcribe_audio, audio_bytes, filename=f"voice.{audio_ext}")
+    try:
+        transcription = await transcription_scheduler.submit(message.chat.id, timed("whisper", request))
+    except TranscriptionError:
+        await message.answer("Не удалось расшифровать голосовое сообщение. Попробуйте отправить его ещё раз.")
+        return None
+    return transcription
+
+def archive_path_for(transcription: str, audio_ext: str) -> str:
+    # Финальное имя аудиофайла — из первых 3-4 слов транскрипции
+    first_words = "_".join(transcription.split()[:4])
+    return os.path.join(AUDIO_DIR, f"{sanitize_filename(first_words)}.{audio_ext}")
+
+def archive_voice(audio_path: str, archive_path: str) -> None:
+    """
+    Переносит аудио из JOB_SPOOL_DIR в архив и ставит его в очередь на Drive.
+    Вызывается после сохранения этапа transcribed: если процесс упадёт до переноса,
+    продолженная задача перенесёт файл сама (повторный вызов без файла ничего не делает).
+    """
+    if not os.path.exists(audio_path):
+        return
+    os.replace(audio_path, archive_path)
+    # Загружаем аудио в хранилище в фоне (каждый раз создаётся новый, аудио мы не обновляем)
+    schedule_upload(archive_path)
+
+async def run_job(message: Message, job: Job) -> None:
+    """
+    Проводит задачу через оставшиеся этапы, сохраняя результат каждого.
+    После сбоя задача повторяется с последнего сохранённого этапа через
+    JOB_RETRY_DELAY, 2 × JOB_RETRY_DELAY, ... секунд; когда попытки исчерпаны,
+    задача закрывается и студенту отправляется сообщение об ошибке.
+    """
+    if job.id in active_jobs:
+        return
+    active_jobs.add(job.id)
+    try:
+        while True:
+            try:
+                with span("total"):
+                    await run_stages(message, job)
+                return
+            except Exception as e:
+                logging.exception(f"Задача {job.id} прервана на этапе после {job.stage}")
+                await job_store.fail(job.id, repr(e))
+            job = await job_store.get(job.id)
+            if job.attempts >= JOB_MAX_ATTEMPTS:
+                await give_up_job(message, job)
+                return
+            delay = JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            logging.info(f"Задача {job.id}: повтор с этапа {job.stage} через {delay:g} с (попытка {job.attempts + 1})")
+            await asyncio.sleep(delay)
+    finally:
+        active_jobs.discard(job.id)
+
+async def give_up_job(message: Message, job: Job) -> None:
+    await job_store.fail(job.id, job.error or "попытки исчерпаны", final=True)
+    inc("jobs_failed_total", stage=job.stage)
+    try:
+        await message.answer("Не удалось обработать ваше сообщение. Попробуйте отправить его ещё раз.")
+    except Exception as e:
+        logging.error(f"Задача {job.id}: не удалось сообщить студенту об ошибке: {e}")
+
+async def run_stages(message: Message, job: Job) -> None:
+    stage, data = job.stage, dict(job.data)
+
+    if stage == "received":
+        # Пересланные и повторно отправленные голосовые имеют тот же file_unique_id:
+        # в этом случае скачивание, ffmpeg и Whisper пропускаются целиком
+        cached = await transcription_cache.get(message.voice.file_unique_id)
+        if cached is not None:
+            data["text"] = cached["text"]
+            await message.answer(f"Расшифровка:\n{data['text']}")
+            stage = "transcribed"
+            await job_store.advance(job.id, stage, text=data["text"])
+        else:
+            downloaded = await download_voice(message, job.id)
+            if downloaded is None:
+                await job_store.fail(job.id, "не удалось подготовить аудио", final=True)
+                return
+            data.update(downloaded)
+            stage = "downloaded"
+            await job_store.advance(job.id, stage, **downloaded)
+
+    if stage == "downloaded":
+        transcription = await transcribe_voice(message, data["audio_path"], data["audio_ext"])
+        if transcription is None:
+            os.remove(data["audio_path"])
+            await job_store.fail(job.id, "не удалось расшифровать аудио", final=True)
+            return
+        await transcription_cache.put(
+            message.voice.file_unique_id,
+            {"text": transcription, "duration": message.voice.duration},
+        )
+        data["text"] = transcription
+        data["archive_path"] = archive_path_for(transcription, data["audio_ext"])
+        # Отправляем расшифровку пользователю
+        await message.answer(f"Расшифровка:\n{transcription}")
+        stage = "transcribed"
+        # Сначала сохраняем расшифровку и путь в архиве, потом переносим файл:
+        # задача, продолженная после падения, не ищет уже перенесённый файл
+        await job_store.advance(job.id, stage, text=transcription, archive_path=data["archive_path"])
+
+    if stage == "transcribed" and "archive_path" in data:
+        archive_voice(data["audio_path"], data["archive_path"])
+
+    if stage == "transcribed":
+        # Оценка текста через ChatGPT и отправка ответа модели; после перезапуска
+        # уже полученная оценка берётся из кэша, а не запрашивается заново
+        result, usage = await reply_with_assessment(message, data["text"])
+        data.update(result=result, usage=usage)
+        stage = "assessed"
+        await job_store.advance(job.id, stage, result=result, usage=usage)
+
+    if stage == "assessed":
+        # Логируем запрос и ответ; задача закрывается после сброса журнала на диск
+        with span("log"):
+            await log_interaction(request_text=data["text"], response_text=data["result"], usage=data.get("usage"))
+        await job_store.advance(job.id, "delivered")
+
+async def start_job(message: Message, kind: str, stage: str = "received", **data) -> None:
+    job = Job(
+        id=job_id_of(message.chat.id, message.message_id),
+        chat_id=message.chat.id,
+        kind=kind,
+        stage=stage,
+        message=message.model_dump_json(exclude_none=True),
+        data=data,
+        attempts=0,
+        error=None,
+    )
+    if not await job_store.create(job.id, job.chat_id, kind, job.message, stage, **data):
+        logging.info(f"Задача {job.id} уже зарегистрирована — повторная доставка пропущена")
+        inc("duplicate_updates_total")
+        return
+    inc("requests_total", kind=kind)
+    await run_job(message, job)
+
+async def resume_jobs() -> None:
+    """
+    Продолжает задачи, прерванные остановкой или падением бота.
+    В режиме шардирования каждый обработчик берёт только задачи своих чатов.
+    """
+    removed = await job_store.prune()
+    if removed:
+        logging.info(f"Удалено закрытых задач: {removed}")
+
+    index = shard_index()
+    def own(jobs):
+        return [job for job in jobs if index is None or job.chat_id % SHARD_WORKERS == index]
+
+    # Задачи, которые исчерпали попытки падениями процесса: закрываем и сообщаем студенту
+    for job in own(await job_store.exhausted()):
+        logging.warning(f"Задача {job.id} исчерпала попытки на этапе {job.stage}: {job.error}")
+        await give_up_job(Message.model_validate_json(job.message, context={"bot": bot}), job)
+
+    jobs = own(await job_store.unfinished())
+    if not jobs:
+        return
+    logging.info(f"Продолжаем прерванные задачи: {len(jobs)}")
+    for job in jobs:
+        # Попытка засчитывается заранее: задача, которая каждый раз роняет процесс,
+        # не будет перезапускаться бесконечно
+        await job_store.fail(job.id, "прервана перезапуском")
+        message = Message.model_validate_json(job.message, context={"bot": bot})
+        task = asyncio.create_task(run_job(message, job))
+        resumed_tasks.add(task)
+        task.add_done_callback(resumed_tasks.discard)
+
+# ─── МЕТРИКИ И /stats ────────────────────────────────────────────────────────
+# Время этапов пишется в metrics.py (span/timed в коде выше), сюда подключаются
+# накопленные счётчики модулей: токены, ffmpeg, кэши, очереди планировщиков.
+def collect_metrics():
+    samples = counter_samples("openai_usage_total", USAGE_TOTALS, "field")
+    samples += counter_samples("transcode_total", TRANSCODE_STATS, "path")
+    samples += counter_samples("audio_preprocess_total", PREPROCESS_STATS, "field")
+    samples += counter_samples("long_audio_total", LONG_AUDIO_STATS, "field")
+    for cache in (assessment_cache, transcription_cache):
+        samples += counter_samples("cache_events_total", cache.stats, "event", cache=cache.name)
+        samples.append(("cache_hit_rate", {"cache": cache.name}, cache.hit_rate()))
+    for scheduler in (assessment_scheduler, transcription_scheduler):
+        samples += counter_samples("scheduler", scheduler.snapshot(), "field", queue=scheduler.name)
+    return samples
+
+register_collector(collect_metrics)
+metrics_runner = None
+watchdog = None
+
+@dp.message(Command("stats"))
+async def cmd_stats(message: Message):
+    if message.from_user is None or message.from_user.id not in ADMIN_IDS:
+        await message.answer("Команда недоступна.")
+        return
+    index = shard_index()
+    header = f"Обработчик {index}\n" if index is not None else ""
+    caches = ", ".join(f"{c.name} {c.hit_rate():.0%}" for c in (assessment_cache, transcription_cache))
+    await message.answer(
+        f"{header}{stats_summary()}\n\n"
+        f"Кэши (hit rate): {caches}\n"
+        f"Токены: {dict(USAGE_TOTALS)}"
+    )
+
+# ─── ХЭНДЛЕР ГОЛОСОВЫХ ───────────────────────────────────────────────────────
+@dp.message(F.voice)
+async def handle_voice(message: Message):
+    await bot.send_chat_action(message.chat.id, action="typing")
+    await start_job(message, "voice")
+
+# ─── ХЭНДЛЕР ТЕКСТОВЫХ ───────────────────────────────────────────────────────
+@dp.message(F.text)
+async def handle_text(message: Message):
+    await bot.send_chat_action(message.chat.id, action="typing")
+    await start_job(message, "text", stage="transcribed", text=message.text)
+
+# ─── СТАРТ ПОЛЛИНГА ─────────────────────────────────────────────────────────
+async def on_startup():
+    global metrics_runner, watchdog
+    watchdog = start_watchdog()
+    # У каждого процесса-обработчика свой порт: METRICS_PORT + 1 + номер
+    index = shard_index()
+    port = METRICS_PORT + 1 + index if METRICS_PORT and index is not None else METRICS_PORT
+    metrics_runner = await start_metrics_server(METRICS_HOST, port)
+    await warm_up_openai_client()
+    await resume_jobs()
+
+async def on_shutdown():
+    await assessment_scheduler.close()
+    await transcription_scheduler.close()
+    await interaction_log.close()
+    if drive_sync is not None:
+        await drive_sync.close()
+    if storage is not None:
+        await storage.close()
+    assessment_cache.close()
+    transcription_cache.close()
+    job_store.close()
+    await close_openai_client()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    if watchdog is not None:
+        watchdog.stop()
+
+async def main():
+    # SHARD_WORKERS > 0: этот процесс только принимает обновления и раздаёт их
+    # процессам-обработчикам по chat_id, сам он к OpenAI не обращается
+    pool = None
+    if SHARD_WORKERS > 0:
+        pool = ShardPool(__name__, SHARD_WORKERS)
+        pool.start()
+        dp.update.outer_middleware(pool.middleware)
+    else:
+        await on_startup()
+    try:
+        if WEBHOOK_ENABLED:
+            await run_webhook(dp, bot, drop_pending_updates=DROP_PENDING_UPDATES)
+        else:
+            if DROP_PENDING_UPDATES:
+                await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
+    finally:
+        if pool is not None:
+            await pool.close()
+        await on_shutdown()
+
@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ─── ДВУХУРОВНЕВЫЙ КЭШ: LRU В ПАМЯТИ + SQLITE НА ДИСКЕ ───────────────────────
+# Память отвечает за повторы «здесь и сейчас», sqlite переживает перезапуск бота.
+# Записи живут не дольше ttl секунд (None — без срока) на обоих уровнях: в памяти
+# хранится тот же срок, что и на диске. На диске записи ещё и вытесняются
+# по давности использования, когда их становится больше max_rows или значения
+# вместе занимают больше max_bytes. Попадания в память тоже отмечаются на диске
+# (пачками, см. TOUCH_EVERY), иначе самые ходовые записи вытеснялись бы первыми.
+# Значения — любые JSON-сериализуемые объекты. Операции с sqlite выполняются
+# в отдельном потоке, чтобы не блокировать event loop.
+
+# Как часто (в записях) запускать чистку диска от просроченных и лишних строк
+EVICT_EVERY = 100
+# Время использования после попаданий в память пишется на диск раз в столько
+# попаданий или секунд — и перед каждой записью
+TOUCH_EVERY = 64
+TOUCH_INTERVAL = 60.0
+
+
+class TieredCache:
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        ttl: Optional[float] = None,
+        max_rows: int = 10000,
+        memory_size: int = 256,
+        max_bytes: Optional[int] = None,
+    ):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.memory_size = memory_size
+        # memory_hits / disk_hits / misses / puts / evictions
+        self.stats: Counter = Counter()
+        self._memory: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()   # ключ → (истекает, значение)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._touched: Dict[str, float] = {}    # ключ → время попадания в память, ещё не записанное на диск
+        self._touched_at = time.time()
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self._memory:
+            expires, value = self._memory[key]
+            now = time.time()
+            if expires is None or expires > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self._touched[key] = now
+                if len(self._touched) >= TOUCH_EVERY or now - self._touched_at >= TOUCH_INTERVAL:
+                    await self._flush_touched()
+                return value
+            # Просрочено: убираем из памяти, на диске запись удалит _disk_get
+            del self._memory[key]
+
+        try:
+            row = await asyncio.to_thread(self._disk_get, key)
+        except sqlite3.Error as e:
+            logging.error(f"Кэш {self.name}: ошибка чтения {self.path}: {e}")
+            row = None
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        value, created = row
+        self.stats["disk_hits"] += 1
+        self._remember(key, value, created)
+        return value
+
+    async def put(self, key: str, value: Any) -> None:
+        self._remember(key, value, time.time())
+        self.stats["puts"] += 1
+        touched, self._touched = self._touched, {}
+        try:
+            await asyncio.to_thread(self._disk_put, key, value, touched)
+        except sqlite3.Error as e:
+            logging.error(f"Кэш {self.name}: ошибка записи {self.path}: {e}")
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def close(self) -> None:
+        touched, self._touched = self._touched, {}
+        if touched:
+            try:
+                self._disk_touch(touched)
+            except sqlite3.Error as e:
+                logging.error(f"Кэш {self.name}: ошибка записи {self.path}: {e}")
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _flush_touched(self) -> None:
+        touched, self._touched = self._touched, {}
+        self._touched_at = time.time()
+        try:
+            await asyncio.to_thread(self._disk_touch, touched)
+        except sqlite3.Error as e:
+            logging.error(f"Кэш {self.name}: ошибка записи {self.path}: {e}")
+
+    # ─── Память ─────────────────────────────────────────────────────────────
+    def _remember(self, key: str, value: Any, created: float) -> None:
+        expires = created + self.ttl if self.ttl is not None else None
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # ─── Диск (выполняется в потоке) ────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache(used)")
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        (значение, время создания) или None, если записи нет или она просрочена.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] < now - self.ttl:
+                db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+            db.commit()
+        return json.loads(row[0]), row[1]
+
+    @staticmethod
+    def _touch(db: sqlite3.Connection, touched: Dict[str, float]) -> None:
+        db.executemany("UPDATE cache SET used = MAX(used, ?) WHERE key = ?", [(t, k) for k, t in touched.items()])
+
+    def _disk_touch(self, touched: Dict[str, float]) -> None:
+        with self._lock:
+            db = self._db()
+            self._touch(db, touched)
+            db.commit()
+
+    def _disk_put(self, key: str, value: Any, touched: Optional[Dict[str, float]] = None) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if touched:
+                self._touch(db, touched)
+            db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= EVICT_EVERY:
+                self._puts_since_evict = 0
+                self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        removed = 0
+        if self.ttl is not None:
+            removed += db.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl,)).rowcount
+        (count,) = db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_rows:
+            removed += db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used LIMIT ?)",
+                (count - self.max_rows,),
+            ).rowcount
+        if self.max_bytes is not None:
+            # Оставляем самые свежие записи, пока их суммарный размер укладывается в max_bytes
+            removed += db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM ("
+                " SELECT key, SUM(length(CAST(value AS BLOB))) OVER (ORDER BY used DESC, key) AS kept FROM cache"
+                ") WHERE kept > ?)",
+                (self.max_bytes,),
+            ).rowcount
+        if removed:
+            self.stats["evictions"] += removed
+            logging.info(f"Кэш {self.name}: вытеснено записей: {removed}")
+
+
+# ─── КЛЮЧИ ДЛЯ КЭША ОЦЕНОК ───────────────────────────────────────────────────
+def normalize_text(text: str) -> str:
+    """
+    Приводит текст к канонической форме: Unicode NFC, схлопнутые пробелы и переводы строк.
+    Регистр и пунктуацию не трогаем — они влияют на оценку.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """
+    Короткий отпечаток промпта и примеров: меняется при любой правке текста,
+    поэтому старые оценки не отдаются после обновления промпта.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def assessment_key(text: str, model: str, prompt_version: str, temperature: float) -> str:
+    payload = json.dumps(
+        [normalize_text(text), model, prompt_version, temperature],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,116 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Set
+
+from .metrics import span
+
+# ─── ФОНОВАЯ СИНХРОНИЗАЦИЯ С GOOGLE DRIVE ────────────────────────────────────
+# Хэндлеры только ставят файлы в очередь и сразу отвечают студенту.
+# Обновления журнала склеиваются: сколько бы записей ни пришло за интервал,
+# журнал выгружается не чаще одного раза в DRIVE_SYNC_INTERVAL секунд.
+# Аудио и прочие файлы выгружаются отдельными воркерами.
+
+DRIVE_SYNC_INTERVAL = float(os.getenv("DRIVE_SYNC_INTERVAL", "30"))
+DRIVE_UPLOAD_WORKERS = int(os.getenv("DRIVE_UPLOAD_WORKERS", "2"))
+
+
+class DriveSyncWorker:
+    """
+    upload — корутина upload(filepath, is_log=...) (например,
+    upload_file_to_gdrive_async с заранее подставленной папкой).
+    """
+
+    def __init__(
+        self,
+        upload: Callable[..., Awaitable[Optional[str]]],
+        interval: float = DRIVE_SYNC_INTERVAL,
+        workers: int = DRIVE_UPLOAD_WORKERS,
+    ):
+        self.upload = upload
+        self.interval = interval
+        self.workers = workers
+        self._dirty_logs: Set[str] = set()
+        self._log_event: Optional[asyncio.Event] = None
+        self._files: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._stop: Optional[asyncio.Event] = None
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    def schedule_log(self, path: str) -> None:
+        """
+        Отмечает журнал как изменённый; выгрузка произойдёт при ближайшей синхронизации.
+        """
+        self._ensure_started()
+        self._dirty_logs.add(path)
+        self._log_event.set()
+
+    def schedule_file(self, path: str) -> None:
+        """
+        Ставит файл в очередь на выгрузку как новый.
+        """
+        self._ensure_started()
+        self._files.put_nowait(path)
+
+    async def close(self) -> None:
+        """
+        Выгружает всё накопленное и останавливает воркеры. Вызывается при остановке бота.
+        """
+        if not self._tasks:
+            return
+        self._stop.set()
+        self._log_event.set()
+        for _ in range(self.workers):
+            await self._files.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ─── Воркеры ────────────────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._log_event = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._files = asyncio.Queue()
+        self._tasks.append(loop.create_task(self._log_loop()))
+        for _ in range(self.workers):
+            self._tasks.append(loop.create_task(self._file_loop()))
+
+    async def _log_loop(self) -> None:
+        while True:
+            await self._log_event.wait()
+            # Даём накопиться изменениям, чтобы склеить их в одну выгрузку;
+            # при остановке выгружаем сразу
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._log_event.clear()
+
+            paths, self._dirty_logs = self._dirty_logs, set()
+            for path in paths:
+                if not await self._upload(path, is_log=True):
+                    # Повторим при следующей синхронизации
+                    self._dirty_logs.add(path)
+
+            if self._stop.is_set():
+                return
+            if self._dirty_logs:
+                self._log_event.set()
+
+    async def _file_loop(self) -> None:
+        while True:
+            path = await self._files.get()
+            if path is None:
+                return
+            await self._upload(path, is_log=False)
+
+    async def _upload(self, path: str, is_log: bool) -> bool:
+        try:
+            with span("drive_upload"):
+                await self.upload(path, is_log=is_log)
+            return True
+        except Exception as e:
+            logging.error(f"Не удалось выгрузить {path} на Google Drive: {e}")
+            return False
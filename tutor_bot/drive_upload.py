@@ -0,0 +1,270 @@
+import os
+import json
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Tuple
+
+import aiohttp
+
+# ─── АСИНХРОННАЯ ВОЗОБНОВЛЯЕМАЯ ВЫГРУЗКА В GOOGLE DRIVE ──────────────────────
+# Реализация протокола resumable upload Drive v3 поверх aiohttp:
+#   1. POST (создание) или PATCH (обновление) с метаданными → URI сессии в Location;
+#   2. PUT кусками с Content-Range, сервер отвечает 308 и Range с подтверждённым смещением;
+#   3. после сбоя — PUT с "Content-Range: bytes */<размер>", чтобы узнать,
+#      сколько байт сервер уже принял, и продолжить с этого места.
+# Истёкшая или недействительная сессия (404/410 от URI сессии) открывается заново
+# для того же файла; 404 при открытии сессии значит, что самого файла больше нет.
+# 429 и 5xx повторяются с экспоненциальной задержкой. Общий лимит полосы
+# и число одновременных выгрузок ограничены на весь процесс.
+# Адрес API задаётся DRIVE_UPLOAD_URL, поэтому выгрузку можно прогнать
+# против локальной заглушки (tools/fake_drive.py).
+
+DRIVE_UPLOAD_URL = os.getenv("DRIVE_UPLOAD_URL", "https://www.googleapis.com/upload/drive/v3/files")
+DRIVE_CHUNK_SIZE = int(os.getenv("DRIVE_CHUNK_SIZE", str(8 * 1024 * 1024)))
+DRIVE_MAX_RETRIES = int(os.getenv("DRIVE_MAX_RETRIES", "6"))
+DRIVE_BANDWIDTH_LIMIT = int(os.getenv("DRIVE_BANDWIDTH_LIMIT", "0"))  # байт/с, 0 — без ограничения
+DRIVE_UPLOAD_CONCURRENCY = int(os.getenv("DRIVE_UPLOAD_CONCURRENCY", "2"))
+
+# Drive требует, чтобы все куски, кроме последнего, были кратны 256 КиБ
+CHUNK_GRANULARITY = 256 * 1024
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+SESSION_GONE_STATUSES = {404, 410}
+
+
+class DriveUploadError(RuntimeError):
+    """Выгрузка не удалась; status — HTTP-код последнего ответа (если был)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionExpiredError(DriveUploadError):
+    """URI сессии выгрузки больше недействителен; файл при этом может существовать."""
+
+
+class BandwidthLimiter:
+    """
+    Token bucket по байтам: acquire(n) ждёт, пока не накопится n байт «бюджета».
+    """
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.capacity = max(rate, CHUNK_GRANULARITY)
+        self._tokens = float(self.capacity)
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Кусок больше ёмкости пропускаем, как только бак полон
+                need = min(amount, self.capacity)
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((need - self._tokens) / self.rate)
+
+
+class ResumableUploader:
+    """
+    token_provider(force_refresh) — корутина, возвращающая OAuth-токен;
+    при 401 вызывается с force_refresh=True.
+    """
+
+    def __init__(
+        self,
+        token_provider: Callable[[bool], Awaitable[str]],
+        base_url: str = DRIVE_UPLOAD_URL,
+        chunk_size: int = DRIVE_CHUNK_SIZE,
+        max_retries: int = DRIVE_MAX_RETRIES,
+        bandwidth: int = DRIVE_BANDWIDTH_LIMIT,
+        concurrency: int = DRIVE_UPLOAD_CONCURRENCY,
+    ):
+        self.token_provider = token_provider
+        self.base_url = base_url.rstrip("/")
+        self.chunk_size = max(CHUNK_GRANULARITY, chunk_size // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+        self.max_retries = max_retries
+        self.limiter = BandwidthLimiter(bandwidth)
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    async def upload(self, filepath: str, metadata: dict, file_id: Optional[str] = None) -> dict:
+        """
+        Выгружает файл целиком. file_id задан — обновляет содержимое существующего файла,
+        иначе создаёт новый с метаданными metadata. Возвращает JSON ответа Drive.
+        Размер фиксируется в начале: дописанное во время выгрузки уйдёт в следующий раз.
+        Если сессия истекла, выгрузка начинается заново в новой сессии (не больше max_retries раз).
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            total = os.path.getsize(filepath)
+            restarts = 0
+            while True:
+                session_url = await self._start_session(metadata, total, file_id)
+                try:
+                    return await self._send(filepath, session_url, total)
+                except SessionExpiredError as e:
+                    if restarts >= self.max_retries:
+                        raise
+                    restarts += 1
+                    logging.warning(f"Drive: {e}, новая сессия для {filepath} (попытка {restarts})")
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ─── Протокол ───────────────────────────────────────────────────────────
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=120))
+        return self._session
+
+    async def _request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """
+        Запрос с авторизацией и повтором при 401 (обновляем токен один раз).
+        Ответ возвращается уже прочитанным.
+        """
+        force_refresh = False
+        for _ in range(2):
+            token = await self.token_provider(force_refresh)
+            headers = dict(kwargs.pop("headers", {}))
+            headers["Authorization"] = f"Bearer {token}"
+            resp = await self._get_session().request(method, url, headers=headers, **kwargs)
+            await resp.read()
+            if resp.status != 401:
+                return resp
+            kwargs["headers"] = headers
+            force_refresh = True
+        return resp
+
+    async def _backoff(self, attempt: int, resp: Optional[aiohttp.ClientResponse] = None) -> None:
+        if attempt >= self.max_retries:
+            status = resp.status if resp is not None else None
+            raise DriveUploadError(f"Превышено число попыток выгрузки ({self.max_retries})", status)
+        delay = min(2 ** attempt, 64) + random.uniform(0, 1)
+        if resp is not None and resp.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, int(resp.headers["Retry-After"]))
+        logging.warning(f"Drive: повтор через {delay:.1f} с (попытка {attempt + 1})")
+        await asyncio.sleep(delay)
+
+    async def _start_session(self, metadata: dict, total: int, file_id: Optional[str]) -> str:
+        if file_id:
+            method, url = "PATCH", f"{self.base_url}/{file_id}"
+        else:
+            method, url = "POST", self.base_url
+        params = {"uploadType": "resumable", "fields": "id"}
+        headers = {
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Length": str(total),
+        }
+        body = json.dumps({} if file_id else metadata)
+
+        attempt = 0
+        while True:
+            try:
+                resp = await self._request(method, url, params=params, headers=headers, data=body)
+            except aiohttp.ClientError as e:
+                logging.warning(f"Drive: ошибка соединения при открытии сессии: {e}")
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            if resp.status == 200 and "Location" in resp.headers:
+                return resp.headers["Location"]
+            if resp.status in RETRYABLE_STATUSES:
+                await self._backoff(attempt, resp)
+                attempt += 1
+                continue
+            raise DriveUploadError(f"Drive отклонил сессию выгрузки: HTTP {resp.status}", resp.status)
+
+    async def _query_offset(self, session_url: str, total: int) -> Tuple[Optional[int], Optional[dict]]:
+        """
+        Спрашивает у сервера подтверждённое смещение: (смещение, None),
+        а если выгрузка уже завершена — (None, ресурс файла из ответа).
+        """
+        resp = await self._request("PUT", session_url, headers={"Content-Range": f"bytes */{total}"})
+        if resp.status in (200, 201):
+            return None, await self._resource(resp)
+        if resp.status == 308:
+            return self._parse_range(resp), None
+        if resp.status in RETRYABLE_STATUSES:
+            raise aiohttp.ClientResponseError(resp.request_info, (), status=resp.status)
+        if resp.status in SESSION_GONE_STATUSES:
+            raise SessionExpiredError(f"сессия выгрузки недействительна: HTTP {resp.status}", resp.status)
+        raise DriveUploadError(f"Сессия выгрузки недоступна: HTTP {resp.status}", resp.status)
+
+    @staticmethod
+    async def _resource(resp: aiohttp.ClientResponse) -> dict:
+        text = await resp.text()
+        return json.loads(text) if text else {}
+
+    @staticmethod
+    def _parse_range(resp: aiohttp.ClientResponse) -> int:
+        # "Range: bytes=0-1048575" → следующий байт 1048576; нет заголовка — ничего не принято
+        value = resp.headers.get("Range")
+        if not value:
+            return 0
+        return int(value.rsplit("-", 1)[1]) + 1
+
+    @staticmethod
+    def _read_chunk(filepath: str, offset: int, size: int) -> bytes:
+        with open(filepath, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    async def _send(self, filepath: str, session_url: str, total: int) -> dict:
+        offset = 0
+        attempt = 0
+        need_resync = False
+        while True:
+            try:
+                if need_resync:
+                    resumed, resource = await self._query_offset(session_url, total)
+                    if resumed is None:
+                        return resource
+                    offset = resumed
+                    need_resync = False
+
+                end = min(offset + self.chunk_size, total)
+                chunk = await asyncio.to_thread(self._read_chunk, filepath, offset, end - offset)
+                await self.limiter.acquire(len(chunk))
+                content_range = f"bytes {offset}-{end - 1}/{total}" if total else "bytes */0"
+                resp = await self._request(
+                    "PUT", session_url,
+                    headers={"Content-Range": content_range},
+                    data=chunk,
+                )
+            except aiohttp.ClientError as e:
+                logging.warning(f"Drive: обрыв при выгрузке {filepath} на смещении {offset}: {e}")
+                await self._backoff(attempt)
+                attempt += 1
+                need_resync = True
+                continue
+
+            if resp.status in (200, 201):
+                return await self._resource(resp)
+            if resp.status == 308:
+                offset = self._parse_range(resp)
+                attempt = 0
+                continue
+            if resp.status in RETRYABLE_STATUSES:
+                await self._backoff(attempt, resp)
+                attempt += 1
+                need_resync = True
+                continue
+            if resp.status in SESSION_GONE_STATUSES:
+                raise SessionExpiredError(f"сессия выгрузки недействительна: HTTP {resp.status}", resp.status)
+            raise DriveUploadError(f"Drive отклонил кусок {content_range}: HTTP {resp.status}", resp.status)
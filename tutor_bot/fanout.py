@@ -0,0 +1,82 @@
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Iterable, Tuple
+
+from .structured_report import (
+    ASPECTS, GENERAL, ReportValidationError, merge_report, part_instructions, part_response_format, split_report,
+)
+
+# ─── ПАРАЛЛЕЛЬНАЯ ОЦЕНКА ПО АСПЕКТАМ ─────────────────────────────────────────
+# Вместо одной длинной генерации (четыре аспекта подряд, затем ошибки и
+# упражнения) отправляются пять независимых запросов: по одному на аспект и
+# один на общую оценку, список ошибок и упражнения. Запросы идут одновременно
+# (asyncio.gather), поэтому время ответа определяется самой долгой частью,
+# а не суммой всех разделов. Части собираются в одну оценку merge_report().
+
+PARTS = (*(key for key, _ in ASPECTS), GENERAL)
+
+
+class FanoutError(RuntimeError):
+    pass
+
+
+def build_part_prefixes(system_prompt: str, examples: Iterable[Tuple[str, dict]]) -> Dict[str, tuple]:
+    """
+    Статические префиксы сообщений для каждой части: системный промпт с указанием
+    части и few-shot примеры, урезанные до этой части (split_report).
+    examples — пары (ответ студента, полная оценка в виде JSON).
+    """
+    examples = [(text, split_report(data)) for text, data in examples]
+    prefixes = {}
+    for part in PARTS:
+        messages = [{"role": "system", "content": system_prompt + part_instructions(part)}]
+        for text, parts in examples:
+            messages.append({"role": "user", "content": text})
+            messages.append({"role": "assistant", "content": json.dumps(parts[part], ensure_ascii=False)})
+        prefixes[part] = tuple(messages)
+    return prefixes
+
+
+async def assess_fanout(
+    client,
+    prefixes: Dict[str, tuple],
+    text: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    prompt_cache_key: str,
+):
+    """
+    Запрашивает все части одновременно и собирает полную оценку.
+    Возвращает (проверенный JSON, {часть: resp.usage}, {часть: задержка, с}).
+    Если какая-то часть не получена или не прошла проверку — FanoutError.
+    """
+    async def request(part: str):
+        started = time.monotonic()
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[*prefixes[part], {"role": "user", "content": text}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            prompt_cache_key=f"{prompt_cache_key}-{part}",
+            response_format=part_response_format(part),
+        )
+        return json.loads(resp.choices[0].message.content), resp.usage, time.monotonic() - started
+
+    results = await asyncio.gather(*(request(part) for part in PARTS), return_exceptions=True)
+    failed = {part: r for part, r in zip(PARTS, results) if isinstance(r, BaseException)}
+    if failed:
+        for part, error in failed.items():
+            logging.error(f"Параллельная оценка: часть {part} не получена: {error!r}")
+        raise FanoutError(f"не получены части: {', '.join(failed)}")
+
+    parts = {part: r[0] for part, r in zip(PARTS, results)}
+    usages = {part: r[1] for part, r in zip(PARTS, results)}
+    latencies = {part: r[2] for part, r in zip(PARTS, results)}
+    try:
+        data = merge_report(parts)
+    except (KeyError, TypeError, ReportValidationError) as e:
+        raise FanoutError(f"части не собираются в оценку: {e}") from e
+    return data, usages, latencies
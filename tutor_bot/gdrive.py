@@ -0,0 +1,219 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import httplib2
+import google_auth_httplib2
+from google.oauth2 import credentials as oauth2_credentials, service_account
+from googleapiclient.discovery import build
+
+from .drive_upload import ResumableUploader, DriveUploadError, SessionExpiredError
+
+# ─── GOOGLE DRIVE: КЭШ СЕРВИСА, УЧЁТНЫХ ДАННЫХ И ИНДЕКСА ФАЙЛОВ ─────────────
+# Учётные данные сервисного аккаунта разбираются один раз за жизнь процесса,
+# токен обновляется заранее, до истечения. Клиент Drive строится один раз
+# на поток (httplib2 не потокобезопасен, а выгрузки идут из пула потоков).
+# Для журналов держим индекс «имя файла → fileId», чтобы обновление журнала
+# стоило один HTTP-запрос вместо поиска files().list на каждую выгрузку.
+
+DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive.file"]
+# Готовый OAuth-токен вместо ключа сервисного аккаунта — для локальных заглушек
+# (tools/fake_drive.py, нагрузочный стенд); такой токен не обновляется
+GOOGLE_ACCESS_TOKEN = os.getenv("GOOGLE_ACCESS_TOKEN")
+# Адрес Drive API для files().list, например http://127.0.0.1:8089/drive/v3/ (по умолчанию — Google)
+DRIVE_API_URL = os.getenv("DRIVE_API_URL")
+
+_credentials = None
+_credentials_lock = threading.Lock()
+_local = threading.local()
+
+_file_ids: Dict[Tuple[Optional[str], str], str] = {}
+_file_ids_lock = threading.Lock()
+
+_uploader: Optional[ResumableUploader] = None
+
+
+def get_credentials():
+    """
+    Возвращает закэшированные учётные данные с действующим токеном.
+    JSON ключа берётся из переменной окружения GOOGLE_SERVICE_ACCOUNT_JSON
+    (или готовый токен из GOOGLE_ACCESS_TOKEN).
+    """
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None and GOOGLE_ACCESS_TOKEN:
+            _credentials = oauth2_credentials.Credentials(GOOGLE_ACCESS_TOKEN)
+        if _credentials is None:
+            info = json.loads(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON"))
+            _credentials = service_account.Credentials.from_service_account_info(
+                info,
+                scopes=DRIVE_SCOPES
+            )
+        # valid == False, если токена ещё нет или он вот-вот истечёт
+        if not _credentials.valid:
+            _credentials.refresh(google_auth_httplib2.Request(httplib2.Http()))
+        return _credentials
+
+
+def refresh_credentials():
+    """
+    Принудительно обновляет токен (например, после ответа 401).
+    """
+    credentials = get_credentials()
+    if GOOGLE_ACCESS_TOKEN:
+        return credentials
+    with _credentials_lock:
+        credentials.refresh(google_auth_httplib2.Request(httplib2.Http()))
+    return credentials
+
+
+async def get_access_token(force_refresh: bool = False) -> str:
+    """
+    Возвращает действующий OAuth-токен для асинхронной выгрузки.
+    Обновление токена (сетевой запрос) выполняется в отдельном потоке.
+    """
+    if force_refresh:
+        return (await asyncio.to_thread(refresh_credentials)).token
+    if _credentials is not None and _credentials.valid:
+        return _credentials.token
+    return (await asyncio.to_thread(get_credentials)).token
+
+
+def build_drive_service():
+    """
+    Возвращает клиент Google Drive для текущего потока, создавая его при первом обращении.
+    """
+    credentials = get_credentials()
+    service = getattr(_local, "service", None)
+    if service is None:
+        options = {"api_endpoint": DRIVE_API_URL} if DRIVE_API_URL else None
+        service = build("drive", "v3", credentials=credentials, cache_discovery=False, client_options=options)
+        _local.service = service
+    return service
+
+
+def _escape_query(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def find_file_on_drive(service, filename, parent_folder_id):
+    """
+    Ищет файл filename в указанной папке parent_folder_id.
+    Сначала смотрит в локальный индекс, затем делает files().list.
+    Возвращает fileId, если найден, иначе None.
+    """
+    key = (parent_folder_id, filename)
+    with _file_ids_lock:
+        if key in _file_ids:
+            return _file_ids[key]
+
+    query = f"name = '{_escape_query(filename)}' and trashed = false"
+    if parent_folder_id:
+        query += f" and '{parent_folder_id}' in parents"
+    results = service.files().list(q=query, fields="files(id, name)").execute()
+    items = results.get("files", [])
+    if not items:
+        return None
+
+    with _file_ids_lock:
+        _file_ids[key] = items[0]["id"]
+    return items[0]["id"]
+
+
+def forget_file_id(filename, parent_folder_id) -> None:
+    """
+    Удаляет запись из индекса (файл удалён или перемещён на Диске).
+    """
+    with _file_ids_lock:
+        _file_ids.pop((parent_folder_id, filename), None)
+
+
+def remember_file_id(filename, parent_folder_id, file_id) -> None:
+    with _file_ids_lock:
+        _file_ids[(parent_folder_id, filename)] = file_id
+
+
+# ─── АСИНХРОННАЯ ВЫГРУЗКА ────────────────────────────────────────────────────
+def get_uploader() -> ResumableUploader:
+    global _uploader
+    if _uploader is None:
+        _uploader = ResumableUploader(get_access_token)
+    return _uploader
+
+
+def _find_file_id(filename, parent_folder_id):
+    return find_file_on_drive(build_drive_service(), filename, parent_folder_id)
+
+
+async def upload_file_to_gdrive_async(filepath, parent_folder_id=None, is_log=False):
+    """
+    Загружает или обновляет файл на Google Диске: возобновляемая выгрузка кусками
+    с повторами и общим ограничением полосы (см. drive_upload.py).
+    Если is_log=True и файл с таким именем уже есть в папке, обновляется его содержимое,
+    иначе создаётся новый файл в parent_folder_id.
+    Возвращает ID загруженного/обновлённого файла.
+    """
+    filename = os.path.basename(filepath)
+    metadata = {"name": filename}
+    if parent_folder_id:
+        metadata["parents"] = [parent_folder_id]
+
+    existing_id = None
+    if is_log:
+        with _file_ids_lock:
+            existing_id = _file_ids.get((parent_folder_id, filename))
+        if existing_id is None:
+            existing_id = await asyncio.to_thread(_find_file_id, filename, parent_folder_id)
+
+    if existing_id:
+        try:
+            await get_uploader().upload(filepath, metadata, file_id=existing_id)
+            logging.info(f"Updated '{filename}' on Google Drive (ID={existing_id})")
+            return existing_id
+        except DriveUploadError as e:
+            # 404 при открытии сессии — файл удалён на Диске; истёкшую сессию uploader открывает заново сам
+            if e.status != 404 or isinstance(e, SessionExpiredError):
+                raise
+            logging.warning(f"'{filename}' (ID={existing_id}) не найден на Google Drive, создаём заново")
+            forget_file_id(filename, parent_folder_id)
+
+    created = await get_uploader().upload(filepath, metadata)
+    file_id = created.get("id")
+    logging.info(f"Uploaded new '{filename}' to Google Drive (ID={file_id})")
+    if is_log and file_id:
+        remember_file_id(filename, parent_folder_id, file_id)
+    return file_id
+
+
+async def close_uploader() -> None:
+    global _uploader
+    if _uploader is not None:
+        await _uploader.close()
+        _uploader = None
+
+
+# ─── БЭКЕНД ХРАНИЛИЩА (STORAGE_BACKEND=gdrive, см. backends.py) ──────────────
+class DriveStorage:
+    def __init__(self, folder_id: str):
+        self.folder_id = folder_id
+
+    async def upload(self, filepath, is_log=False):
+        return await upload_file_to_gdrive_async(filepath, parent_folder_id=self.folder_id, is_log=is_log)
+
+    async def close(self) -> None:
+        await close_uploader()
+
+
+def create_storage() -> DriveStorage:
+    """
+    Проверяет настройки Google Drive и возвращает хранилище для фоновой синхронизации.
+    """
+    if not os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON") and not GOOGLE_ACCESS_TOKEN:
+        raise RuntimeError("Переменная окружения GOOGLE_SERVICE_ACCOUNT_JSON не установлена")
+    folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")  # ID папки на Google Диске
+    if not folder_id:
+        raise RuntimeError("Переменная окружения GOOGLE_DRIVE_FOLDER_ID не установлена")
+    return DriveStorage(folder_id)
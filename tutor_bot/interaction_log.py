@@ -0,0 +1,170 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+# ─── ЖУРНАЛ ЗАПРОСОВ В ФОРМАТЕ JSONL ─────────────────────────────────────────
+# Каждая пара запрос–ответ дописывается в конец файла одной строкой JSON.
+# Запись ведёт единственная фоновая задача: хэндлеры только кладут запись в очередь,
+# писатель собирает пачку, пишет её одним вызовом и делает один fsync на пачку.
+# Стоимость записи не зависит от размера истории, параллельные хэндлеры
+# не затирают записи друг друга.
+
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+LOG_BATCH_SIZE = 256
+
+
+class InteractionLog:
+    """
+    Журнал только на дозапись с ротацией по размеру и по дате (UTC).
+    При ротации текущий файл переименовывается в <имя>-<ГГГГММДД-ЧЧММСС>.jsonl,
+    а запись продолжается в новый файл с исходным именем.
+    on_rotate(путь) вызывается для файла, ушедшего в ротацию,
+    on_flush(путь) — после каждой пачки, сброшенной на диск.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = LOG_MAX_BYTES,
+        rotate_daily: bool = True,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        on_rotate: Optional[Callable[[str], None]] = None,
+        on_flush: Optional[Callable[[str], None]] = None,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.flush_interval = flush_interval
+        self.on_rotate = on_rotate
+        self.on_flush = on_flush
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._file = None
+        self._file_date = None
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    def append(self, entry: dict) -> asyncio.Future:
+        """
+        Ставит запись в очередь и сразу возвращает управление.
+        Возвращённый future завершается, когда запись сброшена на диск (fsync);
+        ждать его не обязательно.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        self._queue.put_nowait((line, future))
+        return future
+
+    async def close(self) -> None:
+        """
+        Дописывает всё, что осталось в очереди, и закрывает файл.
+        """
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ─── Фоновый писатель ───────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._writer())
+
+    async def _writer(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch: List[Tuple[str, asyncio.Future]] = [item]
+
+            # Набираем пачку: всё, что пришло за flush_interval
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < LOG_BATCH_SIZE:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                rotated = await asyncio.to_thread(self._write_batch, [line for line, _ in batch])
+            except Exception as e:
+                logging.error(f"Не удалось записать {len(batch)} записей в {self.path}: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            # Ошибка в обработчике не должна останавливать писателя: иначе future
+            # следующих записей не завершатся никогда
+            if rotated and self.on_rotate is not None:
+                try:
+                    self.on_rotate(rotated)
+                except Exception:
+                    logging.exception(f"Ошибка в on_rotate для {rotated}")
+            if self.on_flush is not None:
+                try:
+                    self.on_flush(self.path)
+                except Exception:
+                    logging.exception(f"Ошибка в on_flush для {self.path}")
+
+    def _write_batch(self, lines: List[str]) -> Optional[str]:
+        """
+        Выполняется в отдельном потоке: ротация (при необходимости), запись и fsync.
+        Возвращает путь к файлу, ушедшему в ротацию, или None.
+        """
+        rotated = self._maybe_rotate()
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file_date = self._current_file_date()
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return rotated
+
+    def _current_file_date(self):
+        if os.path.isfile(self.path):
+            return datetime.utcfromtimestamp(os.path.getmtime(self.path)).date()
+        return datetime.utcnow().date()
+
+    def _maybe_rotate(self) -> Optional[str]:
+        if not os.path.isfile(self.path):
+            return None
+        if self._file_date is None:
+            self._file_date = self._current_file_date()
+
+        too_big = os.path.getsize(self.path) >= self.max_bytes
+        new_day = self.rotate_daily and self._file_date != datetime.utcnow().date()
+        if not (too_big or new_day):
+            return None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        stem, ext = os.path.splitext(self.path)
+        suffix = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        rotated = f"{stem}-{suffix}{ext}"
+        n = 1
+        while os.path.exists(rotated):
+            rotated = f"{stem}-{suffix}-{n}{ext}"
+            n += 1
+        os.replace(self.path, rotated)
+        logging.info(f"Журнал {self.path} перенесён в {rotated}")
+        return rotated
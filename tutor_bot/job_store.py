@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, List, NamedTuple, Optional
+
+# ─── ДОЛГОВРЕМЕННОЕ ХРАНИЛИЩЕ ЗАДАЧ (SQLITE) ─────────────────────────────────
+# Каждая присланная работа студента — задача, которая проходит этапы:
+#   received    — сообщение принято (голосовое ещё не скачано)
+#   downloaded  — аудио скачано и подготовлено, лежит в JOB_SPOOL_DIR
+#   transcribed — есть текст (расшифровка или текст сообщения)
+#   assessed    — оценка получена и отправлена студенту
+#   delivered   — оценка записана в журнал, задача закрыта
+#   failed      — студенту сообщено об ошибке, задача закрыта
+# После каждого этапа задача сохраняется вместе с его результатом, поэтому
+# после перезапуска или падения прерванная задача продолжается с последнего
+# завершённого этапа: не скачивает и не расшифровывает аудио повторно,
+# а оценку берёт из кэша оценок. Сбой этапа повторяется сразу, в том же процессе,
+# с растущей задержкой; когда попытки исчерпаны, студенту сообщается об ошибке.
+
+STAGES = ("received", "downloaded", "transcribed", "assessed", "delivered")
+DONE_STAGES = ("delivered", "failed")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Задержка перед повтором после сбоя, секунды; удваивается с каждой попыткой
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+# Сколько хранить закрытые задачи, секунды
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+
+
+class Job(NamedTuple):
+    id: str
+    chat_id: int
+    kind: str       # "voice" или "text"
+    stage: str
+    message: str    # исходное сообщение Telegram (JSON), чтобы продолжить после перезапуска
+    data: dict      # результаты этапов: путь к аудио, текст, оценка, учёт токенов
+    attempts: int
+    error: Optional[str]
+
+
+def job_id_of(chat_id: int, message_id: int) -> str:
+    return f"{chat_id}:{message_id}"
+
+
+class JobStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    async def create(self, job_id: str, chat_id: int, kind: str, message: str, stage: str = "received", **data: Any) -> bool:
+        """
+        Регистрирует новую задачу. False — задача уже есть (повторная доставка обновления).
+        """
+        return await asyncio.to_thread(self._create, job_id, chat_id, kind, message, stage, data)
+
+    async def advance(self, job_id: str, stage: str, **data: Any) -> None:
+        """
+        Отмечает завершение этапа stage и дописывает его результаты в data.
+        """
+        await asyncio.to_thread(self._advance, job_id, stage, data)
+
+    async def fail(self, job_id: str, error: str, final: bool = False) -> None:
+        """
+        Учитывает неудачную попытку; final=True закрывает задачу (стадия failed).
+        """
+        await asyncio.to_thread(self._fail, job_id, error, final)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def unfinished(self) -> List[Job]:
+        """
+        Незакрытые задачи, у которых остались попытки, в порядке поступления.
+        """
+        return await asyncio.to_thread(self._unfinished)
+
+    async def exhausted(self) -> List[Job]:
+        """
+        Незакрытые задачи, у которых попыток не осталось (например, каждый раз роняли процесс).
+        """
+        return await asyncio.to_thread(self._unfinished, False)
+
+    async def prune(self, older_than: float = JOB_RETENTION) -> int:
+        return await asyncio.to_thread(self._prune, older_than)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ─── Диск (выполняется в потоке) ────────────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, chat_id INTEGER NOT NULL, kind TEXT NOT NULL,"
+                " stage TEXT NOT NULL, message TEXT NOT NULL, data TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0, error TEXT,"
+                " created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_stage ON jobs(stage, created)")
+        return self._conn
+
+    @staticmethod
+    def _row(row) -> Job:
+        return Job(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]), row[6], row[7])
+
+    def _create(self, job_id: str, chat_id: int, kind: str, message: str, stage: str, data: dict) -> bool:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO jobs (id, chat_id, kind, stage, message, data, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, chat_id, kind, stage, message, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            db.commit()
+        return cursor.rowcount == 1
+
+    def _advance(self, job_id: str, stage: str, data: dict) -> None:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                logging.error(f"Задача {job_id} не найдена в {self.path}")
+                return
+            merged = {**json.loads(row[0]), **data}
+            db.execute(
+                "UPDATE jobs SET stage = ?, data = ?, error = NULL, updated = ? WHERE id = ?",
+                (stage, json.dumps(merged, ensure_ascii=False), time.time(), job_id),
+            )
+            db.commit()
+
+    def _fail(self, job_id: str, error: str, final: bool) -> None:
+        with self._lock:
+            db = self._db()
+            if final:
+                db.execute(
+                    "UPDATE jobs SET stage = 'failed', error = ?, updated = ? WHERE id = ?",
+                    (error, time.time(), job_id),
+                )
+            else:
+                db.execute(
+                    "UPDATE jobs SET attempts = attempts + 1, error = ?, updated = ? WHERE id = ?",
+                    (error, time.time(), job_id),
+                )
+            db.commit()
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, chat_id, kind, stage, message, data, attempts, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row) if row is not None else None
+
+    def _unfinished(self, retryable: bool = True) -> List[Job]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, chat_id, kind, stage, message, data, attempts, error FROM jobs"
+                f" WHERE stage NOT IN (?, ?) AND attempts {'<' if retryable else '>='} ? ORDER BY created",
+                (*DONE_STAGES, JOB_MAX_ATTEMPTS),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def _prune(self, older_than: float) -> int:
+        with self._lock:
+            db = self._db()
+            removed = db.execute(
+                "DELETE FROM jobs WHERE stage IN (?, ?) AND updated < ?",
+                (*DONE_STAGES, time.time() - older_than),
+            ).rowcount
+            db.commit()
+        return removed
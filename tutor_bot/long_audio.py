@@ -0,0 +1,190 @@
+import os
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import span
+from .transcoder import (
+    AUDIO_PROFILE, AUDIO_PROFILES, AUDIO_SILENCE_THRESHOLD, PCM_BYTES_PER_SECOND, PCM_INPUT_ARGS,
+    TranscodeError, decode_pcm, detect_silences, transcode_audio,
+)
+from .transcription import TranscriptionError
+
+# ─── ПАРАЛЛЕЛЬНАЯ РАСШИФРОВКА ДЛИННЫХ ЗАПИСЕЙ ────────────────────────────────
+# Монолог на несколько минут одним запросом к Whisper расшифровывается долго,
+# а файл больше 25 МБ API не принимает вовсе. Такая запись делится по паузам
+# на куски около LONG_AUDIO_CHUNK_SECONDS, куски расшифровываются одновременно
+# (не больше LONG_AUDIO_CONCURRENCY на запись; общий лимит WHISPER_CONCURRENCY
+# действует как обычно), и время расшифровки близко ко времени одного куска.
+# Соседние куски перекрываются на LONG_AUDIO_OVERLAP секунд, чтобы слово на стыке
+# не потерялось, если подходящей паузы не нашлось; повтор на стыке убирается при склейке.
+
+# Длиннее (секунды, по данным Telegram) или больше (байты) — расшифровка кусками
+LONG_AUDIO_SECONDS = float(os.getenv("LONG_AUDIO_SECONDS", "120"))
+LONG_AUDIO_MAX_BYTES = int(os.getenv("LONG_AUDIO_MAX_BYTES", str(24 * 1024 * 1024)))
+# Желаемая и наибольшая длина куска: разрез — в паузе, ближайшей к желаемой длине
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "45"))
+LONG_AUDIO_MAX_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_MAX_CHUNK_SECONDS", "75"))
+# Хвост короче этого (секунды) присоединяется к предыдущему куску: на обрывке
+# в пару секунд Whisper ошибается чаще, а склейке не хватает слов для сравнения
+LONG_AUDIO_MIN_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_MIN_CHUNK_SECONDS", "5"))
+LONG_AUDIO_OVERLAP = float(os.getenv("LONG_AUDIO_OVERLAP", "1.5"))
+# Пауза короче этого (секунды) местом разреза не считается
+LONG_AUDIO_MIN_PAUSE = float(os.getenv("LONG_AUDIO_MIN_PAUSE", "0.4"))
+LONG_AUDIO_CONCURRENCY = int(os.getenv("LONG_AUDIO_CONCURRENCY", "4"))
+
+# recordings / chunks / pause (разрез в паузе) / hard (разрез без паузы) /
+# failed (нарезка или расшифровка кусков не удалась, запись ушла в Whisper целиком)
+LONG_AUDIO_STATS: Counter = Counter()
+
+# Сколько слов на стыке сравнивается при склейке и сколько должно совпасть,
+# чтобы считать их повтором (одно слово может повторять и сам студент: «No no»)
+STITCH_WINDOW = 12
+STITCH_MIN_WORDS = 2
+_PUNCTUATION = ".,!?;:\"'()«»—-…"
+
+
+class Chunk(NamedTuple):
+    start: float    # секунды от начала записи
+    end: float
+    cut: str        # как выбран конец куска: "pause", "hard" или "end"
+
+
+def is_long_audio(size: int, duration: Optional[float]) -> bool:
+    return size > LONG_AUDIO_MAX_BYTES or (duration is not None and duration > LONG_AUDIO_SECONDS)
+
+
+def plan_chunks(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    target: float = LONG_AUDIO_CHUNK_SECONDS,
+    longest: float = LONG_AUDIO_MAX_CHUNK_SECONDS,
+    overlap: float = LONG_AUDIO_OVERLAP,
+    shortest: float = LONG_AUDIO_MIN_CHUNK_SECONDS,
+) -> List[Chunk]:
+    """
+    Границы кусков. Разрез — в середине паузы, ближайшей к target секундам от начала
+    куска (но не ближе target / 2 и не дальше longest); без такой паузы — на longest.
+    Каждый разрез расширяется на overlap: половина уходит в текущий кусок, половина в следующий.
+    Последний кусок короче shortest присоединяется к предыдущему (тот выходит чуть длиннее longest).
+    """
+    chunks = []
+    start = 0.0
+    while duration - start > longest:
+        pauses = [(s + e) / 2 for s, e in silences if start + target / 2 <= (s + e) / 2 <= start + longest]
+        if pauses:
+            cut, kind = min(pauses, key=lambda p: abs(p - start - target)), "pause"
+        else:
+            cut, kind = start + longest, "hard"
+        chunks.append(Chunk(start, min(cut + overlap / 2, duration), kind))
+        start = max(cut - overlap / 2, 0.0)
+    if chunks and duration - start < shortest:
+        start = chunks.pop().start
+    chunks.append(Chunk(start, duration, "end"))
+    return chunks
+
+
+def _normalize(word: str) -> str:
+    return word.strip(_PUNCTUATION).lower()
+
+
+def _punctuation(words: Sequence[str]) -> int:
+    return sum(ch in _PUNCTUATION for word in words for ch in word)
+
+
+def _seam_overlap(tail: List[str], head: List[str], least: int = STITCH_MIN_WORDS) -> Tuple[int, int, int]:
+    """
+    Повтор на стыке: (слов отбросить в конце tail, слов пропустить в начале head, длина повтора).
+    Повтор короче least слов не ищется — (0, 0, 0).
+    """
+    best = (0, 0, 0)
+    for dropped in range(3):
+        for skipped in range(3):
+            for size in range(min(len(tail) - dropped, len(head) - skipped), max(best[2], least - 1), -1):
+                if tail[len(tail) - dropped - size:len(tail) - dropped] == head[skipped:skipped + size]:
+                    best = (dropped, skipped, size)
+                    break
+    return best
+
+
+def stitch_transcripts(texts: Sequence[str], window: int = STITCH_WINDOW) -> str:
+    """
+    Склеивает расшифровки соседних кусков. Повтор на стыке — самая длинная (не короче
+    STITCH_MIN_WORDS) последовательность слов, которой кончается предыдущий кусок и
+    начинается следующий, — остаётся один раз. На границе Whisper может оборвать или
+    дописать слово, поэтому повтор может отстоять от края на пару слов; они отбрасываются
+    вместе с ним. Из двух копий повтора остаётся та, где больше знаков препинания:
+    у края куска Whisper часто не ставит точку, и вместе с ней терялась бы граница предложения.
+    """
+    words: List[str] = []
+    for text in texts:
+        piece = text.split()
+        if words and piece:
+            dropped, skipped, size = _seam_overlap(
+                [_normalize(w) for w in words[-window:]], [_normalize(w) for w in piece[:window]]
+            )
+            if size:
+                del words[len(words) - dropped:]
+                if _punctuation(piece[skipped:skipped + size]) > _punctuation(words[-size:]):
+                    del words[-size:]
+                    piece = piece[skipped:]
+                else:
+                    piece = piece[skipped + size:]
+        words.extend(piece)
+    return " ".join(words)
+
+
+async def transcribe_long_audio(
+    audio: bytes, filename: str, transcribe: Callable[..., Awaitable[str]]
+) -> str:
+    """
+    Расшифровывает длинную запись кусками параллельно и склеивает текст.
+    transcribe — бэкенд расшифровки: корутина (байты, filename=...) → текст.
+    Если запись не удалось нарезать (ffmpeg), она расшифровывается целиком; если не
+    расшифрован какой-то кусок — тоже целиком, когда укладывается в LONG_AUDIO_MAX_BYTES.
+    """
+    try:
+        with span("split"):
+            pcm = await decode_pcm(audio)
+            silences = await detect_silences(pcm, AUDIO_SILENCE_THRESHOLD, LONG_AUDIO_MIN_PAUSE)
+    except (TranscodeError, OSError) as e:
+        LONG_AUDIO_STATS["failed"] += 1
+        logging.warning(f"Не удалось нарезать длинную запись ({len(audio)} байт), расшифровка целиком: {e}")
+        return await transcribe(audio, filename=filename)
+
+    duration = len(pcm) / PCM_BYTES_PER_SECOND
+    chunks = plan_chunks(duration, silences)
+    LONG_AUDIO_STATS.update(recordings=1, chunks=len(chunks))
+    LONG_AUDIO_STATS.update(chunk.cut for chunk in chunks if chunk.cut != "end")
+    logging.info(
+        f"Длинная запись {duration:.0f} с: {len(chunks)} кусков, "
+        f"разрезов в паузах {sum(c.cut == 'pause' for c in chunks)}, без пауз {sum(c.cut == 'hard' for c in chunks)}"
+    )
+
+    # Куски кодируются так же, как целые записи: профилем AUDIO_PROFILE, а без профиля —
+    # в MP3, как и непонятные Whisper форматы (libopus есть не в каждой сборке ffmpeg)
+    profile = AUDIO_PROFILES[AUDIO_PROFILE] or AUDIO_PROFILES["mp3"]
+    semaphore = asyncio.Semaphore(LONG_AUDIO_CONCURRENCY)
+
+    async def run_chunk(chunk: Chunk) -> str:
+        async with semaphore:
+            start = int(chunk.start * PCM_BYTES_PER_SECOND) // 2 * 2
+            end = int(chunk.end * PCM_BYTES_PER_SECOND) // 2 * 2
+            data = await transcode_audio(
+                pcm[start:end], fmt=profile.fmt, extra_args=profile.codec, input_args=PCM_INPUT_ARGS
+            )
+            with span("whisper_chunk"):
+                return await transcribe(data, filename=f"chunk.{profile.fmt}")
+
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    failed = [(n, r) for n, r in enumerate(results, 1) if isinstance(r, BaseException)]
+    if failed:
+        for n, error in failed:
+            logging.error(f"Длинная запись: кусок {n}/{len(chunks)} не расшифрован: {error!r}")
+        if len(audio) > LONG_AUDIO_MAX_BYTES:
+            raise TranscriptionError(f"не расшифровано кусков: {len(failed)} из {len(chunks)}")
+        LONG_AUDIO_STATS["failed"] += 1
+        logging.warning(f"Длинная запись ({len(audio)} байт): куски не расшифрованы, расшифровка целиком")
+        return await transcribe(audio, filename=filename)
+    return stitch_transcripts(results)
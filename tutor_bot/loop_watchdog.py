@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import asyncio
+import inspect
+import logging
+import sysconfig
+import threading
+import traceback
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from .metrics import inc, observe
+
+# ─── СТОРОЖ EVENT LOOP: ПОИСК БЛОКИРУЮЩИХ ВЫЗОВОВ ────────────────────────────
+# Синхронный вызов внутри async-хэндлера (клиент OpenAI без await, ffmpeg.run,
+# googleapiclient .execute(), json.dump всего журнала) останавливает event loop,
+# и вместе с ним ждут все остальные чаты. Сторож ставит в loop «пульс» —
+# callback раз в LOOP_WATCHDOG_INTERVAL секунд — и меряет, насколько он опоздал.
+# Пока loop стоит, отдельный поток снимает стек потока loop'а: в нём видно
+# блокирующий вызов и цепочку корутин (хэндлер → ... → функция с вызовом).
+# После разблокировки задержка и стек пишутся в лог с пометкой STALL_MARKER,
+# длительность попадает в метрики (этап loop_stall).
+# Накладные расходы — один callback в loop и один спящий поток; блокировки
+# короче LOOP_WATCHDOG_INTERVAL, не задевшие момент пульса, могут быть пропущены.
+
+LOOP_WATCHDOG = os.getenv("LOOP_WATCHDOG", "0") == "1"
+# Задержка пульса, начиная с которой loop считается заблокированным, секунды
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+LOOP_WATCHDOG_INTERVAL = float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.25"))
+# По этой строке блокировки ищет в журнале бота tools/loadtest.py
+STALL_MARKER = "Event loop заблокирован"
+
+
+# Стандартная библиотека и установленные пакеты (aiogram, aiohttp): их корутины
+# не считаются хэндлером, даже если стоят на стеке выше кода бота
+LIBRARY_PATHS = tuple({sysconfig.get_paths()[name] for name in ("stdlib", "purelib", "platlib")})
+
+
+def is_library(filename: str) -> bool:
+    return filename.startswith(LIBRARY_PATHS) or "site-packages" in filename
+
+
+def describe_stack(frame) -> Tuple[List[str], List[str]]:
+    """
+    Возвращает (цепочка корутин кода бота от внешней к внутренней, стек в виде строк).
+    Стек начинается с первой корутины: кадры asyncio, запустившие задачу, отброшены.
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    is_coroutine = [bool(f.f_code.co_flags & (inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR)) for f in frames]
+    start = is_coroutine.index(True) if any(is_coroutine) else 0
+    chain = [
+        f.f_code.co_name for f, coro in zip(frames, is_coroutine)
+        if coro and not is_library(f.f_code.co_filename)
+    ]
+    summary = traceback.StackSummary.extract((f, f.f_lineno) for f in frames[start:])
+    return chain, summary.format()
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD, interval: float = LOOP_WATCHDOG_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.stats: Counter = Counter()   # beats / stalls
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._due = 0.0   # когда должен сработать следующий пульс (time.monotonic)
+        self._stack: Optional[List[str]] = None
+        self._chain: List[str] = []
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    def start(self) -> None:
+        """
+        Запускает сторожа для текущего (работающего) event loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._schedule()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logging.info(f"Сторож event loop включён: порог {self.threshold * 1000:.0f} мс")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ─── Пульс (в event loop) ───────────────────────────────────────────────
+    def _schedule(self) -> None:
+        self._due = time.monotonic() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _beat(self) -> None:
+        lag = time.monotonic() - self._due
+        self.stats["beats"] += 1
+        if lag > self.threshold:
+            self._report(lag)
+        self._stack = None
+        self._chain = []
+        self._schedule()
+
+    def _report(self, lag: float) -> None:
+        self.stats["stalls"] += 1
+        self.max_lag = max(self.max_lag, lag)
+        observe("loop_stall", lag)
+        inc("loop_stalls_total")
+        if self._stack is None:
+            logging.error(f"{STALL_MARKER} на {lag * 1000:.0f} мс (стек снять не успели)")
+            return
+        handler = self._chain[0] if self._chain else "вне корутин"
+        logging.error(
+            f"{STALL_MARKER} на {lag * 1000:.0f} мс, хэндлер {handler}"
+            f" ({' → '.join(self._chain) or '—'}):\n{''.join(self._stack)}"
+        )
+
+    # ─── Наблюдатель (в отдельном потоке) ───────────────────────────────────
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            if self._stack is not None or time.monotonic() - self._due <= self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            # Стек снимается один раз за блокировку — в момент, когда порог уже превышен
+            self._chain, self._stack = describe_stack(frame)
+
+
+def start_watchdog() -> Optional[LoopWatchdog]:
+    """
+    Запускает сторожа, если он включён переменной LOOP_WATCHDOG=1.
+    """
+    if not LOOP_WATCHDOG:
+        return None
+    watchdog = LoopWatchdog()
+    watchdog.start()
+    return watchdog
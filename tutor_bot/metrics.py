@@ -0,0 +1,184 @@
+import os
+import time
+import bisect
+import asyncio
+import logging
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+# ─── МЕТРИКИ: ВРЕМЯ ЭТАПОВ, СЧЁТЧИКИ, /metrics ───────────────────────────────
+# Каждый этап обработки (скачивание, ffmpeg, Whisper, оценка, журнал, Drive,
+# отправка ответа) оборачивается в span(): его длительность попадает в
+# гистограмму этапа, исключение — в счётчик ошибок этапа. Счётчики
+# запросов и ошибок ведутся здесь же, а накопленная статистика других модулей
+# (токены, кэши, ffmpeg, очереди) подключается сборщиками register_collector().
+# Всё отдаётся в формате Prometheus на http://METRICS_HOST:METRICS_PORT/metrics.
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 — HTTP-эндпоинт выключен
+PREFIX = "tutor_bot"
+
+# Границы корзин гистограммы, секунды: от быстрых локальных этапов до долгой оценки
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+# Сколько последних значений хранить для точных p50/p95 в /stats
+RECENT = 1000
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]  # имя метрики, метки, значение
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=RECENT)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q: float) -> float:
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+STAGES: Dict[str, Histogram] = defaultdict(Histogram)
+COUNTERS: Counter = Counter()   # (имя, метки) → значение
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(stage: str, seconds: float) -> None:
+    STAGES[stage].observe(seconds)
+
+
+def inc(name: str, amount: float = 1, **labels: str) -> None:
+    COUNTERS[(name, _labels(labels))] += amount
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Замеряет время блока (в том числе с await внутри) как этап stage.
+    Исключение учитывается в errors_total{stage=...} и пробрасывается дальше.
+    """
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException as e:
+        if not isinstance(e, asyncio.CancelledError):
+            inc("errors_total", stage=stage)
+        raise
+    finally:
+        observe(stage, time.monotonic() - started)
+
+
+def timed(stage: str, func: Callable[[], Awaitable]) -> Callable[[], Awaitable]:
+    """
+    Оборачивает async-функцию без аргументов (например, задачу для планировщика):
+    замеряется только выполнение, без ожидания в очереди.
+    """
+    async def run():
+        with span(stage):
+            return await func()
+    return run
+
+
+def register_collector(collector: Callable[[], Iterable[Sample]]) -> None:
+    """
+    Подключает источник текущих значений (Counter модуля, статистика кэша, очередь).
+    """
+    _collectors.append(collector)
+
+
+def counter_samples(name: str, counter, label: str, **labels: str) -> List[Sample]:
+    """
+    Превращает Counter/dict вида {ключ: число} в отсчёты одной метрики с меткой label=ключ.
+    """
+    return [
+        (name, {**labels, label: key}, value)
+        for key, value in counter.items()
+        if isinstance(value, (int, float))
+    ]
+
+
+# ─── Вывод ──────────────────────────────────────────────────────────────────
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v)}"'.replace("\n", " ") for k, v in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    lines = [f"# TYPE {PREFIX}_stage_seconds histogram"]
+    for stage, histogram in sorted(STAGES.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+        lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+    by_name: Dict[str, List[str]] = defaultdict(list)
+    for (name, labels), value in sorted(COUNTERS.items()):
+        by_name[name].append(f"{PREFIX}_{name}{_format_labels(dict(labels))} {value:g}")
+    for collector in _collectors:
+        try:
+            samples = list(collector())
+        except Exception as e:
+            logging.error(f"Метрики: ошибка сборщика {collector!r}: {e}")
+            continue
+        for name, labels, value in samples:
+            by_name[name].append(f"{PREFIX}_{name}{_format_labels(labels)} {float(value):g}")
+    for name, samples in sorted(by_name.items()):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def stats_summary() -> str:
+    """
+    Короткая сводка для команды /stats: p50/p95 по этапам и основные счётчики.
+    """
+    if not STAGES:
+        return "Статистики пока нет."
+    lines = ["Этап: n, p50 / p95, с"]
+    for stage, histogram in sorted(STAGES.items()):
+        lines.append(f"{stage}: {histogram.count}, {histogram.quantile(0.5):.2f} / {histogram.quantile(0.95):.2f}")
+    counters = [
+        f"{name}{_format_labels(dict(labels))}: {value:g}" for (name, labels), value in sorted(COUNTERS.items())
+    ]
+    if counters:
+        lines += ["", *counters]
+    return "\n".join(lines)
+
+
+# ─── HTTP-эндпоинт ──────────────────────────────────────────────────────────
+async def _metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[web.AppRunner]:
+    """
+    Поднимает /metrics (если port не 0). Возвращает runner для остановки.
+    """
+    if not port:
+        return None
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"Метрики: http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,122 @@
+import os
+import logging
+from collections import Counter
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+# ─── ОБЩИЙ АСИНХРОННЫЙ КЛИЕНТ OPENAI ─────────────────────────────────────────
+# Один клиент на весь процесс: все хэндлеры используют общий пул HTTP-соединений
+# с keep-alive, поэтому TLS-рукопожатие не повторяется на каждый запрос,
+# а event loop aiogram не блокируется на время генерации.
+
+_client: Optional[AsyncOpenAI] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def create_openai_client(api_key: str) -> AsyncOpenAI:
+    """
+    Создаёт (один раз) общий AsyncOpenAI с ограниченным пулом соединений.
+    Размеры пула и таймауты настраиваются переменными окружения:
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE, OPENAI_KEEPALIVE_EXPIRY, OPENAI_TIMEOUT.
+    """
+    global _client
+    if _client is not None:
+        return _client
+
+    limits = httpx.Limits(
+        max_connections=_env_int("OPENAI_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("OPENAI_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("OPENAI_KEEPALIVE_EXPIRY", 120.0),
+    )
+    timeout = httpx.Timeout(_env_float("OPENAI_TIMEOUT", 180.0), connect=10.0)
+    http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    _client = AsyncOpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=_env_int("OPENAI_MAX_RETRIES", 2),
+    )
+    return _client
+
+
+def register_openai_client(client: AsyncOpenAI) -> None:
+    """
+    Делает client общим клиентом процесса (клиент из стороннего бэкенда LLM, см. backends.py).
+    """
+    global _client
+    _client = client
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Возвращает общий клиент, созданный через create_openai_client().
+    """
+    if _client is None:
+        raise RuntimeError("OpenAI клиент не инициализирован: вызовите create_openai_client()")
+    return _client
+
+
+async def warm_up_openai_client(model: str = "gpt-4.1") -> None:
+    """
+    Прогревает пул: открывает соединение лёгким запросом, чтобы первый студент
+    после старта не платил за DNS и TLS-рукопожатие.
+    """
+    try:
+        await get_openai_client().models.retrieve(model)
+        logging.info("OpenAI client warmed up")
+    except Exception as e:
+        logging.warning(f"Не удалось прогреть соединение с OpenAI: {e}")
+
+
+async def close_openai_client() -> None:
+    """
+    Закрывает пул соединений при остановке бота.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# ─── УЧЁТ ТОКЕНОВ ────────────────────────────────────────────────────────────
+# Накопленные итоги по всем запросам: requests, prompt_tokens, cached_tokens, completion_tokens
+USAGE_TOTALS: Counter = Counter()
+
+
+def record_usage(usage, **extra) -> dict:
+    """
+    Переводит resp.usage в словарь для журнала, добавляет его к USAGE_TOTALS и пишет в лог.
+    cached_tokens — часть промпта, взятая из кэша префиксов на стороне OpenAI.
+    extra — дополнительные поля (например, время до первого токена).
+    """
+    if usage is None:
+        return dict(extra)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    record = {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": cached,
+        "completion_tokens": usage.completion_tokens,
+        **extra,
+    }
+    USAGE_TOTALS.update(
+        requests=1,
+        prompt_tokens=usage.prompt_tokens,
+        cached_tokens=cached,
+        completion_tokens=usage.completion_tokens,
+    )
+    share = cached / usage.prompt_tokens if usage.prompt_tokens else 0.0
+    logging.info(
+        f"Токены: prompt={usage.prompt_tokens} (из кэша {cached}, {share:.0%}), "
+        f"completion={usage.completion_tokens}, {extra}"
+    )
+    return record
@@ -0,0 +1,172 @@
+import os
+import time
+import asyncio
+import logging
+from collections import Counter, OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+# ─── ЧЕСТНЫЙ ПЛАНИРОВЩИК ЗАДАЧ С ОГРАНИЧЕНИЕМ TPM ────────────────────────────
+# У каждого чата своя очередь; воркеры обходят чаты по кругу (round-robin)
+# и берут из каждого по одной задаче, причём у одного чата одновременно
+# выполняется не больше одной задачи. Десять голосовых от одного студента
+# не задерживают остальных: их задачи встают в круг наравне с чужими.
+# Перед запуском задача получает «бюджет» токенов из общего token bucket,
+# размер которого соответствует лимиту токенов в минуту у OpenAI.
+
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "450000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Грубая оценка числа токенов без токенизатора: ~3 символа на токен
+    для смеси русского и английского текста (с запасом).
+    """
+    return len(text) // 3 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket: per_minute токенов в минуту, ёмкость — минутный запас.
+    Задача дороже ёмкости ждёт полного бака и уводит его в минус.
+    """
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: int) -> float:
+        """
+        Ждёт, пока в баке не наберётся amount токенов. Возвращает время ожидания, с.
+        """
+        started = time.monotonic()
+        async with self._lock:
+            need = min(amount, self.capacity)
+            while True:
+                self._refill()
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return time.monotonic() - started
+                await asyncio.sleep((need - self._tokens) / self.rate)
+
+    def adjust(self, delta: int) -> None:
+        """
+        Поправка после ответа: delta = фактические токены − оценка.
+        """
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+Job = Tuple[Callable[[], Awaitable[Any]], int, asyncio.Future, float]
+
+
+class FairScheduler:
+    def __init__(self, name: str, workers: int, limiter: Optional[TokenBucket] = None):
+        self.name = name
+        self.workers = workers
+        self.limiter = limiter
+        self.stats: Counter = Counter()
+        self.wait_times: Deque[float] = deque(maxlen=1000)
+        self._queues: Dict[Hashable, Deque[Job]] = OrderedDict()
+        self._ring: Deque[Hashable] = deque()
+        self._running = set()
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._tasks = []
+
+    # ─── Публичный интерфейс ────────────────────────────────────────────────
+    async def submit(self, chat_id: Hashable, func: Callable[[], Awaitable[Any]], cost: int = 0) -> Any:
+        """
+        Ставит задачу func() в очередь чата chat_id и ждёт её результата.
+        cost — оценка токенов для общего лимита TPM (0 — без лимита).
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(chat_id, deque()).append((func, cost, future, time.monotonic()))
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.depth())
+        self._schedule(chat_id)
+        return await future
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def snapshot(self) -> dict:
+        """
+        Глубина очереди и время ожидания (p50/p95, секунды) для метрик и логов.
+        """
+        waits = sorted(self.wait_times)
+
+        def pct(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "depth": self.depth(),
+            "chats_waiting": len(self._ring),
+            "running": len(self._running),
+            "wait_p50": pct(0.50),
+            "wait_p95": pct(0.95),
+            **self.stats,
+        }
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ─── Воркеры ────────────────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._ready = asyncio.Semaphore(0)
+        loop = asyncio.get_running_loop()
+        for _ in range(self.workers):
+            self._tasks.append(loop.create_task(self._worker()))
+
+    def _schedule(self, chat_id: Hashable) -> None:
+        # Чат встаёт в круг, если у него есть задачи и ни одна сейчас не выполняется
+        if chat_id in self._running or chat_id in self._ring:
+            return
+        if self._queues.get(chat_id):
+            self._ring.append(chat_id)
+            self._ready.release()
+
+    async def _worker(self) -> None:
+        while True:
+            await self._ready.acquire()
+            chat_id = self._ring.popleft()
+            queue = self._queues[chat_id]
+            func, cost, future, enqueued = queue.popleft()
+            if not queue:
+                del self._queues[chat_id]
+            self._running.add(chat_id)
+
+            try:
+                if self.limiter is not None and cost:
+                    await self.limiter.acquire(cost)
+                wait = time.monotonic() - enqueued
+                self.wait_times.append(wait)
+                if wait > 5:
+                    logging.info(f"Планировщик {self.name}: задача чата {chat_id} ждала {wait:.1f} с, {self.snapshot()}")
+
+                if not future.cancelled():
+                    try:
+                        result = await func()
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        self.stats["completed"] += 1
+                        if not future.done():
+                            future.set_result(result)
+            finally:
+                self._running.discard(chat_id)
+                self._schedule(chat_id)
@@ -0,0 +1,112 @@
+import os
+import re
+from typing import List, NamedTuple
+
+# ─── ЛОКАЛЬНАЯ ПРОВЕРКА ОБЪЁМА ОТВЕТА ────────────────────────────────────────
+# По шаблону ответ должен содержать 10–12 предложений; за меньший объём модель
+# всё равно ставит 0 за объём. Явно короткие ответы отсекаем локально, за
+# микросекунды, и сразу отвечаем шаблоном. Пограничные случаи (7–9 предложений,
+# мало пунктуации в расшифровке Whisper) по-прежнему уходят в модель.
+
+REQUIRED_SENTENCES = 10
+PRECHECK_MAX_SENTENCES = int(os.getenv("PRECHECK_MAX_SENTENCES", "5"))  # «явно мало»: не больше стольких предложений
+PRECHECK_MAX_WORDS = int(os.getenv("PRECHECK_MAX_WORDS", "60"))         # ...и не больше стольких слов
+# Если слов на предложение больше этого, пунктуация расставлена плохо — считать нельзя
+RUN_ON_WORDS = 40
+
+# Сокращения, после которых точка не заканчивает предложение. Только настоящие
+# сокращения: обычные слова ("no", "fig", "mar") сюда не попадают, иначе
+# "The answer is no. We went home." считается одним предложением
+ABBREVIATIONS = {
+    "e.g", "i.e", "etc", "vs", "cf", "approx",
+    "mr", "mrs", "ms", "dr", "prof", "jr", "sr", "inc", "ltd",
+    "jan", "feb", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "u.s", "u.k", "a.m", "p.m", "ph.d", "m.sc", "b.sc",
+}
+# Сокращения перед числом: "No. 5", "Fig. 2", "pp. 10–12"; без числа — обычные слова
+NUMBER_ABBREVIATIONS = {"no", "nos", "fig", "vol", "pp"}
+
+_WORD_RE = re.compile(r"[A-Za-zА-Яа-яЁё0-9]+(?:['’\-][A-Za-zА-Яа-яЁё0-9]+)*")
+# Кандидат на конец предложения: . ! ? … (в т.ч. повторы и закрывающие кавычки/скобки)
+_BOUNDARY_RE = re.compile(r"(?:\.{3}|…|[.!?]+)[\"'”’»)\]]*(?=\s|$)")
+
+
+class PrecheckResult(NamedTuple):
+    sentences: int
+    words: int
+    verdict: str  # "short" — явно мало, "borderline" — решает модель, "ok"
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Делит текст на предложения с учётом сокращений (e.g., Dr., U.S.),
+    десятичных чисел (3.5) и многоточий.
+    """
+    sentences = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        token = text[start:match.start()].split()
+        last = token[-1].lower().rstrip(".") if token else ""
+        punct = match.group(0)
+
+        # "e.g." / "Dr." / "U.S." — не конец предложения (если дальше не заглавная после ! или ?)
+        if punct.startswith(".") and not punct.startswith("..."):
+            if last in ABBREVIATIONS:
+                continue
+            if last in NUMBER_ABBREVIATIONS and text[end:].lstrip()[:1].isdigit():
+                continue
+            # "et al."
+            if last == "al" and len(token) > 1 and token[-2].lower() == "et":
+                continue
+        # Одиночная буква с точкой — инициал ("J. Smith")
+        if punct == "." and len(last) == 1 and last.isalpha():
+            continue
+        # Многоточие внутри фразы: следующее слово со строчной буквы
+        if punct.startswith(("...", "…")):
+            rest = text[end:].lstrip()
+            if rest and rest[0].islower():
+                continue
+
+        sentence = text[start:end].strip()
+        if _WORD_RE.search(sentence):
+            sentences.append(sentence)
+        start = end
+
+    tail = text[start:].strip()
+    if _WORD_RE.search(tail):
+        sentences.append(tail)
+    return sentences
+
+
+def count_words(text: str) -> int:
+    return len(_WORD_RE.findall(text))
+
+
+def precheck(text: str) -> PrecheckResult:
+    sentences = len(split_sentences(text))
+    words = count_words(text)
+
+    if sentences and words / sentences > RUN_ON_WORDS:
+        # Расшифровка почти без точек — число предложений недостоверно
+        return PrecheckResult(sentences, words, "borderline")
+    if sentences <= PRECHECK_MAX_SENTENCES and words <= PRECHECK_MAX_WORDS:
+        return PrecheckResult(sentences, words, "short")
+    if sentences < REQUIRED_SENTENCES:
+        return PrecheckResult(sentences, words, "borderline")
+    return PrecheckResult(sentences, words, "ok")
+
+
+def short_response_reply(result: PrecheckResult) -> str:
+    """
+    Шаблонный ответ для явно короткого монолога (без обращения к модели).
+    """
+    return (
+        "Общая оценка: 2\n"
+        f"Ответ слишком короткий: {result.sentences} предл., {result.words} сл. "
+        f"По шаблону монолог должен содержать 10–12 полных предложений; "
+        f"ответы короче {REQUIRED_SENTENCES} предложений получают 0 баллов за объём.\n\n"
+        "Подробная оценка по аспектам не проводилась.\n"
+        "Рекомендация: запишите развёрнутый ответ — вступление, 2–3 аргумента с примерами, "
+        "рассмотрение альтернативной точки зрения и вывод — и отправьте его ещё раз."
+    )
@@ -0,0 +1,218 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import importlib
+import threading
+from collections import Counter
+from functools import partial
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram.types import Update
+
+if TYPE_CHECKING:
+    import multiprocessing
+
+# ─── ШАРДИРОВАНИЕ ОБРАБОТКИ ПО ПРОЦЕССАМ ─────────────────────────────────────
+# Один процесс принимает обновления (polling или вебхук) и раздаёт их
+# SHARD_WORKERS процессам-обработчикам через очереди multiprocessing.
+# Шард выбирается по chat_id, поэтому все сообщения одного студента попадают
+# в один и тот же процесс и обрабатываются в порядке поступления (очередь
+# чата в его FairScheduler). Каждый обработчик — отдельная копия модуля бота
+# со своим Bot, Dispatcher, клиентом OpenAI и журналом; ответ студенту он
+# отправляет сам, а в процесс приёма возвращает итог обработки обновления.
+
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))  # 0 — всё в одном процессе
+SHARD_INDEX_ENV = "SHARD_INDEX"                       # номер шарда внутри процесса-обработчика
+# Как часто проверять, живы ли обработчики (упавший перезапускается)
+SHARD_MONITOR_INTERVAL = 5.0
+
+
+def shard_index() -> Optional[int]:
+    """
+    Номер шарда, если код выполняется в процессе-обработчике, иначе None.
+    """
+    value = os.getenv(SHARD_INDEX_ENV)
+    return int(value) if value is not None else None
+
+
+def chat_id_of(update: Update) -> int:
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        chat = getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else update.update_id
+
+
+class ShardPool:
+    def __init__(self, module: str, workers: int):
+        self.module = module
+        self.workers = workers
+        self.stats: Counter = Counter()
+        # multiprocessing импортируется только при включённом шардировании: он заметно удлиняет старт
+        import multiprocessing
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queues = [self._ctx.Queue() for _ in range(workers)]
+        self._results = self._ctx.Queue()
+        self._processes: List[Optional["multiprocessing.Process"]] = [None] * workers
+        self._pending: Dict[int, float] = {}   # update_id -> время отправки
+        self._reader: Optional[threading.Thread] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ─── Процесс приёма ─────────────────────────────────────────────────────
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        for index in range(self.workers):
+            self._spawn(index)
+        self._reader = threading.Thread(target=self._read_results, name="shard-results", daemon=True)
+        self._reader.start()
+        self._monitor = self._loop.create_task(self._watch())
+        logging.info(f"Запущено {self.workers} процессов-обработчиков модуля {self.module}")
+
+    def dispatch(self, update: Update) -> int:
+        """
+        Отправляет обновление в шард его чата. Возвращает номер шарда.
+        """
+        index = chat_id_of(update) % self.workers
+        self._queues[index].put(update.model_dump(mode="json", exclude_none=True))
+        self._pending[update.update_id] = time.monotonic()
+        self.stats["dispatched"] += 1
+        return index
+
+    async def middleware(
+        self, handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]], event: Update, data: Dict[str, Any]
+    ) -> None:
+        """
+        Outer-middleware для dp.update: вместо локальной обработки отдаёт обновление в шард.
+        """
+        self.dispatch(event)
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+            "in_flight": len(self._pending),
+            **self.stats,
+        }
+
+    async def close(self, timeout: float = 60.0) -> None:
+        """
+        Просит обработчики доделать очереди и завершиться; не успевшие — останавливает.
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for q in self._queues:
+            q.put(None)
+        await asyncio.to_thread(self._join, timeout)
+        self._results.put(None)
+        if self._reader is not None:
+            await asyncio.to_thread(self._reader.join, 5)
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.module, index, self._queues[index], self._results),
+            name=f"shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _join(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning(f"Обработчик {process.name} не завершился вовремя, останавливаем")
+                process.terminate()
+                process.join(5)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(SHARD_MONITOR_INTERVAL)
+            for index, process in enumerate(self._processes):
+                if process is not None and not process.is_alive():
+                    # Очередь шарда сохраняется, новый процесс продолжит с того же места
+                    logging.error(f"Обработчик shard-{index} завершился (код {process.exitcode}), перезапуск")
+                    self.stats["restarts"] += 1
+                    self._spawn(index)
+
+    def _read_results(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._on_result, *item)
+
+    def _on_result(self, index: int, update_id: int, ok: bool, seconds: float) -> None:
+        sent = self._pending.pop(update_id, None)
+        self.stats["completed" if ok else "failed"] += 1
+        if sent is not None and time.monotonic() - sent > 60:
+            logging.info(f"Обновление {update_id} обработано в shard-{index} за {time.monotonic() - sent:.1f} с")
+
+
+# ─── Процесс-обработчик ─────────────────────────────────────────────────────
+def _worker_main(module_name: str, index: int, updates: "multiprocessing.Queue", results: "multiprocessing.Queue") -> None:
+    # Номер шарда нужен модулю бота уже при импорте (например, для имени журнала)
+    os.environ[SHARD_INDEX_ENV] = str(index)
+    module = importlib.import_module(module_name)
+    try:
+        asyncio.run(_worker_loop(module, index, updates, results))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(module, index: int, updates: "multiprocessing.Queue", results: "multiprocessing.Queue") -> None:
+    dp, bot = module.dp, module.bot
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    tasks = set()
+    last_of_chat: Dict[int, asyncio.Task] = {}
+
+    async def process(update: Update, previous: Optional[asyncio.Task]) -> None:
+        # Обновления одного чата обрабатываются строго по очереди
+        if previous is not None:
+            await asyncio.wait([previous])
+        started = time.monotonic()
+        ok = True
+        try:
+            await dp.feed_update(bot, update, **workflow_data)
+        except Exception:
+            ok = False
+            logging.exception(f"shard-{index}: ошибка обработки обновления {update.update_id}")
+        results.put((index, update.update_id, ok, time.monotonic() - started))
+
+    def forget(chat_id: int, task: asyncio.Task) -> None:
+        if last_of_chat.get(chat_id) is task:
+            del last_of_chat[chat_id]
+
+    if hasattr(module, "on_startup"):
+        await module.on_startup()
+    try:
+        while True:
+            try:
+                item = await asyncio.to_thread(updates.get, True, 1.0)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            update = Update.model_validate(item, context={"bot": bot})
+            chat_id = chat_id_of(update)
+            previous = last_of_chat.get(chat_id)
+            task = asyncio.create_task(process(update, previous if previous is not None and not previous.done() else None))
+            last_of_chat[chat_id] = task
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(partial(forget, chat_id))
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if hasattr(module, "on_shutdown"):
+            await module.on_shutdown()
+        await bot.session.close()
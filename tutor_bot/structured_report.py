@@ -0,0 +1,239 @@
+from typing import List
+
+# ─── СТРУКТУРИРОВАННАЯ ОЦЕНКА: JSON ОТ МОДЕЛИ, ОТЧЁТ СОБИРАЕТСЯ ЛОКАЛЬНО ─────
+# В обычном режиме модель пишет весь русский отчёт целиком, включая заголовки
+# и оформление, — это сотни лишних выходных токенов, а именно они определяют
+# задержку. Здесь модель возвращает компактный JSON по схеме (response_format),
+# мы проверяем его и собираем из него привычный отчёт. Оценки при этом
+# остаются машиночитаемыми и попадают в журнал как есть.
+
+ASPECTS = (
+    ("lexical_grammatical", "Лексическая и грамматическая точность"),
+    ("coherence", "Связность и логика"),
+    ("fluency", "Беглость и спонтанность"),
+    ("argumentation", "Аргументация и критическое мышление"),
+)
+ASPECT_TITLES = dict(ASPECTS)
+
+
+class ReportValidationError(ValueError):
+    pass
+
+
+def _array(items: dict) -> dict:
+    return {"type": "array", "items": items}
+
+
+def _object(properties: dict) -> dict:
+    # Строгий режим structured outputs: все поля обязательны, лишних нет
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+
+REPORT_SCHEMA = _object({
+    "overall": {"type": "integer", "description": "Общая оценка 2–5"},
+    "sentences": {"type": "integer", "description": "Число предложений в ответе студента"},
+    "summary": {"type": "string", "description": "Краткое общее заключение (по-русски)"},
+    "aspects": _array(_object({
+        "aspect": {"type": "string", "enum": [key for key, _ in ASPECTS]},
+        "score": {"type": "integer", "description": "Оценка 0–5"},
+        "comment": _STRING,
+        "pros": _array(_STRING),
+        "cons": _array(_STRING),
+    })),
+    "aspect_comments": _array(_STRING),
+    "recommendations": _STRING,
+    "errors": _array(_object({
+        "original": _STRING,
+        "corrected": _STRING,
+        "explanation": _STRING,
+    })),
+    "exercises": _array(_object({
+        "task": _STRING,
+        "items": _array(_STRING),
+    })),
+    "theory": _array(_STRING),
+})
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "oral_assessment", "strict": True, "schema": REPORT_SCHEMA},
+}
+
+# Добавляется к системному промпту в структурированном режиме
+STRUCTURED_INSTRUCTIONS = """
+Output format:
+Return a single JSON object that follows the provided schema, with no text outside of it. Do not write headings or numbering — the report layout is produced by the application.
+- overall: integer 2–5; aspects: exactly four entries in the order lexical_grammatical, coherence, fluency, argumentation, each scored 0–5.
+- comment, pros, cons, aspect_comments, recommendations, explanation, task and theory are written in Russian; original and corrected are quoted in English.
+- Leave pros/cons, aspect_comments, exercises or theory empty when there is nothing to say.
+"""
+
+
+def _check_objects(data: dict, field: str) -> None:
+    """
+    Поле-массив объектов: каждый элемент — dict со всеми полями схемы.
+    """
+    items = data[field]
+    if not isinstance(items, list):
+        raise ReportValidationError(f"{field}: ожидался массив")
+    required = REPORT_SCHEMA["properties"][field]["items"]["required"]
+    for item in items:
+        if not isinstance(item, dict):
+            raise ReportValidationError(f"{field}: ожидался объект, получено {item!r}")
+        missing = [key for key in required if key not in item]
+        if missing:
+            raise ReportValidationError(f"{field}: нет полей {', '.join(missing)}")
+
+
+def validate_report(data) -> dict:
+    """
+    Проверяет JSON модели сверх схемы: форму массивов, диапазоны оценок и полный
+    набор аспектов. Возвращает data с аспектами в каноническом порядке.
+    """
+    if not isinstance(data, dict):
+        raise ReportValidationError("ожидался JSON-объект")
+    missing = [key for key in REPORT_SCHEMA["required"] if key not in data]
+    if missing:
+        raise ReportValidationError(f"нет полей: {', '.join(missing)}")
+
+    for field in ("aspects", "errors", "exercises"):
+        _check_objects(data, field)
+
+    overall = data["overall"]
+    if not isinstance(overall, int) or not 2 <= overall <= 5:
+        raise ReportValidationError(f"общая оценка вне диапазона 2–5: {overall!r}")
+
+    aspects = {}
+    for item in data["aspects"]:
+        key = item["aspect"]
+        if key not in ASPECT_TITLES or key in aspects:
+            raise ReportValidationError(f"неизвестный или повторный аспект: {key!r}")
+        score = item["score"]
+        if not isinstance(score, int) or not 0 <= score <= 5:
+            raise ReportValidationError(f"оценка аспекта {key} вне диапазона 0–5: {score!r}")
+        aspects[key] = item
+    if len(aspects) != len(ASPECTS):
+        absent = [key for key, _ in ASPECTS if key not in aspects]
+        raise ReportValidationError(f"нет оценки аспектов: {', '.join(absent)}")
+
+    return {**data, "aspects": [aspects[key] for key, _ in ASPECTS]}
+
+
+def render_report(data: dict) -> str:
+    """
+    Собирает русский отчёт из проверенного JSON — в том же виде, что EXAMPLE_*_OUTPUT
+    в prompts.py: аспекты через пустую строку, ошибки таблицей «Ошибка | Исправление | Тематика».
+    """
+    lines: List[str] = [f"Общая оценка: {data['overall']}"]
+    if data["summary"]:
+        lines.append(data["summary"])
+
+    lines += ["", "Оценка по аспектам:"]
+    for number, item in enumerate(data["aspects"], 1):
+        if number > 1:
+            lines.append("")
+        lines.append(f"{number}. {ASPECT_TITLES[item['aspect']]}: {item['score']}")
+        if item["comment"]:
+            lines.append(f"   {item['comment']}")
+        for title, points in (("Плюсы", item["pros"]), ("Минусы", item["cons"])):
+            if points:
+                lines.append(f"   {title}:")
+                lines += [f"   - {point}" for point in points]
+
+    errors = [f"| {e['original']} | {e['corrected']} | {e['explanation']} |" for e in data["errors"]]
+    sections = (
+        ("Комментарии по аспектам:", [f"- {c}" for c in data["aspect_comments"]]),
+        ("Общие рекомендации:", [data["recommendations"]] if data["recommendations"] else []),
+        ("Список ошибок:", ["| Ошибка | Исправление | Тематика |", *errors] if errors else []),
+    )
+    for title, body in sections:
+        if body:
+            lines += ["", title, *body]
+
+    if data["exercises"]:
+        lines += ["", "Практические упражнения:"]
+        for number, exercise in enumerate(data["exercises"], 1):
+            if number > 1:
+                lines.append("")
+            lines.append(f"Упражнение {number}: {exercise['task']}")
+            lines += [f"  {item}" for item in exercise["items"]]
+
+    if data["theory"]:
+        lines += ["", "Теоретическая справка:", *[f"- {t}" for t in data["theory"]]]
+
+    return "\n".join(lines).strip() + "\n"
+
+
+def scores_of(data: dict) -> dict:
+    """
+    Только оценки — для журнала и аналитики.
+    """
+    return {
+        "overall": data["overall"],
+        "sentences": data["sentences"],
+        **{item["aspect"]: item["score"] for item in data["aspects"]},
+    }
+
+
+# ─── РАЗБИЕНИЕ ОЦЕНКИ НА ЧАСТИ ДЛЯ ПАРАЛЛЕЛЬНЫХ ЗАПРОСОВ ──────────────────────
+# Каждый аспект оценивается отдельным запросом (схема ASPECT_SCHEMA), ещё один
+# запрос (GENERAL_SCHEMA) даёт общую оценку, список ошибок и упражнения.
+# merge_report() собирает части обратно в объект REPORT_SCHEMA.
+
+GENERAL = "general"
+ASPECT_SCHEMA = _object({
+    key: value for key, value in REPORT_SCHEMA["properties"]["aspects"]["items"]["properties"].items()
+    if key != "aspect"
+})
+GENERAL_SCHEMA = _object({
+    key: value for key, value in REPORT_SCHEMA["properties"].items() if key != "aspects"
+})
+
+
+def part_response_format(part: str) -> dict:
+    schema = GENERAL_SCHEMA if part == GENERAL else ASPECT_SCHEMA
+    return {"type": "json_schema", "json_schema": {"name": f"oral_assessment_{part}", "strict": True, "schema": schema}}
+
+
+def part_instructions(part: str) -> str:
+    """
+    Дополнение к системному промпту для одной части оценки.
+    """
+    if part == GENERAL:
+        return (
+            "\nOutput format:\nReturn a single JSON object following the provided schema. "
+            "Give the overall score (2–5), the sentence count, a short summary, aspect comments, recommendations, "
+            "the complete list of errors, practice exercises and theory. Per-aspect scores are produced separately — do not include them. "
+            "Russian text except for quoted English examples.\n"
+        )
+    return (
+        f"\nOutput format:\nEvaluate ONLY the aspect “{ASPECT_TITLES[part]}”. Return a single JSON object following "
+        "the provided schema: score (0–5), comment, pros and cons for this aspect only, in Russian except for quoted English examples. "
+        "Leave pros/cons empty when there is nothing to say.\n"
+    )
+
+
+def split_report(data: dict) -> dict:
+    """
+    Делит полную оценку на части {аспект: ..., "general": ...} — для few-shot примеров.
+    """
+    parts = {GENERAL: {key: value for key, value in data.items() if key != "aspects"}}
+    for item in data["aspects"]:
+        parts[item["aspect"]] = {key: value for key, value in item.items() if key != "aspect"}
+    return parts
+
+
+def merge_report(parts: dict) -> dict:
+    """
+    Собирает части в объект REPORT_SCHEMA и проверяет его.
+    """
+    data = dict(parts[GENERAL])
+    data["aspects"] = [{"aspect": key, **parts[key]} for key, _ in ASPECTS]
+    return validate_report(data)
@@ -0,0 +1,89 @@
+import os
+import asyncio
+import logging
+from typing import List, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+# ─── ПОТОКОВАЯ ОТПРАВКА ОТВЕТА С ПРАВКОЙ СООБЩЕНИЯ ───────────────────────────
+# Текст оценки приходит от модели по кусочкам; студент видит его сразу:
+# первое сообщение отправляется с первыми токенами, дальше оно редактируется.
+# Правки идут не чаще раза в STREAM_EDIT_INTERVAL секунд (лимиты Telegram
+# на редактирование), а при переходе через лимит длины текст продолжается
+# в новом сообщении.
+
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))
+
+
+class StreamingReply:
+    def __init__(self, message: Message, limit: int, min_interval: float = STREAM_EDIT_INTERVAL):
+        self.message = message
+        self.limit = limit
+        self.min_interval = min_interval
+        self.text = ""              # весь полученный текст
+        self._current = ""          # текст текущего (последнего) сообщения
+        self._shown = ""            # что сейчас реально отображается в текущем сообщении
+        self._sent: Optional[Message] = None
+        self._done: List[str] = []  # тексты уже закрытых сообщений
+        self._next_edit = 0.0
+
+    async def feed(self, delta: str) -> None:
+        """
+        Добавляет очередной фрагмент и при необходимости обновляет сообщение.
+        """
+        if not delta:
+            return
+        self.text += delta
+        self._current += delta
+
+        # Перенос в новое сообщение: режем по последнему переводу строки до лимита
+        while len(self._current) > self.limit:
+            cut = self._current.rfind("\n", 0, self.limit)
+            if cut < self.limit // 2:
+                cut = self.limit
+            head, self._current = self._current[:cut], self._current[cut:].lstrip("\n")
+            await self._show(head, force=True)
+            self._done.append(head)
+            self._sent = None
+            self._shown = ""
+
+        await self._show(self._current)
+
+    async def finish(self) -> str:
+        """
+        Показывает окончательный текст и возвращает его целиком.
+        """
+        self._current = self._current.rstrip()
+        if self._current:
+            await self._show(self._current, force=True)
+        return self.text.strip()
+
+    async def _show(self, text: str, force: bool = False) -> None:
+        if not text.strip() or text == self._shown:
+            return
+        loop = asyncio.get_running_loop()
+        if not force and loop.time() < self._next_edit:
+            return
+
+        while True:
+            try:
+                if self._sent is None:
+                    self._sent = await self.message.answer(text)
+                else:
+                    await self._sent.edit_text(text)
+                break
+            except TelegramRetryAfter as e:
+                if not force:
+                    # Пропускаем промежуточную правку, покажем позже
+                    self._next_edit = loop.time() + e.retry_after
+                    return
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                if "not modified" in str(e):
+                    break
+                logging.error(f"Не удалось обновить сообщение с оценкой: {e}")
+                return
+
+        self._shown = text
+        self._next_edit = loop.time() + self.min_interval
@@ -0,0 +1,247 @@
+import os
+import re
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import span
+
+# ─── ПЕРЕКОДИРОВАНИЕ АУДИО В ПАМЯТИ ──────────────────────────────────────────
+# ffmpeg запускается как асинхронный подпроцесс: исходные байты подаются в stdin,
+# результат читается из stdout. Временные файлы на диске не создаются,
+# event loop не блокируется, число одновременных процессов ffmpeg ограничено.
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class TranscodeError(RuntimeError):
+    """ffmpeg завершился с ошибкой или не уложился в таймаут."""
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("FFMPEG_CONCURRENCY", str(os.cpu_count() or 2))))
+    return _semaphore
+
+
+async def _run_ffmpeg(args: Sequence[str], data: bytes) -> Tuple[int, bytes, bytes]:
+    """
+    Запускает ffmpeg с аргументами args, подаёт data в stdin и возвращает
+    (код возврата, stdout, stderr). Таймаут процесса задаётся FFMPEG_TIMEOUT (секунды).
+    """
+    timeout = float(os.getenv("FFMPEG_TIMEOUT", "60"))
+
+    async with _get_semaphore():
+        with span("transcode"):
+            proc = await asyncio.create_subprocess_exec(
+                FFMPEG_BINARY, *args,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(input=data), timeout=timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise TranscodeError(f"ffmpeg не уложился в {timeout:.0f} с")
+    return proc.returncode, out, err
+
+
+def _ffmpeg_failed(returncode: int, err: bytes) -> TranscodeError:
+    message = err.decode("utf-8", errors="replace").strip()
+    logging.error(f"ffmpeg завершился с кодом {returncode}: {message}")
+    return TranscodeError(message or f"ffmpeg вернул код {returncode}")
+
+
+async def transcode_audio(
+    data: bytes, fmt: str = "mp3", extra_args: Sequence[str] = (), input_args: Sequence[str] = ()
+) -> bytes:
+    """
+    Перекодирует аудио из байтов data в формат fmt и возвращает результат байтами.
+    extra_args вставляются перед описанием выхода (фильтры, битрейт, число каналов),
+    input_args — перед входом (формат сырого PCM, у которого нет заголовка).
+    """
+    returncode, out, err = await _run_ffmpeg(
+        ("-hide_banner", "-loglevel", "error", "-nostdin", *input_args, "-i", "pipe:0", *extra_args, "-f", fmt, "pipe:1"),
+        data,
+    )
+    if returncode != 0 or not out:
+        raise _ffmpeg_failed(returncode, err)
+    return out
+
+
+# ─── ОПРЕДЕЛЕНИЕ ФОРМАТА И БЫСТРЫЙ ПУТЬ БЕЗ ПЕРЕКОДИРОВАНИЯ ──────────────────
+# Голосовые Telegram — это уже OGG/Opus, который Whisper принимает напрямую.
+# Формат определяется по сигнатуре в заголовке файла; ffmpeg запускается
+# только для форматов, которые Whisper не понимает.
+
+# Форматы, которые Whisper принимает как есть
+WHISPER_FORMATS = {"ogg", "mp3", "wav", "flac", "m4a", "webm"}
+
+# Сколько раз был выбран каждый путь: "passthrough", "transcoded" или "preprocessed"
+# (аудио ушло в Whisper после предобработки профилем AUDIO_PROFILE)
+TRANSCODE_STATS: Counter = Counter()
+
+
+def sniff_audio_format(data: bytes) -> Optional[str]:
+    """
+    Определяет контейнер по первым байтам. Возвращает расширение или None.
+    """
+    head = data[:16]
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"ID3") or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    return None
+
+
+# ─── ПРЕДОБРАБОТКА РЕЧИ ПЕРЕД WHISPER ────────────────────────────────────────
+# Профиль AUDIO_PROFILE задаёт цепочку ffmpeg: обрезка тишины в начале и в конце
+# записи (silenceremove; конец — тем же фильтром по развёрнутому звуку, areverse),
+# понижение частоты до 16 кГц (aresample — Whisper всё равно работает с 16 кГц),
+# моно (-ac 1) и речевой Opus (или MP3) с низким битрейтом. Паузы внутри ответа
+# не вырезаются: по ним Whisper расставляет пунктуацию, и они нужны для оценки беглости.
+# Если результат не меньше исходника (а его формат Whisper принимает) или ffmpeg
+# не справился, аудио идёт обычным путём без предобработки.
+# Размер и задержка Whisper по профилям сравниваются в tools/audio_profile_bench.py.
+# По умолчанию предобработка выключена (passthrough), пока замеры на настоящих
+# записях не покажут, что сжатие не ухудшает расшифровку.
+
+AUDIO_PROFILE = os.getenv("AUDIO_PROFILE", "passthrough")
+# Порог тишины и сколько тишины оставить у краёв записи, секунды
+AUDIO_SILENCE_THRESHOLD = os.getenv("AUDIO_SILENCE_THRESHOLD", "-45dB")
+AUDIO_SILENCE_KEEP = float(os.getenv("AUDIO_SILENCE_KEEP", "0.3"))
+AUDIO_SAMPLE_RATE = 16000
+
+
+class AudioProfile(NamedTuple):
+    fmt: str                    # формат выхода ffmpeg (-f) и расширение для Whisper
+    codec: Tuple[str, ...]      # кодек и битрейт
+
+
+AUDIO_PROFILES: Dict[str, Optional[AudioProfile]] = {
+    "passthrough": None,        # без предобработки: как есть или MP3 для непонятных Whisper форматов
+    "speech": AudioProfile("ogg", ("-c:a", "libopus", "-b:a", "24k", "-application", "voip")),
+    "compact": AudioProfile("ogg", ("-c:a", "libopus", "-b:a", "12k", "-application", "voip")),
+    "mp3": AudioProfile("mp3", ("-c:a", "libmp3lame", "-b:a", "32k")),
+}
+if AUDIO_PROFILE not in AUDIO_PROFILES:
+    raise RuntimeError(f"Неизвестный AUDIO_PROFILE={AUDIO_PROFILE!r}, доступны: {', '.join(AUDIO_PROFILES)}")
+
+# Предобработка: runs / failed / larger (исходник оказался меньше) / bytes_in / bytes_out
+PREPROCESS_STATS: Counter = Counter()
+
+
+def preprocess_args(profile: AudioProfile) -> Tuple[str, ...]:
+    trim = (
+        f"silenceremove=start_periods=1:start_threshold={AUDIO_SILENCE_THRESHOLD}"
+        f":start_silence={AUDIO_SILENCE_KEEP}"
+    )
+    return (
+        "-vn",
+        "-af", f"{trim},areverse,{trim},areverse,aresample={AUDIO_SAMPLE_RATE}",
+        "-ac", "1",
+        *profile.codec,
+    )
+
+
+async def preprocess_audio(data: bytes, profile: AudioProfile) -> bytes:
+    """
+    Прогоняет аудио через цепочку профиля и учитывает размер до и после.
+    """
+    out = await transcode_audio(data, fmt=profile.fmt, extra_args=preprocess_args(profile))
+    PREPROCESS_STATS.update(runs=1, bytes_in=len(data), bytes_out=len(out))
+    logging.info(
+        f"Предобработка аудио: {len(data)} → {len(out)} байт ({len(out) / len(data):.0%}), "
+        f"всего {PREPROCESS_STATS['bytes_in']} → {PREPROCESS_STATS['bytes_out']}"
+    )
+    return out
+
+
+async def prepare_for_transcription(data: bytes, profile_name: str = AUDIO_PROFILE) -> Tuple[bytes, str]:
+    """
+    Возвращает (байты, расширение) для отправки в Whisper.
+    С профилем предобработки аудио обрезается и сжимается (см. AUDIO_PROFILES).
+    Без него поддерживаемые форматы передаются без изменений, остальные
+    перекодируются в MP3; быстрый путь отключается переменной WHISPER_PASSTHROUGH=0.
+    """
+    fmt = sniff_audio_format(data)
+    profile = AUDIO_PROFILES[profile_name]
+
+    if profile is not None:
+        try:
+            out = await preprocess_audio(data, profile)
+        except (TranscodeError, OSError) as e:
+            # Например, в сборке ffmpeg нет libopus: дальше — обычный путь без предобработки
+            PREPROCESS_STATS["failed"] += 1
+            logging.warning(f"Предобработка аудио ({profile_name}) не удалась: {e}")
+        else:
+            if len(out) < len(data) or fmt not in WHISPER_FORMATS:
+                TRANSCODE_STATS["preprocessed"] += 1
+                return out, profile.fmt
+            PREPROCESS_STATS["larger"] += 1
+
+    passthrough = os.getenv("WHISPER_PASSTHROUGH", "1") != "0"
+
+    if passthrough and fmt in WHISPER_FORMATS:
+        TRANSCODE_STATS["passthrough"] += 1
+        return data, fmt
+
+    TRANSCODE_STATS["transcoded"] += 1
+    logging.info(f"Перекодирование в MP3 (формат: {fmt or 'не определён'}), статистика: {dict(TRANSCODE_STATS)}")
+    return await transcode_audio(data, fmt="mp3"), "mp3"
+
+
+# ─── ПАУЗЫ В ДЛИННЫХ ЗАПИСЯХ ─────────────────────────────────────────────────
+# Для нарезки длинных монологов (long_audio.py) запись один раз декодируется
+# в сырой PCM 16 кГц моно: куски вырезаются из него срезом байтов, без повторного
+# декодирования. Паузы ищет фильтр silencedetect — ffmpeg печатает
+# silence_start / silence_end в stderr, сам вывод отбрасывается (-f null).
+
+PCM_BYTES_PER_SECOND = AUDIO_SAMPLE_RATE * 2    # s16le, один канал
+PCM_INPUT_ARGS = ("-f", "s16le", "-ar", str(AUDIO_SAMPLE_RATE), "-ac", "1")
+_SILENCE_LINE = re.compile(rb"silence_(start|end): (-?[\d.]+)")
+
+
+async def decode_pcm(data: bytes) -> bytes:
+    return await transcode_audio(data, fmt="s16le", extra_args=("-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE)))
+
+
+async def detect_silences(pcm: bytes, threshold: str, min_duration: float) -> List[Tuple[float, float]]:
+    """
+    Паузы в PCM (формат PCM_INPUT_ARGS) не короче min_duration: список (начало, конец) в секундах.
+    """
+    returncode, _, err = await _run_ffmpeg(
+        (
+            "-hide_banner", "-nostats", "-nostdin", *PCM_INPUT_ARGS, "-i", "pipe:0",
+            "-af", f"silencedetect=noise={threshold}:d={min_duration}", "-f", "null", "-",
+        ),
+        pcm,
+    )
+    if returncode != 0:
+        raise _ffmpeg_failed(returncode, err)
+
+    silences = []
+    start = None
+    for kind, value in _SILENCE_LINE.findall(err):
+        if kind == b"start":
+            start = max(float(value), 0.0)
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    if start is not None:   # тишина до конца записи
+        silences.append((start, len(pcm) / PCM_BYTES_PER_SECOND))
+    return silences
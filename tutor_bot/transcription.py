@@ -0,0 +1,54 @@
+import os
+import asyncio
+import logging
+from typing import Optional
+
+from .openai_client import get_openai_client
+
+# ─── АСИНХРОННАЯ РАСШИФРОВКА ЧЕРЕЗ WHISPER ───────────────────────────────────
+# Отдельная стадия конвейера: аудио передаётся из памяти, число одновременных
+# запросов к Whisper ограничено семафором, каждый вызов — с таймаутом.
+# Так всплеск голосовых после занятия не выстраивается в очередь в event loop.
+
+WHISPER_MODEL = "whisper-1"
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class TranscriptionError(RuntimeError):
+    """Расшифровка не удалась или не уложилась в таймаут."""
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("WHISPER_CONCURRENCY", "8")))
+    return _semaphore
+
+
+async def transcribe_audio(audio: bytes, filename: str = "voice.mp3") -> str:
+    """
+    Отправляет байты аудио в Whisper и возвращает текст расшифровки.
+    filename нужен API только для определения формата по расширению.
+    Таймаут одного вызова задаётся WHISPER_TIMEOUT (секунды).
+    """
+    timeout = float(os.getenv("WHISPER_TIMEOUT", "90"))
+    client = get_openai_client()
+
+    async with _get_semaphore():
+        try:
+            resp = await asyncio.wait_for(
+                client.audio.transcriptions.create(
+                    model=WHISPER_MODEL,
+                    file=(filename, audio),
+                ),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logging.error(f"Whisper не ответил за {timeout:.0f} с ({len(audio)} байт)")
+            raise TranscriptionError("Превышено время ожидания расшифровки")
+        except Exception as e:
+            logging.error(f"Ошибка расшифровки через Whisper: {e}")
+            raise TranscriptionError(str(e)) from e
+
+    return resp.text.strip()
@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+import logging
+import secrets
+from typing import Any, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+# ─── ПРИЁМ ОБНОВЛЕНИЙ ЧЕРЕЗ WEBHOOK ──────────────────────────────────────────
+# Альтернатива start_polling: Telegram сам присылает обновления POST-запросами
+# на aiohttp-сервер. Приём отделён от обработки: обновление проверяется
+# (секретный токен из заголовка X-Telegram-Bot-Api-Secret-Token), разбирается
+# и ставится в обработку отдельной задачей, а Telegram сразу получает 200 —
+# долгая оценка не задерживает ответ и не вызывает повторную доставку.
+#
+# Включается WEBHOOK_ENABLED=1. Адрес, который сообщается Telegram, —
+# WEBHOOK_URL + WEBHOOK_PATH (без WEBHOOK_URL вебхук не регистрируется:
+# удобно для локальной проверки через tools/replay_updates.py).
+
+WEBHOOK_ENABLED = os.getenv("WEBHOOK_ENABLED", "0") == "1"
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")        # публичный адрес, например https://bot.example.com
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # 1–256 символов: A-Z, a-z, 0-9, _ и -
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class UpdateIntake:
+    """
+    aiohttp-обработчик вебхука: проверяет секрет, разбирает обновление
+    и передаёт его диспетчеру в фоне.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, secret: str, **workflow_data: Any):
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret
+        self.workflow_data = workflow_data
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not secrets.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            logging.warning(f"Вебхук: запрос с неверным секретом от {request.remote}")
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except (json.JSONDecodeError, ValueError) as e:
+            logging.warning(f"Вебхук: некорректное обновление: {e}")
+            return web.Response(status=400)
+
+        self.submit(update)
+        return web.Response(status=200)
+
+    def submit(self, update: Update) -> None:
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update, **self.workflow_data)
+        except Exception:
+            logging.exception(f"Ошибка обработки обновления {update.update_id}")
+
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """
+        Даёт обрабатываемым обновлениям завершиться, остальные отменяет.
+        """
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logging.warning(f"Вебхук: при остановке прервано {len(pending)} обновлений")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    host: str = WEBHOOK_HOST,
+    port: int = WEBHOOK_PORT,
+    path: str = WEBHOOK_PATH,
+    url: Optional[str] = WEBHOOK_URL,
+    secret: Optional[str] = WEBHOOK_SECRET,
+    drop_pending_updates: bool = False,
+) -> None:
+    """
+    Поднимает aiohttp-сервер вебхука и работает до отмены задачи (Ctrl+C).
+    drop_pending_updates — отбросить обновления, накопившиеся до регистрации вебхука.
+    """
+    if not secret:
+        raise RuntimeError("Переменная окружения WEBHOOK_SECRET не установлена")
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    intake = UpdateIntake(dp, bot, secret, **workflow_data)
+    app = web.Application()
+    app.router.add_post(path, intake.handle)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"Вебхук слушает http://{host}:{port}{path}")
+
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        if url:
+            await bot.set_webhook(
+                url=url.rstrip("/") + path,
+                secret_token=secret,
+                drop_pending_updates=drop_pending_updates,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+            logging.info(f"Вебхук зарегистрирован в Telegram: {url.rstrip('/')}{path}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await intake.close()
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()